@@ -1,5 +1,9 @@
 import logging
-from typing import List, Dict, Optional
+import os
+import re
+import time
+import aiohttp
+from typing import Any, List, Dict, Optional, Set, Tuple
 from bs4 import BeautifulSoup
 import asyncio
 from datetime import datetime
@@ -8,6 +12,8 @@ from urllib.parse import urlparse
 from config.config import Config
 from utils.proxy_manager import ProxyManager
 from api.base_client import BaseAPIClient
+from api.render_farm import RenderFarm, child_pids, process_tree_rss_mb
+from utils.adaptive_limiter import AdaptiveLimiter
 from fake_useragent import UserAgent
 from playwright.async_api import async_playwright, Browser
 
@@ -24,13 +30,55 @@ class HHVClient(BaseAPIClient):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.user_agent = UserAgent()
         self.browser: Optional[Browser] = None
+        self.playwright = None
+        # Vom Playwright-Start erzeugte Kindprozesse (Treiber samt Chromium) für das RSS-Limit
+        self._browser_pids: Set[int] = set()
+        self.render_farm: Optional[RenderFarm] = None
+        # Optionale CrawlFrontier für wiederaufnehmbare Crawls (wird vom Bot gesetzt)
+        self.frontier = None
         self.proxy_manager = proxy_manager
+        self.probe_stats = {
+            'probes': 0,
+            'failed_probes': 0,
+            'bytes_read': 0,
+            'total_duration': 0.0
+        }
+        self.fetch_stats = {
+            'fragments': 0,
+            'fragment_bytes': 0,
+            'renders': 0
+        }
+        self.render_stats = self._empty_render_stats()
+        self.render_limiter = AdaptiveLimiter(
+            min_limit=config.API.RENDER_MIN_CONCURRENCY,
+            max_limit=config.API.RENDER_MAX_CONCURRENCY,
+            target_latency=config.API.RENDER_TARGET_LATENCY,
+            max_cpu_percent=config.API.RENDER_MAX_CPU_PERCENT,
+            max_rss_mb=config.API.RENDER_MAX_RSS_MB,
+            rss_probe=self._browser_rss_mb
+        )
+        self.browser_recycles = 0
 
     async def initialize(self):
         """Initialisiert den HHV Client."""
         try:
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(headless=True)
+            if self.config.API.RENDER_WORKERS > 0:
+                self.render_farm = RenderFarm(
+                    num_workers=self.config.API.RENDER_WORKERS,
+                    pages_per_worker=self.config.API.RENDER_PAGES_PER_WORKER,
+                    max_rss_mb=self.config.API.RENDER_MAX_RSS_MB,
+                    block_resource_types=self._blocked_resource_types(),
+                    blocked_domains=self.config.API.BLOCKED_DOMAINS
+                )
+                await self.render_farm.start()
+                # RSS-Grenze des Limiters gilt für alle Worker zusammen
+                self.render_limiter.max_rss_mb = self.config.API.RENDER_MAX_RSS_MB * self.config.API.RENDER_WORKERS
+                return True
+
+            existing_children = child_pids(os.getpid())
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(headless=True)
+            self._browser_pids = child_pids(os.getpid()) - existing_children
             self.logger.info("Playwright-Browser erfolgreich gestartet.")
             return True
         except Exception as e:
@@ -45,6 +93,9 @@ class HHVClient(BaseAPIClient):
             products = await self._scrape_category(category_url)
             all_products.extend(products)
             self.logger.info(f"{len(products)} Produkte aus Kategorie {category_url} gefunden.")
+            if self.frontier:
+                await self.frontier.flush()
+            self.report_render_stats()
             return all_products
         except Exception as e:
             self.logger.error(f"Fehler beim Abrufen der Produkte: {e}")
@@ -56,11 +107,15 @@ class HHVClient(BaseAPIClient):
         :return: Liste aller gescrapten Produkte.
         """
         try:
-            self.logger.info(f"Starte Scraping für {len(categories)} Kategorien mit 20 Workern...")
+            self.logger.info(
+                f"Starte Scraping für {len(categories)} Kategorien "
+                f"(Render-Limit {self.render_limiter.limit}, max. {self.render_limiter.max_limit})..."
+            )
             all_products = []
 
-            # Semaphore für gleichzeitige Worker
-            semaphore = asyncio.Semaphore(20)
+            # Kategorien höchstens bis zum maximalen Render-Limit starten; wie viele
+            # Seiten tatsächlich gleichzeitig gerendert werden, regelt render_limiter
+            semaphore = asyncio.Semaphore(self.render_limiter.max_limit)
 
             async def scrape_category_worker(category_url: str):
                 """Worker-Funktion zum Scrapen einer Kategorie."""
@@ -71,75 +126,436 @@ class HHVClient(BaseAPIClient):
                         all_products.extend(products)
                         self.logger.info(f"{len(products)} Produkte aus Kategorie {category_url} erfolgreich gescrapt.")
 
+            if self.frontier:
+                # Offene Kategorien eines abgebrochenen Crawls zuerst
+                pending = set(self.frontier.pending('category', [f"{self.base_url}{category}" for category in categories]))
+                categories = sorted(categories, key=lambda category: f"{self.base_url}{category}" not in pending)
+
             # Starte alle Worker parallel
             tasks = [asyncio.create_task(scrape_category_worker(category)) for category in categories]
             await asyncio.gather(*tasks)
+            if self.frontier:
+                await self.frontier.flush()
             
             self.logger.info(f"Scraping abgeschlossen. Insgesamt {len(all_products)} Produkte gefunden.")
+            self.report_render_stats()
             return all_products
 
         except Exception as e:
             self.logger.error(f"Fehler beim parallelen Scraping der Kategorien: {e}")
             return []
+    async def crawl_catalog(self) -> Tuple[List[Dict], bool]:
+        """
+        Crawlt alle Kategorien aus SCANNER.product_urls Seite für Seite, bis eine Seite
+        keine neuen Artikel mehr liefert.
+        :return: Die Produkte und ob jede Seite geladen wurde; nur ein vollständiger
+                 Crawl taugt als Snapshot für den Katalog-Diff.
+        """
+        products: List[Dict] = []
+        seen = set()
+        complete = True
+        try:
+            for category_url in self.config.SCANNER.product_urls:
+                for page in range(1, self.config.API.HHV_MAX_PAGES + 1):
+                    listing = await self._scrape_listing(self._page_url(category_url, page))
+                    if listing is None:
+                        self.logger.warning(f"Seite {page} von {category_url} fehlgeschlagen, Katalog unvollständig.")
+                        complete = False
+                        break
+                    new_products = [product for product in listing if product['artikel_id'] not in seen]
+                    if not new_products:
+                        break
+                    seen.update(product['artikel_id'] for product in new_products)
+                    await self._add_product_details(new_products)
+                    products.extend(new_products)
+                else:
+                    self.logger.warning(f"{category_url}: Seitenlimit {self.config.API.HHV_MAX_PAGES} erreicht, Katalog unvollständig.")
+                    complete = False
+
+            self.logger.info(f"Katalog-Crawl: {len(products)} Produkte, vollständig: {complete}")
+            return products, complete
+        except Exception as e:
+            self.logger.error(f"Fehler beim Katalog-Crawl: {e}")
+            return products, False
+        finally:
+            if self.frontier:
+                await self.frontier.flush()
+            self.report_render_stats()
+
+    def _page_url(self, category_url: str, page: int) -> str:
+        """URL einer Listing-Seite; Seite 1 ist die Kategorie-URL selbst."""
+        if page == 1:
+            return category_url
+        separator = '&' if '?' in category_url else '?'
+        return f"{category_url}{separator}{self.config.API.HHV_PAGE_PARAM}={page}"
+
     async def _scrape_category(self, category_url: str) -> List[Dict]:
         """
         Scrapt eine Kategorie und extrahiert Produkte.
         :param category_url: Die URL der Kategorie.
         :return: Liste der gescrapten Produkte.
         """
-        products = []
-        url = f"{self.base_url}{category_url}"
-
         try:
-            html_content = await self._render_page(url)
-            if html_content:
-                products = await self._parse_products(html_content)
-
-                # Ergänze Produktdetails
-                for product in products:
-                    detail_url = f"{self.base_url}/clothing/artikel/{product['artikel_id']}"
-                    product['url'] = detail_url
-                    details = await self._scrape_product_details(detail_url)
-                    if details and isinstance(details, dict):
-                        product.update(details)
-                        product["sku"] = details.get("sku", "N/A")
-                        self.logger.info(f"Produkt erfolgreich extrahiert: {product}")
-                    else:
-                        self.logger.warning(f"Keine Details für Produkt mit Artikel-ID {product['artikel_id']} gefunden.")
-
+            products = await self._scrape_listing(f"{self.base_url}{category_url}") or []
+            await self._add_product_details(products)
             return products
 
         except Exception as e:
             self.logger.error(f"Fehler beim Scrapen der Kategorie {category_url}: {e}")
             return []
 
+    async def _scrape_listing(self, url: str) -> Optional[List[Dict]]:
+        """
+        Lädt und parst eine Listing-Seite; frisch erledigte Seiten kommen aus der Frontier.
+        :return: Produkte der Seite oder None, wenn die Seite nicht geladen werden konnte.
+        """
+        if self.frontier and self.frontier.is_fresh(url, 'category'):
+            return self.frontier.result(url, 'category') or []
+        html_content = await self._fetch_html(url)
+        if not html_content:
+            if self.frontier:
+                self.frontier.fail(url, kind='category')
+            return None
+        products = await self._parse_products(html_content)
+        if self.frontier:
+            self.frontier.complete(url, products, kind='category')
+        return products
+
+    async def _add_product_details(self, products: List[Dict]) -> None:
+        """Ergänzt Produkte einer Listing-Seite um die Daten ihrer Detailseiten."""
+        for product in products:
+            detail_url = f"{self.base_url}/clothing/artikel/{product['artikel_id']}"
+            product['url'] = detail_url
+            details = await self._scrape_product_details_checkpointed(detail_url)
+            if details and isinstance(details, dict):
+                product.update(details)
+                product["sku"] = details.get("sku", "N/A")
+                self.logger.info(f"Produkt erfolgreich extrahiert: {product}")
+            else:
+                self.logger.warning(f"Keine Details für Produkt mit Artikel-ID {product['artikel_id']} gefunden.")
+
+    async def _scrape_product_details_checkpointed(self, detail_url: str) -> Optional[Dict]:
+        """Wie _scrape_product_details, überspringt aber frisch erledigte URLs der Frontier."""
+        if not self.frontier:
+            return await self._scrape_product_details(detail_url)
+        if self.frontier.is_fresh(detail_url, 'detail'):
+            details = self.frontier.result(detail_url, 'detail')
+            if details:
+                return details
+
+        details = await self._scrape_product_details(detail_url)
+        if details:
+            self.frontier.complete(detail_url, details, kind='detail')
+        else:
+            self.frontier.fail(detail_url, kind='detail')
+        await self.frontier.maybe_flush()
+        return details
+
+    # Marker, an denen ein Fragment als vollständig erkannt wird (analog zu den Selektoren in _render_page)
+    LISTING_MARKER = 'item_gallery_entry_'
+    DETAIL_MARKER = 'items--detail--headline--base-component'
+
+    async def _fetch_html(self, url: str, allow_render: bool = True) -> Optional[str]:
+        """
+        Holt den HTML-Inhalt einer Seite, bevorzugt als Turbo-Frame-Fragment.
+        Enthält das Fragment nicht die benötigten Elemente, wird die Seite gerendert.
+        :param url: Die URL der Seite.
+        :param allow_render: False, um ohne Fragment None statt eines Renderings zu liefern.
+        :return: HTML-Inhalt oder None bei Fehlern.
+        """
+        if getattr(self.config.API, 'HHV_TURBO_FRAMES', False):
+            html_content = await self._fetch_fragment(url)
+            if html_content:
+                return html_content
+        if not allow_render:
+            return None
+        self.fetch_stats['renders'] += 1
+        return await self._render_page(url)
+
+    async def _fetch_fragment(self, url: str) -> Optional[str]:
+        """
+        Fragt das Turbo-Frame-Fragment einer Seite mit dem Turbo-Frame-Header ab.
+        :param url: Die URL der Seite.
+        :return: Server-gerendertes Fragment oder None, wenn es nicht verwertbar ist.
+        """
+        is_detail = "/artikel/" in url
+        frame_id = self.config.API.HHV_DETAIL_FRAME if is_detail else self.config.API.HHV_LISTING_FRAME
+        marker = self.DETAIL_MARKER if is_detail else self.LISTING_MARKER
+
+        response = await self.get(url, headers={
+            'Turbo-Frame': frame_id,
+            'Accept': 'text/vnd.turbo-stream.html, text/html, application/xhtml+xml'
+        })
+        if not response or response.get('status') != 200 or response.get('type') != 'html':
+            return None
+
+        html_content = response['content']
+        if marker not in html_content:
+            self.logger.debug(f"Fragment für {url} ohne erwartete Elemente, nutze Rendering.")
+            return None
+
+        self.fetch_stats['fragments'] += 1
+        self.fetch_stats['fragment_bytes'] += len(html_content)
+        return html_content
+
     async def _render_page(self, url: str) -> Optional[str]:
         """
         Rendert eine Seite mit Playwright und gibt den HTML-Inhalt zurück.
         :param url: Die URL der Seite.
         :return: HTML-Inhalt der gerenderten Seite.
         """
+        # Warte auf spezifische Selektoren basierend auf der URL
+        if "/artikel/" in url:
+            wait_selector = '.items--detail--headline--base-component'
+        else:
+            wait_selector = 'turbo-frame[id^="item_gallery_entry_"]'
+
+        if self.render_farm:
+            async with self.render_limiter.slot():
+                html_content = await self.render_farm.render(url, wait_selector, user_agent=self.user_agent.random)
+            if html_content:
+                self.render_stats['pages'] += 1
+            return html_content
+
         try:
             if not self.browser:
                 raise RuntimeError("Browser ist nicht initialisiert.")
 
-            page = await self.browser.new_page()
-            await page.set_extra_http_headers({"User-Agent": self.user_agent.random})
-            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            async with self.render_limiter.slot():
+                page = await self.browser.new_page()
+                try:
+                    await page.route("**/*", self._route_request)
+                    page.on("response", self._track_response)
+                    await page.set_extra_http_headers({"User-Agent": self.user_agent.random})
+                    await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                    await page.wait_for_selector(wait_selector, timeout=30000)
 
-            # Warte auf spezifische Selektoren basierend auf der URL
-            if "/artikel/" in url:
-                await page.wait_for_selector('.items--detail--headline--base-component', timeout=30000)
-            else:
-                await page.wait_for_selector('turbo-frame[id^="item_gallery_entry_"]', timeout=30000)
-
-            html_content = await page.content()
-            await page.close()
-            return html_content
+                    self.render_stats['pages'] += 1
+                    return await page.content()
+                finally:
+                    await page.close()
 
         except Exception as e:
             self.logger.error(f"Fehler beim Rendern der Seite {url}: {e}")
             return None
+        finally:
+            await self._recycle_browser_if_needed()
+
+    def _browser_rss_mb(self) -> float:
+        """RSS des Browser-Prozessbaums in MB; andere Kindprozesse (z.B. redis-server) zählen nicht mit."""
+        return sum(process_tree_rss_mb(pid) for pid in self._browser_pids)
+
+    async def _recycle_browser_if_needed(self) -> None:
+        """Startet den Browser neu, sobald sein Speicherverbrauch das Limit überschreitet."""
+        limit = self.config.API.RENDER_MAX_RSS_MB
+        if not limit or not self.browser or self._browser_rss_mb() < limit:
+            return
+        async with self.render_limiter.exclusive():
+            # Ein anderer Aufrufer kann den Browser inzwischen schon neu gestartet haben
+            if not self.browser or self._browser_rss_mb() < limit:
+                return
+            self.logger.info(f"Browser über Speicherlimit ({limit} MB), starte neu")
+            await self.browser.close()
+            self.browser = await self.playwright.chromium.launch(headless=True)
+            self.browser_recycles += 1
+
+    async def capture_json(
+        self,
+        url: str,
+        url_pattern: str,
+        required_keys: Tuple[str, ...] = (),
+        timeout: float = 10.0
+    ) -> List[Any]:
+        """
+        Rendert eine Seite und sammelt JSON-Antworten, deren URL auf url_pattern passt.
+        Kehrt zurück, sobald alle required_keys in den gesammelten Payloads vorkommen,
+        ohne auf DOM-Selektoren zu warten.
+        :param url: Die URL der Seite.
+        :param url_pattern: Regulärer Ausdruck für die URLs der gewünschten XHR-Antworten.
+        :param required_keys: Schlüssel, die in den Payloads enthalten sein müssen.
+        :param timeout: Maximale Wartezeit in Sekunden.
+        :return: Liste der gesammelten Payloads (ggf. unvollständig nach Timeout).
+        """
+        payloads, _ = await self._capture_page(url, url_pattern, required_keys, timeout)
+        return payloads
+
+    async def _capture_page(
+        self,
+        url: str,
+        url_pattern: str,
+        required_keys: Tuple[str, ...] = (),
+        timeout: float = 10.0,
+        fallback_selector: Optional[str] = None
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Wie capture_json. Bleiben die Payloads unvollständig und ist fallback_selector
+        gesetzt, wird auf derselben, bereits geladenen Page auf den Selektor gewartet und
+        ihr HTML geliefert, statt die Seite ein zweites Mal zu rendern.
+        """
+        payloads: List[Any] = []
+        found_keys = set()
+        complete = asyncio.Event()
+        pattern = re.compile(url_pattern)
+
+        async def on_response(response):
+            try:
+                if not pattern.search(response.url):
+                    return
+                if 'json' not in response.headers.get('content-type', ''):
+                    return
+                payload = await response.json()
+                payloads.append(payload)
+                found_keys.update(self._collect_keys(payload))
+                if all(key in found_keys for key in required_keys):
+                    complete.set()
+            except Exception as e:
+                self.logger.debug(f"JSON-Antwort {response.url} nicht lesbar: {e}")
+
+        try:
+            if not self.browser:
+                raise RuntimeError("Browser ist nicht initialisiert.")
+
+            async with self.render_limiter.slot():
+                page = await self.browser.new_page()
+                try:
+                    await page.route("**/*", self._route_request)
+                    page.on("response", self._track_response)
+                    page.on("response", on_response)
+                    await page.set_extra_http_headers({"User-Agent": self.user_agent.random})
+                    await page.goto(url, wait_until="commit", timeout=60000)
+                    try:
+                        await asyncio.wait_for(complete.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        self.logger.debug(f"JSON-Capture für {url}: Timeout, {len(payloads)} Payloads erhalten")
+                    self.render_stats['pages'] += 1
+                    if complete.is_set() or not fallback_selector:
+                        return payloads, None
+                    await page.wait_for_selector(fallback_selector, timeout=30000)
+                    return payloads, await page.content()
+                finally:
+                    await page.close()
+
+        except Exception as e:
+            self.logger.error(f"Fehler beim JSON-Capture der Seite {url}: {e}")
+            return payloads, None
+        finally:
+            await self._recycle_browser_if_needed()
+
+    @classmethod
+    def _collect_keys(cls, payload: Any, depth: int = 0) -> set:
+        """Sammelt alle Schlüssel eines verschachtelten JSON-Payloads."""
+        keys = set()
+        if depth > 5:
+            return keys
+        if isinstance(payload, dict):
+            for key, value in payload.items():
+                keys.add(key)
+                keys |= cls._collect_keys(value, depth + 1)
+        elif isinstance(payload, list):
+            for item in payload[:50]:
+                keys |= cls._collect_keys(item, depth + 1)
+        return keys
+
+    @classmethod
+    def _find_value(cls, payload: Any, keys: Tuple[str, ...], depth: int = 0) -> Any:
+        """Liefert den ersten Wert zu einem der Schlüssel (Tiefensuche)."""
+        if depth > 5:
+            return None
+        if isinstance(payload, dict):
+            for key in keys:
+                if payload.get(key) not in (None, ""):
+                    return payload[key]
+            children = payload.values()
+        elif isinstance(payload, list):
+            children = payload[:50]
+        else:
+            return None
+        for child in children:
+            value = cls._find_value(child, keys, depth + 1)
+            if value is not None:
+                return value
+        return None
+
+    async def _capture_product_details(self, detail_url: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Extrahiert Produktdetails aus den JSON-Antworten der Detailseite. Reichen die
+        Antworten nicht aus, wird stattdessen das HTML der bereits gerenderten Page geliefert.
+        """
+        payloads, html_content = await self._capture_page(
+            detail_url,
+            self.config.API.HHV_CAPTURE_PATTERN,
+            required_keys=('sku', 'price'),
+            timeout=self.config.API.HHV_CAPTURE_TIMEOUT,
+            fallback_selector='.items--detail--headline--base-component'
+        )
+        sku = self._find_value(payloads, ('sku', 'catalog_number', 'catalogNumber'))
+        price = self._find_value(payloads, ('price', 'formatted_price', 'formattedPrice'))
+        if not sku or price is None:
+            return None, html_content
+
+        name_brand = self._find_value(payloads, ('brand', 'brand_name', 'brandName')) or ""
+        if isinstance(name_brand, dict):
+            name_brand = name_brand.get('name', "")
+        name_model = self._find_value(payloads, ('title', 'name', 'model')) or ""
+        return {
+            "name": f"{name_brand} {name_model}".strip(),
+            "brand": str(name_brand),
+            "model": str(name_model),
+            "sku": str(sku),
+            "price": str(price),
+            "detail_url": detail_url,
+            "timestamp": datetime.now().isoformat()
+        }, None
+
+    async def _route_request(self, route) -> None:
+        """Bricht Anfragen nach der konfigurierten Blockier-Policy ab."""
+        request = route.request
+        reason = self._block_reason(request.resource_type, request.url)
+        if reason:
+            self.render_stats['blocked'][reason] = self.render_stats['blocked'].get(reason, 0) + 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def _blocked_resource_types(self) -> List[str]:
+        types = list(self.config.API.BLOCK_RESOURCE_TYPES)
+        if self.config.API.BLOCK_STYLESHEETS:
+            types.append("stylesheet")
+        return types
+
+    def _block_reason(self, resource_type: str, url: str) -> Optional[str]:
+        """Liefert den Grund für eine Blockierung oder None, wenn die Anfrage erlaubt ist."""
+        api_config = self.config.API
+        if resource_type in self._blocked_resource_types():
+            return resource_type
+        host = urlparse(url).hostname or ""
+        if any(host == domain or host.endswith(f".{domain}") for domain in api_config.BLOCKED_DOMAINS):
+            return "tracker"
+        return None
+
+    def _track_response(self, response) -> None:
+        """Zählt die tatsächlich geladenen Bytes (laut Content-Length) pro Render-Lauf."""
+        try:
+            self.render_stats['loaded_requests'] += 1
+            self.render_stats['loaded_bytes'] += int(response.headers.get('content-length', 0))
+        except (TypeError, ValueError):
+            pass
+
+    @staticmethod
+    def _empty_render_stats() -> Dict:
+        return {'pages': 0, 'blocked': {}, 'loaded_requests': 0, 'loaded_bytes': 0}
+
+    def report_render_stats(self) -> Dict:
+        """Loggt die Render-Statistiken des laufenden Durchlaufs und setzt sie zurück."""
+        stats = self.render_stats
+        self.render_stats = self._empty_render_stats()
+        if stats['pages']:
+            blocked = sum(stats['blocked'].values())
+            self.logger.info(
+                f"Render-Statistik: {stats['pages']} Seiten, {blocked} Anfragen blockiert {stats['blocked']}, "
+                f"{stats['loaded_requests']} Anfragen mit {stats['loaded_bytes'] / 1024:.0f} KB geladen"
+            )
+        return stats
     async def _parse_products(self, html_content: str) -> List[Dict]:
         """
         Parst Produkte aus dem HTML-Inhalt einer Kategorie-Seite.
@@ -183,7 +599,18 @@ class HHVClient(BaseAPIClient):
         :return: Ein Dictionary mit den Produktdetails oder None bei Fehlern.
         """
         try:
-            html_content = await self._render_page(detail_url)
+            # JSON-Capture braucht eine Page im eigenen Prozess, nicht in der Render-Farm
+            capture = getattr(self.config.API, 'HHV_JSON_CAPTURE', False) and self.browser is not None
+            html_content = await self._fetch_html(detail_url, allow_render=not capture)
+            if not html_content and capture:
+                # Ohne Fragment: Daten aus den XHR-Antworten, sonst aus dem DOM derselben Page
+                product_details, html_content = await self._capture_product_details(detail_url)
+                if product_details:
+                    self.logger.info(f"Details für Produkt {product_details['sku']} aus JSON-Antworten extrahiert.")
+                    return product_details
+                self.fetch_stats['renders'] += 1
+                if not html_content:
+                    html_content = await self._render_page(detail_url)
             if not html_content:
                 return None
 
@@ -232,14 +659,110 @@ class HHVClient(BaseAPIClient):
         except Exception as e:
             self.logger.error(f"Fehler beim Extrahieren der Produktdetails von {detail_url}: {e}")
             return None
+    # Marker für die Verfügbarkeits-Probe (schema.org-Angaben und Größenauswahl der Detailseite)
+    PROBE_AVAILABILITY_PATTERN = re.compile(r'schema\.org/(InStock|OutOfStock|SoldOut|PreOrder|LimitedAvailability)', re.I)
+    PROBE_SIZE_PATTERN = re.compile(r'<option\b([^>]*)>\s*([^<]+?)\s*</option>', re.I)
+    PROBE_END_MARKERS = ('</select>', '</form>')
+
+    async def probe_availability(self, detail_url: str) -> Optional[Dict]:
+        """
+        Prüft die Verfügbarkeit eines Produkts ohne Browser-Rendering.
+        Die Detailseite wird gestreamt und abgebrochen, sobald Verfügbarkeit und
+        Größenauswahl gelesen sind, spätestens nach PROBE_MAX_BYTES.
+        :param detail_url: URL der Produktdetailseite.
+        :return: Dictionary mit 'available' und 'sizes' (Größe -> verfügbar) oder None bei Fehlern.
+        """
+        start = time.monotonic()
+        max_bytes = self.config.API.PROBE_MAX_BYTES
+        received = bytearray()
+        try:
+            if not self.session or self.session.closed:
+                self.session = aiohttp.ClientSession(timeout=self.timeout)
+
+            headers = self._get_headers()
+            # Komprimierte Antworten würden das byte-genaue Abbrechen verfälschen
+            headers['Accept-Encoding'] = 'identity'
+            kwargs = {}
+            proxy = await self.proxy_manager.get_proxy()
+            if proxy:
+                kwargs['proxy'] = proxy.get('http')
+
+            async with self.rate_limiter:
+                async with self.session.get(
+                    detail_url,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=self.config.API.PROBE_TIMEOUT),
+                    **kwargs
+                ) as response:
+                    if response.status != 200:
+                        raise RuntimeError(f"HTTP {response.status}")
+                    async for chunk in response.content.iter_chunked(4096):
+                        received.extend(chunk)
+                        if len(received) >= max_bytes or self._probe_complete(received):
+                            break
+
+            result = self._parse_probe(received.decode('utf-8', errors='ignore'))
+            self._record_probe(start, len(received), failed=result is None)
+            return result
+
+        except Exception as e:
+            self._record_probe(start, len(received), failed=True)
+            self.logger.warning(f"Verfügbarkeits-Probe für {detail_url} fehlgeschlagen: {e}")
+            return None
+
+    def _probe_complete(self, received: bytearray) -> bool:
+        """True, sobald Verfügbarkeit und das Ende der Größenauswahl im gelesenen Teil liegen."""
+        text = received.decode('utf-8', errors='ignore')
+        if not self.PROBE_AVAILABILITY_PATTERN.search(text):
+            return False
+        size_start = text.find('<select')
+        if size_start < 0:
+            return '</head>' in text and '<form' in text and '</form>' in text
+        return any(marker in text[size_start:] for marker in self.PROBE_END_MARKERS)
+
+    def _parse_probe(self, html: str) -> Optional[Dict]:
+        """Wertet den gelesenen Seitenanfang aus."""
+        sizes = {}
+        size_start = html.find('<select')
+        if size_start >= 0:
+            size_end = html.find('</select>', size_start)
+            block = html[size_start:size_end if size_end >= 0 else len(html)]
+            for attributes, label in self.PROBE_SIZE_PATTERN.findall(block):
+                if 'value=""' in attributes:
+                    continue
+                sizes[label] = 'disabled' not in attributes.lower()
+
+        match = self.PROBE_AVAILABILITY_PATTERN.search(html)
+        if match:
+            available = match.group(1).lower() in ('instock', 'limitedavailability')
+        elif sizes:
+            available = any(sizes.values())
+        else:
+            return None
+        return {'available': available, 'sizes': sizes}
+
+    def _record_probe(self, start: float, size: int, failed: bool = False) -> None:
+        self.probe_stats['probes'] += 1
+        self.probe_stats['bytes_read'] += size
+        self.probe_stats['total_duration'] += time.monotonic() - start
+        if failed:
+            self.probe_stats['failed_probes'] += 1
+
     async def cleanup(self):
         """
         Bereinigt alle Ressourcen.
         """
         try:
+            if self.render_farm:
+                await self.render_farm.close()
+                self.render_farm = None
             if self.browser:
                 await self.browser.close()
+                self.browser = None
                 self.logger.info("Playwright-Browser erfolgreich geschlossen.")
+            if self.playwright:
+                await self.playwright.stop()
+                self.playwright = None
         except Exception as e:
             self.logger.error(f"Fehler beim Bereinigen der Ressourcen: {e}")
 
@@ -248,7 +771,7 @@ class HHVClient(BaseAPIClient):
         Destruktor für sauberes Aufräumen.
         """
         try:
-            if self.browser:
+            if self.browser or self.render_farm:
                 asyncio.create_task(self.cleanup())
         except Exception as e:
             self.logger.error(f"Fehler beim Aufräumen im Destruktor: {e}", exc_info=True)
@@ -285,7 +808,7 @@ class HHVClient(BaseAPIClient):
         :return: Anzahl der Produkte.
         """
         try:
-            html_content = await self._render_page(category_url)
+            html_content = await self._fetch_html(category_url)
             if not html_content:
                 return 0
 
@@ -0,0 +1,375 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+try:
+    import psutil
+except ImportError:  # RSS-Limits sind optional
+    psutil = None
+
+
+def child_pids(pid: int) -> Set[int]:
+    """PIDs der direkten Kindprozesse; leer ohne psutil."""
+    if psutil is None:
+        return set()
+    try:
+        return {child.pid for child in psutil.Process(pid).children()}
+    except psutil.Error:
+        return set()
+
+
+def process_tree_rss_mb(pid: int, include_self: bool = True) -> float:
+    """RSS eines Prozesses inkl. aller Kindprozesse (Chromium) in MB; 0 ohne psutil."""
+    if psutil is None:
+        return 0.0
+    try:
+        process = psutil.Process(pid)
+        rss = process.memory_info().rss if include_self else 0
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return rss / (1024 * 1024)
+    except psutil.Error:
+        return 0.0
+
+
+async def _worker_loop(conn, settings: Dict) -> None:
+    """Event-Loop eines Render-Workers: eigener Browser, eigener Page-Pool."""
+    from playwright.async_api import async_playwright
+
+    logger = logging.getLogger(f"RenderWorker-{os.getpid()}")
+    playwright = await async_playwright().start()
+    state = {'browser': await playwright.chromium.launch(headless=True), 'renders': 0}
+    pages = asyncio.Semaphore(settings['pages_per_worker'])
+    recycle_lock = asyncio.Lock()
+    blocked_types = set(settings['block_resource_types'])
+    blocked_domains = tuple(settings['blocked_domains'])
+
+    async def route_request(route):
+        request = route.request
+        host = urlparse(request.url).hostname or ""
+        if request.resource_type in blocked_types or any(
+            host == domain or host.endswith(f".{domain}") for domain in blocked_domains
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def recycle_if_needed():
+        # Browser neu starten, sobald der Worker sein Speicherlimit überschreitet
+        if not settings['max_rss_mb'] or process_tree_rss_mb(os.getpid()) < settings['max_rss_mb']:
+            return
+        async with recycle_lock:
+            if process_tree_rss_mb(os.getpid()) < settings['max_rss_mb']:
+                return
+            # Alle Pages abwarten, damit kein laufendes Rendering den Browser verliert
+            for _ in range(settings['pages_per_worker']):
+                await pages.acquire()
+            try:
+                logger.info("Speicherlimit erreicht, starte Browser neu")
+                await state['browser'].close()
+                state['browser'] = await playwright.chromium.launch(headless=True)
+            finally:
+                for _ in range(settings['pages_per_worker']):
+                    pages.release()
+
+    async def render(request: Dict) -> Dict:
+        response = {'id': request['id'], 'html': None, 'error': None}
+        try:
+            async with pages:
+                page = await state['browser'].new_page()
+                try:
+                    await page.route("**/*", route_request)
+                    if request.get('user_agent'):
+                        await page.set_extra_http_headers({"User-Agent": request['user_agent']})
+                    await page.goto(request['url'], wait_until="domcontentloaded", timeout=request['timeout'] * 1000)
+                    if request.get('wait_selector'):
+                        await page.wait_for_selector(request['wait_selector'], timeout=request['timeout'] * 1000)
+                    response['html'] = await page.content()
+                finally:
+                    await page.close()
+            state['renders'] += 1
+        except Exception as e:
+            response['error'] = str(e)
+        response['rss_mb'] = process_tree_rss_mb(os.getpid())
+        conn.send(response)
+        await recycle_if_needed()
+
+    tasks = set()
+    try:
+        while True:
+            request = await asyncio.to_thread(conn.recv)
+            if request is None:
+                break
+            task = asyncio.create_task(render(request))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except (EOFError, OSError):
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await state['browser'].close()
+        await playwright.stop()
+
+
+def _worker_main(conn, settings: Dict) -> None:
+    """Einstiegspunkt des Worker-Prozesses."""
+    try:
+        asyncio.run(_worker_loop(conn, settings))
+    except KeyboardInterrupt:
+        pass
+
+
+class _RenderWorker:
+    """Handle des Hauptprozesses auf einen Worker-Prozess."""
+
+    def __init__(self, index: int, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.reader_task: Optional[asyncio.Task] = None
+        self.rss_mb = 0.0
+        self.renders = 0
+        self.crashes = 0
+        self.started_at = time.monotonic()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    @property
+    def load(self) -> int:
+        return len(self.pending)
+
+
+class RenderFarm:
+    """
+    Verteilt Seiten-Renderings auf mehrere Prozesse mit je eigenem Playwright-Browser.
+
+    render(url, wait_selector) wird an den Worker mit den wenigsten offenen
+    Anfragen geschickt. Abgestürzte Worker werden neu gestartet, ihre offenen
+    Anfragen einmal auf einem anderen Worker wiederholt. Mit psutil werden
+    Worker, die das harte RSS-Limit überschreiten, ersetzt; das weiche Limit
+    recycelt den Browser innerhalb des Workers.
+    """
+
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        pages_per_worker: int = 4,
+        max_rss_mb: int = 1500,
+        block_resource_types: Optional[List[str]] = None,
+        blocked_domains: Optional[List[str]] = None,
+        health_interval: float = 10.0
+    ):
+        self.num_workers = num_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.settings = {
+            'pages_per_worker': max(1, pages_per_worker),
+            'max_rss_mb': max_rss_mb if psutil is not None else 0,
+            'block_resource_types': list(block_resource_types or []),
+            'blocked_domains': list(blocked_domains or [])
+        }
+        self.health_interval = health_interval
+        self.logger = logging.getLogger("RenderFarm")
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List[_RenderWorker] = []
+        self._request_ids = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+        self._running = False
+        self.stats = {
+            'renders': 0,
+            'failed_renders': 0,
+            'retries': 0,
+            'restarts': 0
+        }
+        if psutil is None and max_rss_mb:
+            self.logger.warning("psutil nicht installiert, RSS-Limits sind deaktiviert")
+
+    async def start(self) -> None:
+        """Startet alle Worker-Prozesse und die Überwachung."""
+        self._running = True
+        self._workers = [self._spawn(index) for index in range(self.num_workers)]
+        self._health_task = asyncio.create_task(self._health_loop())
+        self.logger.info(f"Render-Farm mit {self.num_workers} Workern gestartet")
+
+    def _spawn(self, index: int) -> _RenderWorker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.settings),
+            name=f"render-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        worker = _RenderWorker(index, process, parent_conn)
+        worker.reader_task = asyncio.create_task(self._read_responses(worker))
+        return worker
+
+    async def render(
+        self,
+        url: str,
+        wait_selector: Optional[str] = None,
+        timeout: float = 60.0,
+        user_agent: Optional[str] = None
+    ) -> Optional[str]:
+        """Rendert eine Seite in einem Worker und liefert den HTML-Inhalt (None bei Fehlern)."""
+        request = {
+            'url': url,
+            'wait_selector': wait_selector,
+            'timeout': timeout,
+            'user_agent': user_agent
+        }
+        for attempt in range(2):
+            worker = self._least_loaded()
+            if worker is None:
+                self.logger.error("Kein Render-Worker verfügbar")
+                break
+            request_id = next(self._request_ids)
+            try:
+                future = self._submit(worker, request_id, request)
+                response = await asyncio.wait_for(future, timeout=timeout * 2)
+            except ConnectionError as e:
+                # Worker ist während des Renderns ausgefallen: einmal woanders versuchen
+                self.stats['retries'] += 1
+                self.logger.warning(f"Render-Worker {worker.index} ausgefallen ({e}), wiederhole {url}")
+                continue
+            except asyncio.TimeoutError:
+                self.logger.error(f"Timeout beim Rendern von {url} in Worker {worker.index}")
+                break
+            finally:
+                worker.pending.pop(request_id, None)
+
+            if response.get('error'):
+                self.logger.error(f"Fehler beim Rendern der Seite {url}: {response['error']}")
+                break
+            self.stats['renders'] += 1
+            return response['html']
+
+        self.stats['failed_renders'] += 1
+        return None
+
+    def _least_loaded(self) -> Optional[_RenderWorker]:
+        alive = [worker for worker in self._workers if worker.alive]
+        return min(alive, key=lambda worker: worker.load) if alive else None
+
+    def _submit(self, worker: _RenderWorker, request_id: int, request: Dict) -> asyncio.Future:
+        """Schickt eine Anfrage an einen Worker; die Last zählt sofort für das Balancing."""
+        future = asyncio.get_running_loop().create_future()
+        worker.pending[request_id] = future
+        try:
+            worker.conn.send({**request, 'id': request_id})
+        except (OSError, EOFError) as e:
+            raise ConnectionError(str(e)) from e
+        return future
+
+    async def _read_responses(self, worker: _RenderWorker) -> None:
+        """Nimmt Antworten eines Workers entgegen, bis seine Pipe schließt."""
+        try:
+            while True:
+                response = await asyncio.to_thread(worker.conn.recv)
+                worker.rss_mb = response.get('rss_mb', worker.rss_mb)
+                worker.renders += 1
+                future = worker.pending.get(response['id'])
+                if future and not future.done():
+                    future.set_result(response)
+        except (EOFError, OSError):
+            pass
+        finally:
+            self._fail_pending(worker, ConnectionError(f"Render-Worker {worker.index} beendet"))
+            if self._running:
+                await self._restart(worker)
+
+    def _fail_pending(self, worker: _RenderWorker, error: Exception) -> None:
+        for future in worker.pending.values():
+            if not future.done():
+                future.set_exception(error)
+        worker.pending.clear()
+
+    async def _restart(self, worker: _RenderWorker) -> None:
+        """Ersetzt einen abgestürzten oder zu großen Worker."""
+        if worker not in self._workers:
+            return
+        await self._terminate(worker)
+        # Direkt nach dem Start abgestürzte Worker mit wachsendem Abstand neu starten
+        crashes = worker.crashes + 1 if time.monotonic() - worker.started_at < 30 else 0
+        if crashes:
+            await asyncio.sleep(min(60, 2 ** crashes))
+        if not self._running or worker not in self._workers:
+            return
+        self.stats['restarts'] += 1
+        self.logger.warning(f"Starte Render-Worker {worker.index} neu")
+        replacement = self._spawn(worker.index)
+        replacement.crashes = crashes
+        self._workers[self._workers.index(worker)] = replacement
+
+    async def _terminate(self, worker: _RenderWorker) -> None:
+        """Beendet einen Worker-Prozess; das Warten auf das Prozessende blockiert den Event-Loop nicht."""
+        try:
+            worker.conn.close()
+        except OSError:
+            pass
+        if worker.process.is_alive():
+            worker.process.terminate()
+        await asyncio.to_thread(worker.process.join, 5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            await asyncio.to_thread(worker.process.join, 5)
+
+    async def _health_loop(self) -> None:
+        """Ersetzt Worker, die das harte RSS-Limit (doppeltes Recycling-Limit) überschreiten."""
+        hard_limit = self.settings['max_rss_mb'] * 2
+        while self._running:
+            await asyncio.sleep(self.health_interval)
+            for worker in list(self._workers):
+                if not worker.alive:
+                    continue
+                if hard_limit:
+                    worker.rss_mb = process_tree_rss_mb(worker.process.pid)
+                    if worker.rss_mb > hard_limit:
+                        self.logger.warning(
+                            f"Render-Worker {worker.index} über RSS-Limit ({worker.rss_mb:.0f} MB), ersetze ihn"
+                        )
+                        # Schließen der Pipe beendet den Reader, der den Neustart übernimmt
+                        await self._terminate(worker)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'workers': [{
+                'index': worker.index,
+                'alive': worker.alive,
+                'in_flight': worker.load,
+                'renders': worker.renders,
+                'rss_mb': worker.rss_mb
+            } for worker in self._workers]
+        }
+
+    async def close(self) -> None:
+        """Beendet alle Worker-Prozesse."""
+        self._running = False
+        if self._health_task:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, EOFError):
+                pass
+        for worker in self._workers:
+            await asyncio.to_thread(worker.process.join, 10)
+            await self._terminate(worker)
+        readers = [worker.reader_task for worker in self._workers if worker.reader_task]
+        await asyncio.gather(*readers, return_exceptions=True)
+        self._workers = []
+        self.logger.info("Render-Farm beendet")
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Benchmark für den Datenbank-Layer: Schreib- und Lesedurchsatz mit und ohne SQLite-Profil
+sowie Latenz und Query-Plan der häufigsten Abfragen auf einer synthetischen Datenbank.
+
+Aufruf: python benchmark_database.py [--rows 5000] [--single-writes 500] [--duration 5] [--readers 8]
+                                     [--query-rows 1000000] [--repeats 20]
+
+Mit --query-rows 10000000 entsteht die 10-Mio.-Zeilen-Datenbank (Deals und Preispunkte).
+Weicht ein Query-Plan vom erwarteten Index ab, endet das Skript mit Exit-Code 1.
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from config.config import DatabaseConfig
+from core.database import DatabaseManager
+from database.models import Deal
+
+# Abfrage -> Index, den ihr Query-Plan verwenden muss
+EXPECTED_INDEXES = {
+    'profitable_products': 'ix_products_profit_sales',
+    'recent_deals': 'ix_deals_found_profit',
+    'price_history_raw': '_sku_ts',
+    'price_history_hourly': 'PRIMARY KEY'
+}
+
+
+def synthetic_products(count: int):
+    """Erzeugt reproduzierbare Produktdaten."""
+    rng = random.Random(42)
+    return [{
+        'sku': f"BENCH-{index:06d}",
+        'name': f"Produkt {index}",
+        'brand': rng.choice(['Nike', 'Adidas', 'New Balance', 'Asics']),
+        'hhv_price': round(rng.uniform(60, 300), 2),
+        'alias_price': round(rng.uniform(60, 450), 2),
+        'profit_margin': round(rng.uniform(-20, 60), 2),
+        'monthly_sales': rng.randint(0, 40)
+    } for index in range(count)]
+
+
+async def use_shared_engine(database: DatabaseManager, database_url: str) -> None:
+    """
+    Stellt den ursprünglichen Aufbau her: eine gemeinsame Engine mit Standard-Pool für
+    Lesen und Schreiben statt getrennter Schreib- (pool_size=1) und Lese-Engine.
+    """
+    await database.engine.dispose()
+    await database.read_engine.dispose()
+    engine = create_async_engine(database_url, echo=False, future=True)
+    database.engine = database.read_engine = engine
+    database.async_session = database.read_session = async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
+
+async def run_profile(name: str, config: DatabaseConfig, args, shared_engine: bool = False) -> dict:
+    """Führt alle Messungen für ein Datenbank-Profil auf einer frischen Datei aus."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "benchmark.db"
+        database_url = f"sqlite+aiosqlite:///{path}"
+        database = DatabaseManager(database_url, config)
+        if shared_engine:
+            await use_shared_engine(database, database_url)
+        await database.init_db()
+        products = synthetic_products(args.rows)
+        results = {'profile': name}
+
+        # Gebündelte Schreibzugriffe
+        start = time.perf_counter()
+        await database.save_products(products)
+        results['bulk_rows_per_s'] = args.rows / (time.perf_counter() - start)
+
+        # Einzelne Transaktionen (ein Commit pro Zeile)
+        start = time.perf_counter()
+        for index in range(args.single_writes):
+            await database.update_product(products[index % args.rows]['sku'], monthly_sales=index)
+        results['single_commits_per_s'] = args.single_writes / (time.perf_counter() - start)
+
+        # Gemischte Last: parallele Leser während eines laufenden Schreibers
+        reads = writes = 0
+        deadline = time.perf_counter() + args.duration
+
+        async def reader():
+            nonlocal reads
+            while time.perf_counter() < deadline:
+                await database.get_profitable_products(min_profit=15.0, min_sales=5)
+                reads += 1
+
+        async def writer():
+            nonlocal writes
+            while time.perf_counter() < deadline:
+                sku = products[writes % args.rows]['sku']
+                await database.update_product(sku, profit_margin=random.uniform(-20, 60))
+                writes += 1
+
+        await asyncio.gather(writer(), *[reader() for _ in range(args.readers)])
+        results['mixed_reads_per_s'] = reads / args.duration
+        results['mixed_writes_per_s'] = writes / args.duration
+
+        await database.close()
+        return results
+
+
+async def populate(database: DatabaseManager, rows: int, chunk: int = 50000) -> str:
+    """Füllt die Datenbank mit rows Zeilen (je zur Hälfte Deals und Preispunkte der letzten 7 Tage)."""
+    rng = random.Random(7)
+    product_count = max(100, rows // 100)
+    await database.save_products(synthetic_products(product_count))
+    now = datetime.utcnow()
+    window = 7 * 86400
+
+    for offset in range(0, rows // 2, chunk):
+        size = min(chunk, rows // 2 - offset)
+        deals = [{
+            'product_id': rng.randint(1, product_count),
+            'hhv_price': round(rng.uniform(60, 300), 2),
+            'alias_price': round(rng.uniform(60, 450), 2),
+            'profit_margin': round(rng.uniform(-20, 60), 2),
+            'found_at': now - timedelta(seconds=rng.randint(0, window)),
+            'status': 'new'
+        } for _ in range(size)]
+        points = [{
+            'sku': f"BENCH-{rng.randrange(product_count):06d}",
+            'hhv_price': round(rng.uniform(60, 300), 2),
+            'alias_price': round(rng.uniform(60, 450), 2),
+            'timestamp': now - timedelta(seconds=rng.randint(0, window))
+        } for _ in range(size)]
+        async with database.async_session() as session:
+            await session.execute(insert(Deal), deals)
+            await database.price_series.append(session, points)
+            await session.commit()
+    return f"BENCH-{product_count // 2:06d}"
+
+
+async def capture_query(database: DatabaseManager, call):
+    """Führt call aus und liefert die zuletzt ausgeführte SELECT-Anweisung samt Parametern."""
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            statements.append((statement, parameters))
+
+    event.listen(database.read_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        await call()
+    finally:
+        event.remove(database.read_engine.sync_engine, "before_cursor_execute", listener)
+    return statements[-1]
+
+
+async def query_plan(database: DatabaseManager, statement: str, parameters) -> list:
+    async with database.read_engine.connect() as conn:
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in result]
+
+
+async def run_queries(args) -> bool:
+    """Misst die Hot-Queries und prüft ihre Query-Pläne; liefert False bei einer Plan-Regression."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "queries.db"
+        database = DatabaseManager(f"sqlite+aiosqlite:///{path}", DatabaseConfig())
+        await database.init_db()
+
+        start = time.perf_counter()
+        sku = await populate(database, args.query_rows)
+        print(f"{args.query_rows} Zeilen in {time.perf_counter() - start:.1f}s erzeugt")
+        async with database.engine.begin() as conn:
+            await conn.exec_driver_sql("ANALYZE")
+
+        now = datetime.utcnow()
+        queries = {
+            'profitable_products': lambda: database.get_profitable_products(min_profit=55.0, min_sales=35),
+            'recent_deals': lambda: database.get_recent_deals(hours=1),
+            'price_history_raw': lambda: database.get_price_history(
+                sku, now - timedelta(days=1), now, resolution='raw'
+            ),
+            'price_history_hourly': lambda: database.get_price_history(
+                sku, now - timedelta(days=7), now, resolution='hourly'
+            )
+        }
+
+        ok = True
+        print(f"{'Abfrage':<24}{'Zeilen':>10}{'Median ms':>12}{'p95 ms':>10}  Plan")
+        for name, call in queries.items():
+            statement, parameters = await capture_query(database, call)
+            plan = await query_plan(database, statement, parameters)
+            plan_ok = any(EXPECTED_INDEXES[name] in detail for detail in plan)
+            ok = ok and plan_ok
+
+            timings, count = [], 0
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                count = len(await call())
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+            status = "OK" if plan_ok else f"REGRESSION (erwartet {EXPECTED_INDEXES[name]})"
+            print(f"{name:<24}{count:>10}{statistics.median(timings):>12.2f}{p95:>10.2f}  {status}")
+            for detail in plan:
+                print(f"{'':<24}  {detail}")
+
+        await database.close()
+        return ok
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark des SQLite-Datenbank-Layers")
+    parser.add_argument('--rows', type=int, default=5000, help="Anzahl synthetischer Produkte")
+    parser.add_argument('--single-writes', type=int, default=500, help="Einzel-Commits pro Profil")
+    parser.add_argument('--duration', type=float, default=5.0, help="Dauer der gemischten Last in Sekunden")
+    parser.add_argument('--readers', type=int, default=8, help="Parallele Leser in der gemischten Last")
+    parser.add_argument('--query-rows', type=int, default=1000000, help="Zeilen der synthetischen Datenbank (0 = überspringen)")
+    parser.add_argument('--repeats', type=int, default=20, help="Wiederholungen pro Abfrage")
+    args = parser.parse_args()
+
+    # 'default' entspricht dem ursprünglichen Setup: keine PRAGMAs, eine gemeinsame Engine
+    profiles = [
+        ('default', DatabaseConfig(SQLITE_TUNING=False), True),
+        ('tuned', DatabaseConfig(), False)
+    ]
+    results = [await run_profile(name, config, args, shared) for name, config, shared in profiles]
+
+    columns = ['bulk_rows_per_s', 'single_commits_per_s', 'mixed_reads_per_s', 'mixed_writes_per_s']
+    print(f"{'Profil':<10}" + "".join(f"{column:>24}" for column in columns))
+    for result in results:
+        print(f"{result['profile']:<10}" + "".join(f"{result[column]:>24.1f}" for column in columns))
+
+    if args.query_rows and not await run_queries(args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
@@ -29,6 +29,47 @@ class APIConfig:
     MAX_CONNECTIONS: int = 10
     MAX_PARALLEL_REQUESTS: int = 5
 
+    # Turbo-Frame-Fragmente direkt abrufen statt Seiten zu rendern
+    HHV_TURBO_FRAMES: bool = True
+    HHV_LISTING_FRAME: str = "item_gallery"
+    HHV_DETAIL_FRAME: str = "item_detail"
+    HHV_PAGE_PARAM: str = "page"  # Query-Parameter für Folgeseiten eines Listings
+    HHV_MAX_PAGES: int = 50  # Obergrenze an Seiten pro Kategorie beim Katalog-Crawl
+
+    # Render-Farm: Anzahl Browser-Prozesse (0 = ein Browser im Hauptprozess)
+    RENDER_WORKERS: int = 0
+    RENDER_PAGES_PER_WORKER: int = 4
+    RENDER_MAX_RSS_MB: int = 1500
+
+    # Adaptive Render-Nebenläufigkeit (CPU-, Speicher- und Latenz-gesteuert)
+    RENDER_MIN_CONCURRENCY: int = 2
+    RENDER_MAX_CONCURRENCY: int = 20
+    RENDER_TARGET_LATENCY: float = 10.0
+    RENDER_MAX_CPU_PERCENT: float = 85.0
+
+    # Ressourcen-Blockierung beim Rendern mit Playwright
+    BLOCK_RESOURCE_TYPES: List[str] = field(default_factory=lambda: ["image", "media", "font"])
+    BLOCK_STYLESHEETS: bool = False
+    BLOCKED_DOMAINS: List[str] = field(default_factory=lambda: [
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "facebook.net",
+        "hotjar.com",
+        "criteo.com",
+        "trustedshops.com"
+    ])
+
+    # JSON-Capture: Produktdaten aus XHR-Antworten statt aus dem DOM lesen (opt-in, das
+    # Muster muss zu den tatsächlichen Endpunkten passen, sonst wartet jede Seite bis zum Timeout)
+    HHV_JSON_CAPTURE: bool = False
+    HHV_CAPTURE_PATTERN: str = r"/(api|graphql)/|\.json(\?|$)"
+    HHV_CAPTURE_TIMEOUT: float = 10.0
+
+    # Verfügbarkeits-Probe (Restock-Checks ohne Browser-Rendering)
+    PROBE_MAX_BYTES: int = 65536
+    PROBE_TIMEOUT: float = 5.0
+
 
 @dataclass
 class DatabaseConfig:
@@ -37,6 +78,20 @@ class DatabaseConfig:
     POOL_SIZE: int = 5
     MAX_OVERFLOW: int = 10
     ECHO: bool = False
+    SQLITE_TUNING: bool = True  # WAL und Pragmas beim Verbindungsaufbau setzen
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MB
+    SQLITE_CACHE_SIZE_KB: int = 65536  # 64 MB Page-Cache pro Verbindung
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    WRITE_QUEUE_SIZE: int = 10000  # Maximale Anzahl ausstehender Schreibabsichten
+    WRITE_FLUSH_INTERVAL_MS: int = 50  # Maximale Wartezeit bis zum Gruppen-Commit
+    WRITE_BATCH_ROWS: int = 1000  # Zeilen, ab denen sofort committet wird
+    PRICE_RAW_RETENTION_DAYS: int = 7  # Rohe Preispunkte (Tagespartitionen)
+    PRICE_HOURLY_RETENTION_DAYS: int = 180  # Stunden-Rollups (Monatspartitionen)
+    PRICE_DAILY_RETENTION_DAYS: int = 0  # Tages-Rollups (Jahrespartitionen), 0 = unbegrenzt
+    ANALYTICS_THREADS: int = 0  # DuckDB-Threads für Analytik-Abfragen, 0 = alle Kerne
+    ANALYTICS_MEMORY_LIMIT: str = ""  # z.B. "2GB", leer = DuckDB-Standard
+    ANALYTICS_REFRESH_INTERVAL: float = 300.0  # Neuaufbau der Views für neue Exporte und Partitionen
 
 
 @dataclass
@@ -53,6 +108,11 @@ class ScannerConfig:
     SCAN_INTERVAL: int = 300
     QUEUE_SIZE: int = 1000
     BATCH_SIZE: int = 50
+    FRONTIER_FRESHNESS: int = 3600  # Innerhalb dieses Fensters erledigte URLs werden nicht erneut gecrawlt
+    FRONTIER_CATEGORY_FRESHNESS: int = 240  # Kürzeres Fenster für Kategorieseiten (unter SCAN_INTERVAL)
+    FRONTIER_FLUSH_SIZE: int = 500  # Geänderte Frontier-Einträge pro Schreib-Batch
+    FRONTIER_FLUSH_INTERVAL: float = 5.0  # Maximaler Abstand zwischen Checkpoints in Sekunden
+    CATALOG_MAX_SHRINK: float = 0.5  # Schrumpft der Katalog stärker, wird der Diff als Fehl-Crawl verworfen
 
     product_urls: List[str] = field(default_factory=lambda: [
         "https://www.hhv.de/clothing/katalog/filter/schuhe-N10",
@@ -66,14 +126,21 @@ class MonitorConfig:
     CHECK_INTERVAL: int = 60  # Zeit zwischen einzelnen Produktchecks
     MAX_RETRIES: int = 3  # Maximale Anzahl von Wiederholungen bei Fehlern
     RETRY_DELAY: int = 30  # Verzögerung zwischen Wiederholungen in Sekunden
+    MAX_CONCURRENT_CHECKS: int = 20  # Maximale Anzahl gleichzeitiger Restock-Checks
+    PROBE_BUDGET_PER_MINUTE: int = 120  # Globales Budget an Restock-Checks pro Minute über alle Proxies
+    STATE_FLUSH_INTERVAL: int = 30  # Intervall für das Persistieren des Monitoring-Zustands in Sekunden
 
 
 @dataclass
 class ArbitrageConfig:
     """Konfiguration für Arbitrage-Strategien."""
     MIN_PROFIT: float = 10.0  # Mindestgewinn in Euro
+    MIN_PROFIT_MARGIN: float = 15.0  # Mindestgewinnmarge in Prozent (Auswahl für das Restock-Monitoring)
     MIN_MONTHLY_SALES: int = 5  # Mindestanzahl monatlicher Verkäufe
     MAX_PRICE: float = 1000.0  # Maximaler Preis eines Produkts
+    DEAL_BOARD_SIZE: int = 100  # Anzahl der besten Deals im Deal-Board
+    DEAL_TTL: int = 3600  # Gültigkeit eines Deals im Board in Sekunden
+    DEAL_BOARD_SNAPSHOT_INTERVAL: int = 60  # Intervall für SQLite-Snapshots in Sekunden
 
 
 @dataclass
@@ -83,6 +150,10 @@ class MLConfig:
     MODEL_PATH: str = "models/price_prediction.pkl"  # Pfad zum ML-Modell
     TRAINING_INTERVAL: int = 86400  # Trainingsintervall in Sekunden (1 Tag)
     MIN_SAMPLES: int = 1000  # Minimale Anzahl von Datenpunkten für Training
+    EXPORT_DIR: str = "data/exports"  # Spaltenbasierter Export der Preis-, Produkt- und Deal-Historie
+    EXPORT_FORMAT: str = "ipc"  # 'ipc' (Arrow, memory-mapped ohne Kopie) oder 'parquet' (komprimiert)
+    EXPORT_INTERVAL: int = 3600  # Intervall für den inkrementellen Export in Sekunden
+    EXPORT_BATCH_ROWS: int = 50000  # Zeilen pro gelesenem Chunk
 
 
 @dataclass
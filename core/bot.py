@@ -1,6 +1,7 @@
 from datetime import datetime
 import logging
 import asyncio
+import time
 from pathlib import Path
 from typing import Set
 
@@ -9,8 +10,18 @@ import torch
 from config.config import Config
 from core.scanner import Scanner
 from core.price_analyzer import PriceAnalyzer
+from core.deal_board import DealBoard
+from core.crawl_frontier import CrawlFrontier
 from core.restock_monitor import RestockMonitor
+from core.prediction_store import RestockPrediction
 from core.database import DatabaseManager
+from core.db_writer import DatabaseWriter
+from core.history_export import HistoryExporter
+from database.analytics import AnalyticsEngine
+from database.queries import DatabaseQueries
+from ml.model import PricePredictionModel, RestockPredictor, load_model
+from ml.dataset import DatasetPreparator
+from ml.trainer import ModelTrainer
 from api.hhv_client import HHVClient
 from api.alias_client import AliasClient
 from utils.proxy_manager import ProxyManager
@@ -39,16 +50,23 @@ class ArbitrageBot:
 
         # Komponenten (werden in initialize gesetzt)
         self.db = None
+        self.db_writer = None
+        self.exporter = None
+        self.analytics = None
+        self.queries = None
         self.cache = None
         self.proxy_manager = None
         self.queue_manager = None
         self.hhv_client = None
         self.alias_client = None
         self.model = None
+        self.restock_model = None
         self.dataset_preparator = None
         self.trainer = None
         self.scanner = None
         self.price_analyzer = None
+        self.deal_board = None
+        self.frontier = None
         self.restock_monitor = None
         self.discord = None
 
@@ -66,8 +84,31 @@ class ArbitrageBot:
             self.logger.info(f"Verwende Device: {self.device}")
 
             # Datenbank initialisieren
-            self.db = DatabaseManager(self.config.DB.DB_URL)
+            self.db = DatabaseManager(self.config.DB.DB_URL, self.config.DB)
             await self.db.init_db()
+            self.db_writer = DatabaseWriter(
+                self.db,
+                max_queue=self.config.DB.WRITE_QUEUE_SIZE,
+                flush_interval_ms=self.config.DB.WRITE_FLUSH_INTERVAL_MS,
+                max_batch_rows=self.config.DB.WRITE_BATCH_ROWS
+            )
+            await self.db_writer.start()
+            self.exporter = HistoryExporter(
+                self.db,
+                directory=self.config.ML.EXPORT_DIR,
+                file_format=self.config.ML.EXPORT_FORMAT,
+                batch_rows=self.config.ML.EXPORT_BATCH_ROWS
+            )
+            # Analytische Abfragen laufen in DuckDB statt auf der Schreibverbindung
+            self.analytics = AnalyticsEngine(
+                AnalyticsEngine.sqlite_path(self.config.DB.DB_URL),
+                export_dir=self.config.ML.EXPORT_DIR,
+                export_format=self.config.ML.EXPORT_FORMAT,
+                threads=self.config.DB.ANALYTICS_THREADS,
+                memory_limit=self.config.DB.ANALYTICS_MEMORY_LIMIT,
+                refresh_interval=self.config.DB.ANALYTICS_REFRESH_INTERVAL
+            )
+            self.queries = DatabaseQueries(self.analytics)
             self.logger.info("Datenbank initialisiert")
 
             # Cache und Manager initialisieren
@@ -96,6 +137,17 @@ class ArbitrageBot:
             )
             await self.hhv_client.initialize()
 
+            # Crawl-Frontier aus dem letzten Checkpoint wiederherstellen
+            self.frontier = CrawlFrontier(
+                self.db,
+                freshness=self.config.SCANNER.FRONTIER_FRESHNESS,
+                flush_size=self.config.SCANNER.FRONTIER_FLUSH_SIZE,
+                flush_interval=self.config.SCANNER.FRONTIER_FLUSH_INTERVAL,
+                freshness_by_kind={'category': self.config.SCANNER.FRONTIER_CATEGORY_FRESHNESS}
+            )
+            await self.frontier.load()
+            self.hhv_client.frontier = self.frontier
+
             self.alias_client = AliasClient(
                 analytics_url=self.config.API.ALIAS_ANALYTICS_URL,
                 proxy_manager=self.proxy_manager
@@ -114,8 +166,18 @@ class ArbitrageBot:
                 self.model = PricePredictionModel.load_model(str(model_path)).to(self.device)
                 self.logger.info("Gespeichertes Modell geladen")
 
-            self.dataset_preparator = DatasetPreparator()
+            self.dataset_preparator = DatasetPreparator(
+                export_dir=self.config.ML.EXPORT_DIR,
+                export_format=self.config.ML.EXPORT_FORMAT
+            )
             self.trainer = ModelTrainer(self.model, device=self.device)
+
+            # Restock-Modell für die Batch-Neubewertung im RestockMonitor (läuft auf der CPU)
+            restock_model_path = Path('models/restock_prediction.pt')
+            if restock_model_path.exists():
+                self.restock_model = load_model(RestockPredictor, str(restock_model_path))
+            if self.restock_model is None:
+                self.restock_model = RestockPredictor(input_size=RestockMonitor.FEATURE_COUNT).eval()
             self.logger.info("ML-Komponenten initialisiert")
 
             # Core-Komponenten initialisieren
@@ -123,23 +185,37 @@ class ArbitrageBot:
                 self.config.SCANNER,
                 self.proxy_manager,
                 self.queue_manager,
-                self.hhv_client
+                self.hhv_client,
+                database=self.db,
+                frontier=self.frontier
+            )
+
+            self.deal_board = DealBoard(
+                self.config.ARBITRAGE.DEAL_BOARD_SIZE,
+                self.config.ARBITRAGE.DEAL_TTL
             )
 
             self.price_analyzer = PriceAnalyzer(
                 self.model,
                 self.cache,
                 self.discord,
-                self.alias_client
+                self.alias_client,
+                l1_max_items=self.config.CACHE.MAX_ITEMS,
+                deal_board=self.deal_board
             )
 
             self.restock_monitor = RestockMonitor(
-                self.model,
+                self.restock_model,
                 self.cache,
                 self.queue_manager,
                 self.discord,
-                self.alias_client
+                self.alias_client,
+                max_concurrent_checks=self.config.MONITOR.MAX_CONCURRENT_CHECKS,
+                probe_budget=self.config.MONITOR.PROBE_BUDGET_PER_MINUTE,
+                database=self.db,
+                hhv_client=self.hhv_client
             )
+            await self.restock_monitor.restore_state()
 
             # Logging für erfolgreiche Initialisierung
             self.logger.info("Core-Komponenten initialisiert")
@@ -163,9 +239,37 @@ class ArbitrageBot:
             restock_task = asyncio.create_task(self.monitor_restocks(), name="restock_monitor")
             queue_task = asyncio.create_task(self.process_queue(), name="queue_processor")
             train_task = asyncio.create_task(self.train_model_loop(), name="model_trainer")
+            analysis_task = asyncio.create_task(
+                self.price_analyzer.start_analysis_worker(),
+                name="price_analysis"
+            )
+            cache_task = asyncio.create_task(
+                self.price_analyzer.start_cache_invalidation_listener(),
+                name="cache_invalidation"
+            )
+            board_task = asyncio.create_task(
+                self.deal_board.run_snapshot_loop(
+                    self.db,
+                    self.config.ARBITRAGE.DEAL_BOARD_SNAPSHOT_INTERVAL
+                ),
+                name="deal_board_snapshot"
+            )
+
+            state_task = asyncio.create_task(
+                self.restock_monitor.run_persistence_loop(self.config.MONITOR.STATE_FLUSH_INTERVAL),
+                name="restock_state"
+            )
+
+            export_task = asyncio.create_task(
+                self.exporter.run_export_loop(self.config.ML.EXPORT_INTERVAL),
+                name="history_export"
+            )
 
             # Füge Aufgaben zur Task-Liste hinzu und starte sie
-            self.tasks.update({scan_task, restock_task, queue_task, train_task})
+            self.tasks.update({
+                scan_task, restock_task, queue_task, train_task,
+                analysis_task, cache_task, board_task, state_task, export_task
+            })
             await asyncio.gather(*self.tasks, return_exceptions=True)
 
         except Exception as e:
@@ -187,6 +291,24 @@ class ArbitrageBot:
                         self.logger.debug(f"Task beendet: {task.get_name()}")
                 await asyncio.gather(*self.tasks, return_exceptions=True)
 
+            # Analyse-Worker und laufende Restock-Checks abbrechen
+            if self.price_analyzer:
+                await self.price_analyzer.cleanup()
+            if self.restock_monitor:
+                await self.restock_monitor.cleanup()
+
+            if self.frontier:
+                await self.frontier.flush()
+
+            # Ausstehende Schreibzugriffe committen
+            if self.db_writer:
+                await self.db_writer.close()
+            if self.analytics:
+                await self.analytics.close()
+            # Führt PRAGMA optimize aus und gibt die Verbindungen frei
+            if self.db:
+                await self.db.close()
+
             # Clients schließen
             if self.hhv_client:
                 await self.hhv_client.cleanup()
@@ -217,23 +339,80 @@ class ArbitrageBot:
             raise
 
     async def scan_loop(self):
-        """Hauptloop für das Produkt-Scanning."""
+        """Hauptloop für das Produkt-Scanning; gescannte Produkte gehen an den Analyse-Worker-Pool."""
         while self.running:
             try:
-                await asyncio.sleep(1)
+                products = await self.scanner.scan_products()
+                for product in products:
+                    url = product.get('url') or product.get('detail_url')
+                    if product.get('sku') and url:
+                        # Detailseite für die Verfügbarkeits-Probe des Restock-Monitors
+                        self.restock_monitor.product_urls[product['sku']] = url
+                    # Wartet bei voller Queue (Backpressure durch den Worker-Pool)
+                    await self.price_analyzer.enqueue_product(product)
+                self.stats['products_scanned'] += len(products)
+                await asyncio.sleep(self.config.SCANNER.SCAN_INTERVAL)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 self.logger.error(f"Fehler im Scan-Loop: {e}")
                 self.stats['errors'] += 1
+                await asyncio.sleep(60)
 
     async def monitor_restocks(self):
-        """Hauptloop für das Restock-Monitoring."""
+        """
+        Hauptloop für das Restock-Monitoring: bereinigt periodisch abgelaufene
+        Vorhersagen, übernimmt die profitablen Produkte in die Überwachung und
+        arbeitet dazwischen die fälligen Checks ab.
+        """
+        sync_at = 0.0
         while self.running:
             try:
-                await asyncio.sleep(1)
+                if time.monotonic() >= sync_at:
+                    # Abgelaufene Vorhersagen verlassen Store und Planung, profitable Produkte kommen neu hinzu
+                    await self.restock_monitor._cleanup_old_monitors()
+                    await self._sync_monitored_products()
+                    sync_at = time.monotonic() + self.config.MONITOR.RESTOCK_INTERVAL
+                await self.restock_monitor.scheduler.wait_for_due(timeout=sync_at - time.monotonic())
+                restocks = await self.restock_monitor.monitor_restocks()
+                self.stats['restocks_detected'] += len(restocks)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 self.logger.error(f"Fehler im Restock-Monitor: {e}")
                 self.stats['errors'] += 1
 
+    async def _sync_monitored_products(self) -> int:
+        """Nimmt profitable Produkte, die noch nicht überwacht werden, in den Restock-Monitor auf."""
+        # profit_margin ist in Prozent, daher MIN_PROFIT_MARGIN statt MIN_PROFIT (Euro)
+        min_margin = self.config.ARBITRAGE.MIN_PROFIT_MARGIN
+        min_sales = self.config.ARBITRAGE.MIN_MONTHLY_SALES
+        products = []
+        if self.queries:
+            products = await self.queries.get_profitable_products(min_margin, min_sales, limit=None)
+        if not self.analytics or self.analytics.sources.get('products', 'none') == 'none':
+            # DuckDB ohne Produktquelle (Store nicht angehängt, kein Export): direkt aus SQLite lesen
+            self.logger.debug("Analytik ohne Produktquelle, lese profitable Produkte aus SQLite")
+            products = await self.db.get_profitable_products(min_margin, min_sales)
+        now = datetime.now()
+        predictions = [
+            RestockPrediction(
+                sku=product['sku'],
+                probability=product.get('restock_probability') or 0.0,
+                next_check=now,
+                priority=0,
+                last_check=now,
+                profit_margin=product.get('profit_margin') or 0.0,
+                sales_velocity=float(product.get('monthly_sales') or 0) / 30
+            )
+            for product in products
+            if product.get('sku') and product['sku'] not in self.restock_monitor.predictions
+        ]
+        added = await self.restock_monitor.update_predictions_batch(predictions)
+        if added:
+            self.logger.info(f"{len(added)} profitable Produkte in das Restock-Monitoring aufgenommen")
+        return len(added)
+
     async def process_queue(self):
         """Hauptloop für die Queue-Verarbeitung."""
         while self.running:
@@ -0,0 +1,129 @@
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class CatalogDiff:
+    """
+    Erkennt Restocks durch den Vergleich aufeinanderfolgender HHV-Katalog-Snapshots.
+
+    artikel_ids werden auf fortlaufende Indizes interniert; ein Snapshot ist ein
+    Bool-Array (Bitset) über diese Indizes plus ein Preis-Array. Neu gelistete,
+    verschwundene und im Preis geänderte Artikel ergeben sich aus reinen
+    Array-Operationen, ohne zusätzliche Requests.
+    """
+
+    APPEARED = 'appeared'
+    DISAPPEARED = 'disappeared'
+    PRICE_CHANGED = 'price_changed'
+
+    def __init__(self, price_tolerance: float = 0.01, max_shrink: float = 0.5):
+        self.price_tolerance = price_tolerance
+        # Anteil, um den ein Snapshot höchstens schrumpfen darf, bevor er als Fehl-Crawl gilt
+        self.max_shrink = max_shrink
+        self.logger = logging.getLogger("CatalogDiff")
+        self._index: Dict[str, int] = {}
+        self._artikel_ids: List[str] = []
+        self._skus: List[Optional[str]] = []
+        self._listed = np.zeros(0, dtype=bool)
+        self._prices = np.zeros(0, dtype=np.float64)
+        self.has_snapshot = False
+
+    def diff(self, products: List[Dict]) -> List[Dict]:
+        """
+        Vergleicht einen vollständigen Crawl mit dem vorherigen und liefert die Events.
+        Leere oder stark geschrumpfte Crawls werden verworfen; der vorherige Snapshot bleibt.
+        """
+        rows = []
+        prices = []
+        for product in products:
+            artikel_id = product.get('artikel_id')
+            if not artikel_id:
+                continue
+            row = self._intern(str(artikel_id))
+            if product.get('sku') and product['sku'] != 'N/A':
+                self._skus[row] = product['sku']
+            rows.append(row)
+            prices.append(self._parse_price(product.get('price')))
+
+        listed = len(set(rows))
+        previous_count = int(self._listed.sum())
+        if not listed or (self.has_snapshot and listed < previous_count * (1 - self.max_shrink)):
+            self.logger.warning(
+                f"Katalog-Snapshot mit {listed} Artikeln (vorher {previous_count}) verworfen, "
+                f"vermutlich fehlgeschlagener Crawl"
+            )
+            return []
+
+        size = len(self._artikel_ids)
+        previous = np.zeros(size, dtype=bool)
+        previous[:len(self._listed)] = self._listed
+        previous_prices = np.full(size, np.nan)
+        previous_prices[:len(self._prices)] = self._prices
+
+        current = np.zeros(size, dtype=bool)
+        current_prices = np.full(size, np.nan)
+        if rows:
+            current[rows] = True
+            current_prices[rows] = prices
+
+        events = []
+        if self.has_snapshot:
+            appeared = np.flatnonzero(current & ~previous)
+            disappeared = np.flatnonzero(previous & ~current)
+            with np.errstate(invalid='ignore'):
+                changed = np.flatnonzero(
+                    current & previous
+                    & (np.abs(current_prices - previous_prices) > self.price_tolerance)
+                )
+            detected_at = datetime.utcnow()
+            events.extend(self._events(self.APPEARED, appeared, previous_prices, current_prices, detected_at))
+            events.extend(self._events(self.DISAPPEARED, disappeared, previous_prices, current_prices, detected_at))
+            events.extend(self._events(self.PRICE_CHANGED, changed, previous_prices, current_prices, detected_at))
+            self.logger.info(
+                f"Katalog-Diff: {len(appeared)} neu, {len(disappeared)} entfernt, "
+                f"{len(changed)} Preisänderungen"
+            )
+
+        self._listed = current
+        self._prices = current_prices
+        self.has_snapshot = True
+        return events
+
+    def _events(self, event_type: str, rows: np.ndarray, old_prices: np.ndarray,
+                new_prices: np.ndarray, detected_at: datetime) -> List[Dict]:
+        return [{
+            'type': event_type,
+            'artikel_id': self._artikel_ids[row],
+            'sku': self._skus[row],
+            'old_price': None if np.isnan(old_prices[row]) else float(old_prices[row]),
+            'new_price': None if np.isnan(new_prices[row]) else float(new_prices[row]),
+            'detected_at': detected_at
+        } for row in rows.tolist()]
+
+    def _intern(self, artikel_id: str) -> int:
+        row = self._index.get(artikel_id)
+        if row is None:
+            row = len(self._artikel_ids)
+            self._index[artikel_id] = row
+            self._artikel_ids.append(artikel_id)
+            self._skus.append(None)
+        return row
+
+    @staticmethod
+    def _parse_price(value) -> float:
+        """Wandelt HHV-Preisangaben wie '129,99 €' in float um (NaN, falls unlesbar)."""
+        if isinstance(value, (int, float)):
+            return float(value)
+        if not value:
+            return np.nan
+        match = re.search(r'\d[\d.]*(?:,\d+)?', str(value))
+        if not match:
+            return np.nan
+        try:
+            return float(match.group(0).replace('.', '').replace(',', '.'))
+        except ValueError:
+            return np.nan
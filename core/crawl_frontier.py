@@ -0,0 +1,215 @@
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+class CrawlFrontier:
+    """
+    Persistente URL-Frontier für Crawls mit Deduplizierung, Status und Priorität.
+
+    Einträge sind nach (kind, url) geschlüsselt, da dieselbe URL in mehreren
+    Stufen verarbeitet wird (z.B. Detailseite im HHVClient und Produkt-Scan im
+    Scanner). Der Zustand liegt im Speicher und wird gebündelt als Checkpoint in
+    SQLite geschrieben (spätestens nach flush_size Änderungen oder flush_interval
+    Sekunden). Der Checkpoint gilt nur für den laufenden Crawl: finish_run()
+    verwirft ihn nach einem vollständigen Durchlauf. Nur nach einem Abbruch
+    werden beim Neustart URLs, die innerhalb des Frische-Fensters erledigt
+    wurden, mit ihrem gespeicherten Ergebnis übersprungen.
+    """
+
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(
+        self,
+        database=None,
+        freshness: int = 3600,
+        flush_size: int = 500,
+        flush_interval: float = 5.0,
+        freshness_by_kind: Optional[Dict[str, int]] = None
+    ):
+        self.database = database
+        self.freshness = timedelta(seconds=freshness)
+        # Abweichende Fenster je Art, z.B. kürzer für Kategorieseiten, deren Inhalt sich schnell ändert
+        self.freshness_by_kind = {
+            kind: timedelta(seconds=seconds) for kind, seconds in (freshness_by_kind or {}).items()
+        }
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger("CrawlFrontier")
+        self._entries: Dict[Tuple[str, str], Dict] = {}
+        self._dirty: Set[Tuple[str, str]] = set()
+        self._last_flush = time.monotonic()
+        self.stats = {
+            'added': 0,
+            'skipped_fresh': 0,
+            'completed': 0,
+            'failed': 0,
+            'flushes': 0,
+            'runs': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._entries
+
+    async def load(self) -> int:
+        """
+        Stellt die Frontier aus dem Checkpoint eines abgebrochenen Crawls wieder her.
+        Erledigte Einträge außerhalb des Frische-Fensters werden nicht übernommen.
+        """
+        if not self.database:
+            return 0
+        rows = await self.database.load_frontier()
+        loaded = 0
+        for row in rows:
+            key = (row['kind'], row['url'])
+            self._entries[key] = row
+            if row['status'] == self.DONE and not self.is_fresh(row['url'], row['kind']):
+                del self._entries[key]
+                continue
+            loaded += 1
+        # Nicht abgeschlossene URLs des abgebrochenen Crawls stehen wieder an
+        pending = sum(1 for entry in self._entries.values() if entry['status'] != self.DONE)
+        self.logger.info(f"Crawl-Frontier geladen: {loaded} von {len(rows)} URLs, davon {pending} offen")
+        return loaded
+
+    def add(self, url: str, kind: str, priority: int = 0) -> bool:
+        """
+        Nimmt eine URL auf. Bereits bekannte URLs werden nicht doppelt eingeplant;
+        frisch erledigte bleiben erledigt. Liefert True, wenn die URL ansteht.
+        """
+        key = (kind, url)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if self.is_fresh(url, kind):
+                self.stats['skipped_fresh'] += 1
+                return False
+            priority = max(priority, entry.get('priority') or 0)
+            if entry['status'] != self.DONE and priority == entry.get('priority'):
+                return True
+            entry.update({'status': self.PENDING, 'priority': priority})
+        else:
+            entry = {
+                'url': url,
+                'kind': kind,
+                'priority': priority,
+                'status': self.PENDING,
+                'attempts': 0,
+                'payload': None,
+                'completed_at': None
+            }
+            self._entries[key] = entry
+            self.stats['added'] += 1
+        self._dirty.add(key)
+        return True
+
+    def add_many(self, urls: List[str], kind: str, priority: int = 0) -> List[str]:
+        """Nimmt mehrere URLs auf und liefert die anstehenden in Prioritätsreihenfolge."""
+        for url in urls:
+            self.add(url, kind, priority)
+        return self.pending(kind, urls)
+
+    def pending(self, kind: str, urls: Optional[List[str]] = None) -> List[str]:
+        """Anstehende URLs einer Art (optional nur aus urls), höchste Priorität zuerst."""
+        if urls is None:
+            urls = [url for entry_kind, url in self._entries if entry_kind == kind]
+        candidates = dict.fromkeys(url for url in urls if self._is_pending((kind, url)))
+        return sorted(candidates, key=lambda url: -(self._entries[(kind, url)].get('priority') or 0))
+
+    def is_fresh(self, url: str, kind: str) -> bool:
+        """True, wenn die URL in dieser Stufe innerhalb des Frische-Fensters erfolgreich verarbeitet wurde."""
+        entry = self._entries.get((kind, url))
+        if not entry or entry['status'] != self.DONE or not entry.get('completed_at'):
+            return False
+        window = self.freshness_by_kind.get(kind, self.freshness)
+        return datetime.utcnow() - entry['completed_at'] <= window
+
+    def result(self, url: str, kind: str) -> Optional[Any]:
+        """Gespeichertes Ergebnis einer in dieser Stufe erledigten URL."""
+        entry = self._entries.get((kind, url))
+        if not entry or not entry.get('payload'):
+            return None
+        try:
+            return json.loads(entry['payload'])
+        except (TypeError, ValueError):
+            return None
+
+    def complete(self, url: str, payload: Any = None, kind: str = 'detail') -> None:
+        """Markiert eine URL als erledigt und merkt sich ihr Ergebnis."""
+        key = (kind, url)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.add(url, kind)
+            entry = self._entries[key]
+        entry.update({
+            'status': self.DONE,
+            'attempts': (entry.get('attempts') or 0) + 1,
+            'payload': json.dumps(payload, default=str) if payload is not None else None,
+            'completed_at': datetime.utcnow()
+        })
+        self._dirty.add(key)
+        self.stats['completed'] += 1
+
+    def fail(self, url: str, kind: str = 'detail') -> None:
+        """Markiert eine URL als fehlgeschlagen; sie steht beim nächsten Crawl wieder an."""
+        key = (kind, url)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.add(url, kind)
+            entry = self._entries[key]
+        entry['status'] = self.FAILED
+        entry['attempts'] = (entry.get('attempts') or 0) + 1
+        self._dirty.add(key)
+        self.stats['failed'] += 1
+
+    async def maybe_flush(self) -> None:
+        """Schreibt einen Checkpoint, sobald genug Änderungen oder Zeit angefallen sind."""
+        if len(self._dirty) >= self.flush_size or (
+            self._dirty and time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Schreibt alle geänderten Einträge gebündelt in die Datenbank."""
+        self._last_flush = time.monotonic()
+        if not self.database or not self._dirty:
+            self._dirty.clear()
+            return
+        keys = list(self._dirty)
+        self._dirty.clear()
+        entries = [self._entries[key] for key in keys if key in self._entries]
+        if not await self.database.save_frontier(entries):
+            # Beim nächsten Checkpoint erneut versuchen
+            self._dirty.update(keys)
+            return
+        self.stats['flushes'] += 1
+
+    async def finish_run(self) -> None:
+        """
+        Schließt einen vollständigen Crawl ab: Einträge und Checkpoint werden verworfen,
+        damit der nächste reguläre Crawl alle URLs neu verarbeitet und der Speicher nicht wächst.
+        """
+        self._entries.clear()
+        self._dirty.clear()
+        self._last_flush = time.monotonic()
+        self.stats['runs'] += 1
+        if self.database:
+            await self.database.clear_frontier()
+
+    def _is_pending(self, key: Tuple[str, str]) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry['status'] != self.DONE
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'urls': len(self._entries),
+            'pending': sum(1 for entry in self._entries.values() if entry['status'] != self.DONE),
+            'dirty': len(self._dirty)
+        }
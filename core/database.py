@@ -1,37 +1,165 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy import select, update, delete
-from typing import AsyncGenerator, List, Dict, Optional
+from sqlalchemy import select, update, delete, inspect, text, or_, bindparam, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import AsyncGenerator, AsyncIterator, List, Dict, Optional, Sequence
 import logging
+import numpy as np
 from datetime import datetime, timedelta
-from database.models import Base, Product, Price, Deal, MLData
+from config.config import DatabaseConfig
+from database.models import Base, Product, Price, Deal, DealBoardEntry, MonitorState, CrawlFrontierEntry, MLData, RestockHistory
+from database.timeseries import PriceSeries
 
 class DatabaseManager:
-    def __init__(self, database_url: str = "sqlite+aiosqlite:///arbitrage.db"):
+    # Spalten, die das Restock-Monitoring aus profitablen Produkten liest
+    PROFITABLE_COLUMNS = (
+        'sku', 'name', 'brand', 'size', 'hhv_price', 'alias_price', 'profit_margin', 'roi',
+        'monthly_sales', 'sales_velocity', 'restock_probability', 'last_restock'
+    )
+    TRAINING_COLUMNS = ('product_id', 'features', 'target', 'timestamp')
+
+    def __init__(
+        self,
+        database_url: str = "sqlite+aiosqlite:///arbitrage.db",
+        config: Optional[DatabaseConfig] = None
+    ):
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = config or DatabaseConfig()
+        file_based = database_url.startswith('sqlite') and ':memory:' not in database_url
+
+        # SQLite erlaubt nur einen Schreiber: eine Schreibverbindung, Lesezugriffe über einen eigenen Pool
         self.engine = create_async_engine(
             database_url,
-            echo=False,
-            future=True
+            echo=self.config.ECHO,
+            future=True,
+            **({'pool_size': 1, 'max_overflow': 0} if file_based else {})
         )
+        self.read_engine = create_async_engine(
+            database_url,
+            echo=self.config.ECHO,
+            future=True,
+            pool_size=self.config.POOL_SIZE,
+            max_overflow=self.config.MAX_OVERFLOW
+        ) if file_based else self.engine
+
+        if database_url.startswith('sqlite') and self.config.SQLITE_TUNING:
+            event.listen(self.engine.sync_engine, "connect", self._apply_pragmas)
+            if self.read_engine is not self.engine:
+                event.listen(self.read_engine.sync_engine, "connect", self._apply_read_pragmas)
         
         self.async_session = async_sessionmaker(
             self.engine,
             class_=AsyncSession,
             expire_on_commit=False
         )
+        self.read_session = async_sessionmaker(
+            self.read_engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+        self.price_series = PriceSeries(
+            raw_days=self.config.PRICE_RAW_RETENTION_DAYS,
+            hourly_days=self.config.PRICE_HOURLY_RETENTION_DAYS,
+            daily_days=self.config.PRICE_DAILY_RETENTION_DAYS
+        )
         
         self.logger.info("Database manager initialized")
 
+    def _apply_pragmas(self, dbapi_connection, connection_record) -> None:
+        """Setzt das SQLite-Profil (WAL, Synchronisation, Caches) für jede neue Verbindung."""
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA synchronous={self.config.SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA mmap_size={int(self.config.SQLITE_MMAP_SIZE)}")
+            cursor.execute(f"PRAGMA cache_size=-{int(self.config.SQLITE_CACHE_SIZE_KB)}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.execute(f"PRAGMA busy_timeout={int(self.config.SQLITE_BUSY_TIMEOUT_MS)}")
+        finally:
+            cursor.close()
+
+    def _apply_read_pragmas(self, dbapi_connection, connection_record) -> None:
+        self._apply_pragmas(dbapi_connection, connection_record)
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
     async def init_db(self):
         """Initialisiert die Datenbankstruktur."""
         try:
             async with self.engine.begin() as conn:
+                await conn.run_sync(self._drop_legacy_frontier)
                 await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(self._add_missing_columns)
+                await conn.run_sync(self._add_missing_indexes)
+            await self._migrate_legacy_prices()
             self.logger.info("Database tables created successfully")
         except Exception as e:
             self.logger.error(f"Database initialization failed: {e}", exc_info=True)
             raise
 
+    def _drop_legacy_frontier(self, connection) -> None:
+        """Verwirft eine Crawl-Frontier mit altem Schlüssel (nur url); sie ist nur ein Checkpoint."""
+        inspector = inspect(connection)
+        if CrawlFrontierEntry.__tablename__ not in inspector.get_table_names():
+            return
+        key = inspector.get_pk_constraint(CrawlFrontierEntry.__tablename__).get('constrained_columns') or []
+        if 'kind' not in key:
+            CrawlFrontierEntry.__table__.drop(connection)
+            self.logger.info("Dropped crawl frontier with legacy url-only key")
+
+    def _add_missing_columns(self, connection) -> None:
+        """Ergänzt nachträglich hinzugefügte, nullable Spalten in bestehenden Tabellen."""
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                self.logger.info(f"Added column {table.name}.{column.name}")
+
+    def _add_missing_indexes(self, connection) -> None:
+        """Legt neue Indizes auf bestehenden Tabellen an; create_all übergeht vorhandene Tabellen."""
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                index.create(connection)
+                self.logger.info(f"Created index {index.name}")
+
+    async def _migrate_legacy_prices(self, chunk_size: int = 5000) -> None:
+        """Überführt Einträge der alten price_history-Tabelle in die partitionierte Zeitreihe."""
+        migrated = 0
+        while True:
+            async with self.async_session() as session:
+                stmt = (
+                    select(Price, Product.sku)
+                    .join(Product, Price.product_id == Product.id, isouter=True)
+                    .order_by(Price.id)
+                    .limit(chunk_size)
+                )
+                rows = (await session.execute(stmt)).all()
+                if not rows:
+                    break
+                await self.price_series.append(session, [{
+                    'sku': sku,
+                    'hhv_price': price.hhv_price,
+                    'alias_price': price.alias_price,
+                    'profit_margin': price.profit_margin,
+                    'source': price.source,
+                    'timestamp': price.timestamp
+                } for price, sku in rows])
+                await session.execute(delete(Price).where(Price.id <= rows[-1][0].id))
+                await session.commit()
+                migrated += len(rows)
+        if migrated:
+            self.logger.info(f"Migrated {migrated} legacy price rows into the price series")
+
     async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
         """Erstellt eine neue Datenbankssession."""
         async with self.async_session() as session:
@@ -64,24 +192,162 @@ class DatabaseManager:
             await session.rollback()
             return None
 
-    async def save_price(self, sku: str, price_data: Dict) -> Optional[Price]:
-        """Speichert einen neuen Preis-Eintrag."""
+    async def save_products(self, products: List[Dict]) -> int:
+        """
+        Speichert mehrere Produkte als INSERT ... ON CONFLICT(sku) DO UPDATE in einer Transaktion.
+        Bestehende Zeilen werden nur geschrieben, wenn sich eine der übergebenen Spalten geändert hat.
+        """
+        rows = self._product_rows(products)
+        if not rows:
+            return 0
         try:
             async with self.async_session() as session:
-                price = Price(
-                    sku=sku,
-                    hhv_price=price_data.get('hhv_price'),
-                    alias_price=price_data.get('alias_price'),
-                    timestamp=datetime.now()
+                await self._upsert_products(session, rows)
+                await session.commit()
+                return len(rows)
+        except Exception as e:
+            self.logger.error(f"Error saving products: {e}")
+            return 0
+
+    async def _upsert_products(self, session: AsyncSession, rows: List[Dict]) -> None:
+        # executemany braucht einheitliche Spalten: nach Spaltensatz gruppieren
+        groups: Dict[tuple, List[Dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        for columns, group in groups.items():
+            stmt = sqlite_insert(Product)
+            changed = [
+                column for column in columns
+                if column not in ('sku', 'created_at', 'updated_at')
+            ]
+            if changed:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Product.sku],
+                    set_={column: stmt.excluded[column] for column in changed + ['updated_at']},
+                    where=or_(*[
+                        Product.__table__.c[column].is_distinct_from(stmt.excluded[column])
+                        for column in changed
+                    ])
                 )
-                session.add(price)
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=[Product.sku])
+            await session.execute(stmt, group)
+
+    @staticmethod
+    def _product_rows(products: List[Dict]) -> List[Dict]:
+        """Reduziert Produktdaten auf Spalten der products-Tabelle; pro SKU gewinnt der letzte Eintrag."""
+        columns = {column.name for column in Product.__table__.columns} - {'id'}
+        now = datetime.utcnow()
+        rows: Dict[str, Dict] = {}
+        for product in products:
+            if not product.get('sku'):
+                continue
+            row = {key: value for key, value in product.items() if key in columns}
+            row['updated_at'] = now
+            rows[product['sku']] = row
+        return list(rows.values())
+
+    async def write_batch(
+        self,
+        products: List[Dict],
+        updates: Dict[str, Dict],
+        prices: List[Dict],
+        deals: List[Dict]
+    ) -> bool:
+        """
+        Schreibt gesammelte Änderungen in einer Transaktion: Produkt-Upserts,
+        Teil-Updates je SKU sowie neue Preis- und Deal-Einträge.
+        """
+        try:
+            async with self.async_session() as session:
+                if products:
+                    await self._upsert_products(session, self._product_rows(products))
+
+                now = datetime.utcnow()
+                groups: Dict[tuple, List[Dict]] = {}
+                for sku, values in updates.items():
+                    groups.setdefault(tuple(sorted(values)), []).append({'b_sku': sku, **values})
+                for columns, group in groups.items():
+                    stmt = (
+                        update(Product.__table__)
+                        .where(Product.__table__.c.sku == bindparam('b_sku'))
+                        .values({**{column: bindparam(column) for column in columns}, 'updated_at': now})
+                    )
+                    await session.execute(stmt, group)
+
+                if prices:
+                    await self.price_series.append(session, prices)
+                if deals:
+                    product_ids = await self._product_ids(
+                        session, {row.get('sku') for row in deals if row.get('sku')}
+                    )
+                    await session.execute(
+                        sqlite_insert(Deal),
+                        [self._history_row(Deal, row, product_ids, 'found_at') for row in deals]
+                    )
+
+                await session.commit()
+                return True
+        except Exception as e:
+            self.logger.error(f"Error writing batch: {e}")
+            return False
+
+    async def _product_ids(self, session: AsyncSession, skus) -> Dict[str, int]:
+        if not skus:
+            return {}
+        result = await session.execute(select(Product.sku, Product.id).where(Product.sku.in_(skus)))
+        return dict(result.all())
+
+    @staticmethod
+    def _history_row(model, data: Dict, product_ids: Dict[str, int], time_column: str) -> Dict:
+        """Bildet SKU-basierte Preis-/Deal-Daten auf die Spalten der Tabelle ab."""
+        columns = [column for column in model.__table__.columns if column.name != 'id']
+        row = {key: value for key, value in data.items() if key in model.__table__.columns}
+        row.setdefault('product_id', product_ids.get(data.get('sku')))
+        timestamp = data.get(time_column, data.get('timestamp'))
+        if isinstance(timestamp, (int, float)):
+            # Zeitstempel werden wie alle Cutoffs (utcnow) in naiver UTC-Zeit gespeichert
+            timestamp = datetime.utcfromtimestamp(timestamp)
+        row[time_column] = timestamp or datetime.utcnow()
+        # executemany braucht einheitliche Spalten; fehlende erhalten ihren Default
+        return {
+            column.name: row.get(
+                column.name,
+                column.default.arg if column.default is not None and column.default.is_scalar else None
+            )
+            for column in columns
+        }
+
+    async def save_price(self, sku: str, price_data: Dict) -> bool:
+        """Speichert einen neuen Preis-Punkt in der Zeitreihe."""
+        try:
+            async with self.async_session() as session:
+                await self.price_series.append(session, [{**price_data, 'sku': sku}])
                 await session.commit()
-                await session.refresh(price)
-                return price
+                return True
         except Exception as e:
             self.logger.error(f"Error saving price: {e}")
-            await session.rollback()
-            return None
+            return False
+
+    async def get_price_history(
+        self,
+        sku: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        resolution: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Liest den Preisverlauf einer SKU (Standard: letzte 30 Tage).
+        Ohne resolution wird je nach Zeitraum aus Rohdaten, Stunden- oder Tages-Rollups gelesen.
+        """
+        try:
+            start = start or datetime.utcnow() - timedelta(days=30)
+            async with self.read_session() as session:
+                return await self.price_series.query(session, sku, start, end, resolution)
+        except Exception as e:
+            self.logger.error(f"Error fetching price history: {e}")
+            return []
 
     async def save_deal(self, deal_data: Dict) -> Optional[Deal]:
         """Speichert einen profitablen Deal."""
@@ -97,29 +363,306 @@ class DatabaseManager:
             await session.rollback()
             return None
 
+    async def save_deal_board(self, deals: List[Dict]) -> bool:
+        """Ersetzt den Snapshot des Deal-Boards in einer Transaktion."""
+        try:
+            async with self.async_session() as session:
+                snapshot_at = datetime.utcnow()
+                await session.execute(delete(DealBoardEntry))
+                session.add_all([
+                    DealBoardEntry(
+                        sku=deal['sku'],
+                        rank=rank,
+                        name=deal.get('name'),
+                        hhv_price=deal.get('hhv_price'),
+                        alias_price=deal.get('alias_price'),
+                        profit_margin=deal.get('profit_margin'),
+                        roi=deal.get('roi'),
+                        found_at=deal.get('found_at'),
+                        snapshot_at=snapshot_at
+                    )
+                    for rank, deal in enumerate(deals, start=1)
+                ])
+                await session.commit()
+                return True
+        except Exception as e:
+            self.logger.error(f"Error saving deal board: {e}")
+            return False
+
+    async def get_deal_board(self, limit: int = 100) -> List[Dict]:
+        """Liest den zuletzt gespeicherten Deal-Board-Snapshot."""
+        try:
+            async with self.read_session() as session:
+                stmt = select(DealBoardEntry).order_by(DealBoardEntry.rank).limit(limit)
+                result = await session.execute(stmt)
+                return [{
+                    'sku': entry.sku,
+                    'rank': entry.rank,
+                    'name': entry.name,
+                    'hhv_price': entry.hhv_price,
+                    'alias_price': entry.alias_price,
+                    'profit_margin': entry.profit_margin,
+                    'roi': entry.roi,
+                    'found_at': entry.found_at,
+                    'snapshot_at': entry.snapshot_at
+                } for entry in result.scalars().all()]
+        except Exception as e:
+            self.logger.error(f"Error fetching deal board: {e}")
+            return []
+
+    async def save_monitor_state(self, states: List[Dict]) -> bool:
+        """Schreibt den Restock-Monitoring-Zustand als Upsert in einer Transaktion."""
+        if not states:
+            return True
+        try:
+            async with self.async_session() as session:
+                stmt = sqlite_insert(MonitorState)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[MonitorState.sku],
+                    set_={
+                        column: stmt.excluded[column]
+                        for column in (
+                            'probability', 'next_check', 'priority', 'last_check',
+                            'success_rate', 'profit_margin', 'sales_velocity',
+                            'url', 'available', 'available_sizes', 'updated_at'
+                        )
+                    }
+                )
+                now = datetime.utcnow()
+                await session.execute(stmt, [{**state, 'updated_at': now} for state in states])
+                await session.commit()
+                return True
+        except Exception as e:
+            self.logger.error(f"Error saving monitor state: {e}")
+            return False
+
+    async def delete_monitor_state(self, skus: List[str]) -> bool:
+        """Entfernt nicht mehr überwachte SKUs aus dem gespeicherten Zustand."""
+        if not skus:
+            return True
+        try:
+            async with self.async_session() as session:
+                await session.execute(delete(MonitorState).where(MonitorState.sku.in_(skus)))
+                await session.commit()
+                return True
+        except Exception as e:
+            self.logger.error(f"Error deleting monitor state: {e}")
+            return False
+
+    async def load_monitor_state(self) -> List[Dict]:
+        """Lädt den kompletten Restock-Monitoring-Zustand in einem Bulk-Read."""
+        try:
+            async with self.read_session() as session:
+                result = await session.execute(select(*MonitorState.__table__.columns))
+                return [dict(row) for row in result.mappings().all()]
+        except Exception as e:
+            self.logger.error(f"Error loading monitor state: {e}")
+            return []
+
+    async def save_frontier(self, entries: List[Dict]) -> bool:
+        """Schreibt geänderte Einträge der Crawl-Frontier als Upsert in einer Transaktion."""
+        if not entries:
+            return True
+        try:
+            async with self.async_session() as session:
+                stmt = sqlite_insert(CrawlFrontierEntry)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[CrawlFrontierEntry.url, CrawlFrontierEntry.kind],
+                    set_={
+                        column: stmt.excluded[column]
+                        for column in ('priority', 'status', 'attempts', 'payload', 'completed_at', 'updated_at')
+                    }
+                )
+                now = datetime.utcnow()
+                await session.execute(stmt, [{**entry, 'updated_at': now} for entry in entries])
+                await session.commit()
+                return True
+        except Exception as e:
+            self.logger.error(f"Error saving crawl frontier: {e}")
+            return False
+
+    async def load_frontier(self) -> List[Dict]:
+        """Lädt die komplette Crawl-Frontier in einem Bulk-Read."""
+        try:
+            async with self.read_session() as session:
+                columns = [column for column in CrawlFrontierEntry.__table__.columns if column.name != 'updated_at']
+                result = await session.execute(select(*columns))
+                return [dict(row) for row in result.mappings().all()]
+        except Exception as e:
+            self.logger.error(f"Error loading crawl frontier: {e}")
+            return []
+
+    async def clear_frontier(self) -> bool:
+        """Löscht den Checkpoint der Crawl-Frontier nach einem vollständigen Crawl."""
+        try:
+            async with self.async_session() as session:
+                await session.execute(delete(CrawlFrontierEntry))
+                await session.commit()
+                return True
+        except Exception as e:
+            self.logger.error(f"Error clearing crawl frontier: {e}")
+            return False
+
+    async def save_restock_events(self, events: List[Dict], detected_by: str = 'scanner') -> int:
+        """Schreibt Katalog-Diff-Events gesammelt in restock_history."""
+        if not events:
+            return 0
+        try:
+            async with self.async_session() as session:
+                skus = {event['sku'] for event in events if event.get('sku')}
+                product_ids = {}
+                if skus:
+                    result = await session.execute(
+                        select(Product.sku, Product.id).where(Product.sku.in_(skus))
+                    )
+                    product_ids = dict(result.all())
+
+                rows = []
+                for event in events:
+                    listed = event['type'] != 'disappeared'
+                    rows.append({
+                        'product_id': product_ids.get(event.get('sku')),
+                        'available_stock': 1 if listed else 0,
+                        'restock_amount': 1 if event['type'] == 'appeared' else 0,
+                        'timestamp': event.get('detected_at') or datetime.utcnow(),
+                        'detected_by': detected_by,
+                        'event_type': event['type'],
+                        'price': event.get('new_price') if listed else event.get('old_price')
+                    })
+                await session.execute(sqlite_insert(RestockHistory), rows)
+                await session.commit()
+                return len(rows)
+        except Exception as e:
+            self.logger.error(f"Error saving restock events: {e}")
+            return 0
+
+    async def stream_rows(self, stmt, chunk_size: int = 5000) -> AsyncIterator[Sequence]:
+        """
+        Führt eine Core-Abfrage aus und liefert die Ergebnis-Tupel chunkweise,
+        ohne das gesamte Ergebnis oder ORM-Objekte im Speicher zu halten.
+        """
+        async with self.read_engine.connect() as conn:
+            result = await conn.stream(stmt.execution_options(yield_per=chunk_size))
+            async for rows in result.partitions(chunk_size):
+                yield rows
+
+    async def stream_batches(self, stmt, chunk_size: int = 5000) -> AsyncIterator[np.ndarray]:
+        """Wie stream_rows, aber jeder Chunk als typisiertes NumPy-Record-Array."""
+        dtype = self._record_dtype(stmt.selected_columns)
+        async for rows in self.stream_rows(stmt, chunk_size):
+            yield self._to_records(rows, dtype)
+
+    @staticmethod
+    def _record_dtype(columns) -> np.dtype:
+        """Leitet den Record-Typ aus den Spaltentypen ab; nullable Ganzzahlen werden float (NULL = NaN)."""
+        fields = []
+        for column in columns:
+            try:
+                python_type = column.type.python_type
+            except NotImplementedError:
+                python_type = object
+            if python_type is bool:
+                dtype = '?'
+            elif python_type is int:
+                dtype = 'f8' if getattr(column, 'nullable', True) else 'i8'
+            elif python_type is float:
+                dtype = 'f8'
+            elif python_type is datetime:
+                dtype = 'datetime64[us]'
+            else:
+                dtype = 'O'
+            fields.append((column.name, dtype))
+        return np.dtype(fields)
+
+    @staticmethod
+    def _to_records(rows: Sequence, dtype: np.dtype) -> np.ndarray:
+        records = np.empty(len(rows), dtype=dtype)
+        if not rows:
+            return records
+        for name, values in zip(dtype.names, zip(*rows)):
+            if dtype[name].kind in 'bi':
+                values = [value or 0 for value in values]
+            records[name] = np.array(values, dtype=dtype[name])
+        return records
+
+    def _profitable_query(self, min_profit: float, min_sales: int, columns: Optional[Sequence[str]] = None):
+        table = Product.__table__
+        return select(*[table.c[name] for name in columns or self.PROFITABLE_COLUMNS]).where(
+            table.c.profit_margin >= min_profit,
+            table.c.monthly_sales >= min_sales
+        )
+
+    async def iter_profitable_products(
+        self,
+        min_profit: float = 15.0,
+        min_sales: int = 5,
+        columns: Optional[Sequence[str]] = None,
+        chunk_size: int = 5000
+    ) -> AsyncIterator[np.ndarray]:
+        """Streamt profitable Produkte als NumPy-Record-Batches."""
+        try:
+            async for batch in self.stream_batches(self._profitable_query(min_profit, min_sales, columns), chunk_size):
+                yield batch
+        except Exception as e:
+            self.logger.error(f"Error streaming profitable products: {e}")
+
     async def get_profitable_products(self, min_profit: float = 15.0, min_sales: int = 5) -> List[Dict]:
         """Holt profitable Produkte für das Restock-Monitoring."""
         try:
-            async with self.async_session() as session:
-                stmt = select(Product).where(
-                    Product.profit_margin >= min_profit,
-                    Product.monthly_sales >= min_sales
+            products = []
+            async for rows in self.stream_rows(self._profitable_query(min_profit, min_sales)):
+                products.extend(dict(row._mapping) for row in rows)
+            return products
+        except Exception as e:
+            self.logger.error(f"Error fetching profitable products: {e}")
+            return []
+
+    async def get_recent_deals(self, hours: int = 24, limit: int = 100) -> List[Dict]:
+        """Holt die profitabelsten Deals der letzten Stunden."""
+        try:
+            cutoff = datetime.utcnow() - timedelta(hours=hours)
+            async with self.read_session() as session:
+                # Nur Spalten aus ix_deals_found_profit, SKU per Primärschlüssel nachladen
+                stmt = (
+                    select(Product.sku, Deal.profit_margin, Deal.found_at, Deal.status)
+                    .join(Product, Deal.product_id == Product.id)
+                    .where(Deal.found_at >= cutoff)
+                    .order_by(Deal.profit_margin.desc())
+                    .limit(limit)
                 )
                 result = await session.execute(stmt)
-                products = result.scalars().all()
-                return [product.__dict__ for product in products]
+                return [dict(row) for row in result.mappings().all()]
         except Exception as e:
-            self.logger.error(f"Error fetching profitable products: {e}")
+            self.logger.error(f"Error fetching recent deals: {e}")
             return []
 
+    def _training_query(self, columns: Optional[Sequence[str]] = None, since: Optional[datetime] = None):
+        table = MLData.__table__
+        stmt = select(*[table.c[name] for name in columns or self.TRAINING_COLUMNS]).order_by(table.c.id)
+        if since is not None:
+            stmt = stmt.where(table.c.timestamp >= since)
+        return stmt
+
+    async def iter_training_data(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        since: Optional[datetime] = None,
+        chunk_size: int = 5000
+    ) -> AsyncIterator[np.ndarray]:
+        """Streamt Trainingsdaten als NumPy-Record-Batches mit begrenztem Speicherbedarf."""
+        try:
+            async for batch in self.stream_batches(self._training_query(columns, since), chunk_size):
+                yield batch
+        except Exception as e:
+            self.logger.error(f"Error streaming training data: {e}")
+
     async def get_training_data(self, limit: int = 1000) -> List[Dict]:
         """Holt Trainingsdaten für das ML-Modell."""
         try:
-            async with self.async_session() as session:
-                stmt = select(MLData).limit(limit)
-                result = await session.execute(stmt)
-                data = result.scalars().all()
-                return [item.__dict__ for item in data]
+            data = []
+            async for rows in self.stream_rows(self._training_query().limit(limit), chunk_size=min(limit, 5000)):
+                data.extend(dict(row._mapping) for row in rows)
+            return data
         except Exception as e:
             self.logger.error(f"Error fetching training data: {e}")
             return []
@@ -137,21 +680,28 @@ class DatabaseManager:
             await session.rollback()
             return False
 
-    async def cleanup_old_data(self, days: int = 30) -> None:
-        """Bereinigt alte Datenbankeinträge."""
+    async def cleanup_old_data(self, days: Optional[int] = None) -> None:
+        """
+        Verwirft abgelaufene Partitionen der Preis-Zeitreihe je Aufbewahrungsstufe.
+        days überschreibt die Aufbewahrung der Rohpunkte; die Rollups bleiben erhalten.
+        """
         try:
-            cutoff_date = datetime.now() - timedelta(days=days)
             async with self.async_session() as session:
-                await session.execute(delete(Price).where(Price.timestamp < cutoff_date))
+                dropped = await self.price_series.apply_retention(session, raw_days=days)
                 await session.commit()
-                self.logger.info(f"Cleaned up data older than {days} days")
+                self.logger.info(f"Cleaned up {len(dropped)} expired price partitions")
         except Exception as e:
             self.logger.error(f"Error during cleanup: {e}")
-            await session.rollback()
 
     async def close(self):
         """Schließt alle Datenbankverbindungen."""
         try:
+            if self.config.SQLITE_TUNING and self.engine.dialect.name == 'sqlite':
+                # Aktualisiert Planer-Statistiken für Tabellen, deren Abfragen davon profitieren
+                async with self.engine.connect() as conn:
+                    await conn.exec_driver_sql("PRAGMA optimize")
+            if self.read_engine is not self.engine:
+                await self.read_engine.dispose()
             await self.engine.dispose()
             self.logger.info("Database connections closed")
         except Exception as e:
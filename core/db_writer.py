@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+
+class DatabaseWriter:
+    """
+    Write-Behind-Writer, der alle Schreibzugriffe in Gruppen-Commits bündelt.
+
+    Aufrufer legen Schreibabsichten in eine begrenzte Queue und warten nur auf
+    Wunsch (wait=True) auf die Dauerhaftigkeit. Ein einzelner Hintergrund-Task
+    sammelt Absichten bis flush_interval_ms vergangen oder max_batch_rows
+    erreicht sind: Produkte werden pro SKU zusammengeführt (letzter Wert
+    gewinnt), Preise und Deals angehängt. Jede Gruppe wird in einer
+    Transaktion geschrieben; schlägt sie fehl, wird sie halbiert und erneut
+    geschrieben, bis nur die fehlerhaften Absichten übrig bleiben.
+    """
+
+    def __init__(
+        self,
+        database,
+        max_queue: int = 10000,
+        flush_interval_ms: int = 50,
+        max_batch_rows: int = 1000
+    ):
+        self.database = database
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_rows = max(1, max_batch_rows)
+        self.logger = logging.getLogger("DatabaseWriter")
+        self.writer_task: Optional[asyncio.Task] = None
+        self._reset_batch()
+        self.stats = {
+            'intents': 0,
+            'coalesced': 0,
+            'commits': 0,
+            'rows_written': 0,
+            'failed_commits': 0,
+            'dropped_rows': 0
+        }
+
+    def _reset_batch(self) -> None:
+        self._products: Dict[str, Dict] = {}
+        self._updates: Dict[str, Dict] = {}
+        self._prices: List[Dict] = []
+        self._deals: List[Dict] = []
+        self._waiters: List[asyncio.Future] = []
+        self._rows = 0
+
+    async def start(self) -> None:
+        """Startet den Hintergrund-Task."""
+        if not self.writer_task or self.writer_task.done():
+            self.writer_task = asyncio.create_task(self._run(), name="database_writer")
+            self.logger.info("Database-Writer gestartet")
+
+    async def save_product(self, product_data: Dict, wait: bool = False) -> bool:
+        """Speichert oder aktualisiert ein Produkt (Upsert nach SKU)."""
+        return await self._submit(('product', product_data), wait)
+
+    async def save_products(self, products: List[Dict], wait: bool = False) -> bool:
+        """Speichert mehrere Produkte; bei wait=True erst nach dem Commit aller Produkte zurück."""
+        results = [await self._submit(('product', product), False) for product in products]
+        if wait:
+            return await self.flush()
+        return all(results)
+
+    async def update_product(self, sku: str, wait: bool = False, **values) -> bool:
+        """Aktualisiert einzelne Spalten eines bestehenden Produkts."""
+        return await self._submit(('update', {'sku': sku, **values}), wait)
+
+    async def save_price(self, sku: str, price_data: Dict, wait: bool = False) -> bool:
+        """Hängt einen Preis-Eintrag an."""
+        return await self._submit(('price', {**price_data, 'sku': sku}), wait)
+
+    async def save_deal(self, deal_data: Dict, wait: bool = False) -> bool:
+        """Hängt einen Deal an."""
+        return await self._submit(('deal', deal_data), wait)
+
+    async def flush(self) -> bool:
+        """Schreibt alle bisher eingereihten Absichten und wartet auf den Commit."""
+        if not self.writer_task or self.writer_task.done():
+            return False
+        return await self._submit(('flush', None), True)
+
+    async def _submit(self, intent: tuple, wait: bool) -> bool:
+        if not self.writer_task or self.writer_task.done():
+            self.logger.warning("Database-Writer läuft nicht, Schreibabsicht verworfen")
+            return False
+        future = asyncio.get_running_loop().create_future() if wait else None
+        # Blockiert bei voller Queue (Backpressure)
+        await self.queue.put((intent, future))
+        if future is None:
+            return True
+        return await future
+
+    async def _run(self) -> None:
+        """Sammelt Absichten und committet sie gruppenweise."""
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is None:
+                break
+            force = self._apply(*item)
+
+            deadline = time.monotonic() + self.flush_interval
+            while not force and self._rows < self.max_batch_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                force = self._apply(*item)
+
+            await self._commit()
+
+        # Beim Beenden alles Verbliebene schreiben
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not None:
+                self._apply(*item)
+        await self._commit()
+
+    def _apply(self, intent: tuple, future: Optional[asyncio.Future]) -> bool:
+        """Übernimmt eine Absicht in den laufenden Batch; True erzwingt einen sofortigen Commit."""
+        kind, data = intent
+        if future is not None:
+            self._waiters.append(future)
+        if kind == 'flush':
+            return True
+
+        self.stats['intents'] += 1
+        sku = data.get('sku') if data else None
+        if kind == 'product':
+            if sku in self._products:
+                self.stats['coalesced'] += 1
+            else:
+                self._rows += 1
+            # Ausstehende Teil-Updates gehen im Upsert auf
+            self._products[sku] = {**self._products.get(sku, {}), **self._updates.pop(sku, {}), **data}
+        elif kind == 'update':
+            values = {key: value for key, value in data.items() if key != 'sku'}
+            if sku in self._products:
+                self._products[sku].update(values)
+                self.stats['coalesced'] += 1
+            elif sku in self._updates:
+                self._updates[sku].update(values)
+                self.stats['coalesced'] += 1
+            else:
+                self._updates[sku] = values
+                self._rows += 1
+        elif kind == 'price':
+            self._prices.append(data)
+            self._rows += 1
+        elif kind == 'deal':
+            self._deals.append(data)
+            self._rows += 1
+        return False
+
+    async def _commit(self) -> None:
+        rows, waiters = self._rows, self._waiters
+        products, updates = list(self._products.values()), self._updates
+        prices, deals = self._prices, self._deals
+        self._reset_batch()
+
+        success = True
+        if rows:
+            if await self.database.write_batch(products, updates, prices, deals):
+                self.stats['commits'] += 1
+                self.stats['rows_written'] += rows
+            else:
+                self.stats['failed_commits'] += 1
+                self.logger.error(f"Gruppen-Commit mit {rows} Zeilen fehlgeschlagen, schreibe in Teilen")
+                # Reihenfolge beibehalten: Produkte vor Updates und Deals, die sich auf sie beziehen
+                units = (
+                    [('product', product) for product in products]
+                    + [('update', item) for item in updates.items()]
+                    + [('price', price) for price in prices]
+                    + [('deal', deal) for deal in deals]
+                )
+                dropped = await self._write_split(units)
+                self.stats['rows_written'] += rows - dropped
+                self.stats['dropped_rows'] += dropped
+                success = dropped == 0
+
+        for future in waiters:
+            if not future.done():
+                future.set_result(success)
+
+    async def _write_split(self, units: List[tuple]) -> int:
+        """Schreibt Absichten halbiert erneut; liefert die Anzahl verworfener Absichten."""
+        middle = len(units) // 2
+        dropped = 0
+        for part in (units[:middle], units[middle:]):
+            if not part:
+                continue
+            batch = self._batch(part)
+            if await self.database.write_batch(*batch):
+                self.stats['commits'] += 1
+            elif len(part) == 1:
+                kind, data = part[0]
+                self.logger.error(f"Schreibabsicht {kind} verworfen: {data}")
+                dropped += 1
+            else:
+                dropped += await self._write_split(part)
+        return dropped
+
+    @staticmethod
+    def _batch(units: List[tuple]) -> tuple:
+        """Argumente für write_batch aus einer Liste von Absichten."""
+        products, updates, prices, deals = [], {}, [], []
+        for kind, data in units:
+            if kind == 'product':
+                products.append(data)
+            elif kind == 'update':
+                updates[data[0]] = data[1]
+            elif kind == 'price':
+                prices.append(data)
+            else:
+                deals.append(data)
+        return products, updates, prices, deals
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'queued': self.queue.qsize()}
+
+    async def close(self) -> None:
+        """Schreibt ausstehende Absichten und beendet den Hintergrund-Task."""
+        if not self.writer_task or self.writer_task.done():
+            return
+        await self.queue.put(None)
+        await self.writer_task
+        self.logger.info("Database-Writer beendet")
@@ -0,0 +1,196 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class _BoardEntry:
+    __slots__ = ('sku', 'score', 'deal', 'expires_at', 'seq', 'in_top', 'removed')
+
+    def __init__(self, sku: str, score: float, deal: Dict, expires_at: float, seq: int):
+        self.sku = sku
+        self.score = score
+        self.deal = deal
+        self.expires_at = expires_at
+        self.seq = seq
+        self.in_top = False
+        self.removed = False
+
+
+class DealBoard:
+    """
+    Laufend gepflegte Top-K-Liste der besten Deals, nach SKU geschlüsselt.
+
+    Die aktuellen Top-K liegen in einem Min-Heap, alle übrigen Deals in einem
+    Max-Heap. Updates und Entfernungen kosten O(log n), veraltete Heap-Einträge
+    werden lazy verworfen. Das Lesen der Top-K berührt nur K Einträge.
+    """
+
+    def __init__(self, size: int = 100, ttl: int = 3600):
+        self.size = max(1, size)
+        self.ttl = ttl
+        self.logger = logging.getLogger("DealBoard")
+
+        self._entries: Dict[str, _BoardEntry] = {}
+        self._top: list = []      # (score, seq, entry) – kleinster Top-Deal oben
+        self._rest: list = []     # (-score, seq, entry) – bester Nicht-Top-Deal oben
+        self._expiry: list = []   # (expires_at, seq, entry)
+        self._top_count = 0
+        self._stale = 0
+        self._counter = itertools.count()
+        self.last_snapshot: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, sku: str) -> bool:
+        return sku in self._entries
+
+    def upsert(self, sku: str, score: float, deal: Dict, ttl: Optional[int] = None) -> None:
+        """Fügt einen Deal ein oder ersetzt den bestehenden Deal derselben SKU."""
+        existing = self._entries.pop(sku, None)
+        if existing:
+            self._discard(existing)
+            self._rebalance()
+
+        entry = _BoardEntry(sku, float(score), deal, time.time() + (ttl or self.ttl), next(self._counter))
+        self._entries[sku] = entry
+        heapq.heappush(self._expiry, (entry.expires_at, entry.seq, entry))
+        self._insert(entry)
+        self._rebalance()
+        self._maybe_compact()
+
+    def remove(self, sku: str) -> bool:
+        """Entfernt den Deal einer SKU, z.B. nach einer Preisänderung."""
+        entry = self._entries.pop(sku, None)
+        if not entry:
+            return False
+        self._discard(entry)
+        self._rebalance()
+        self._maybe_compact()
+        return True
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Entfernt alle abgelaufenen Deals und gibt deren Anzahl zurück."""
+        now = now or time.time()
+        expired = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, _, entry = heapq.heappop(self._expiry)
+            if not entry.removed and self.remove(entry.sku):
+                expired += 1
+        return expired
+
+    def update_from_analysis(self, result: Dict, min_profit_margin: float) -> None:
+        """Übernimmt ein Analyseergebnis: profitable Deals rein, alle anderen raus."""
+        sku = result.get('sku')
+        if not sku:
+            return
+        margin = float(result.get('profit_margin') or 0.0)
+        if margin >= min_profit_margin:
+            self.upsert(sku, margin, {
+                'sku': sku,
+                'name': result.get('name'),
+                'hhv_price': result.get('hhv_price'),
+                'alias_price': result.get('alias_price'),
+                'profit_margin': margin,
+                'roi': result.get('roi'),
+                'found_at': datetime.utcnow()
+            })
+        else:
+            self.remove(sku)
+
+    def top(self, n: Optional[int] = None) -> List[Dict]:
+        """Liefert die besten Deals absteigend nach Score."""
+        self.expire()
+        live = [entry for _, _, entry in self._top if not entry.removed]
+        live.sort(key=lambda entry: entry.score, reverse=True)
+        return [entry.deal for entry in live[:n or self.size]]
+
+    def get_stats(self) -> Dict:
+        return {
+            'deals': len(self._entries),
+            'top_size': self._top_count,
+            'stale_heap_entries': self._stale,
+            'last_snapshot': self.last_snapshot
+        }
+
+    async def snapshot(self, database) -> bool:
+        """Schreibt die aktuellen Top-K in die Tabelle deal_board."""
+        deals = self.top()
+        if await database.save_deal_board(deals):
+            self.last_snapshot = datetime.now()
+            return True
+        return False
+
+    async def run_snapshot_loop(self, database, interval: int = 60) -> None:
+        """Schreibt periodisch Snapshots, bis der Task abgebrochen wird."""
+        while True:
+            try:
+                await asyncio.sleep(interval)
+                self.expire()
+                await self.snapshot(database)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Fehler beim Deal-Board-Snapshot: {e}")
+
+    def _discard(self, entry: _BoardEntry) -> None:
+        entry.removed = True
+        if entry.in_top:
+            entry.in_top = False
+            self._top_count -= 1
+        self._stale += 1
+
+    def _insert(self, entry: _BoardEntry) -> None:
+        self._prune(self._top)
+        if self._top_count < self.size or entry.score > self._top[0][0]:
+            self._push_top(entry)
+            if self._top_count > self.size:
+                _, _, demoted = heapq.heappop(self._top)
+                demoted.in_top = False
+                self._top_count -= 1
+                heapq.heappush(self._rest, (-demoted.score, demoted.seq, demoted))
+        else:
+            heapq.heappush(self._rest, (-entry.score, entry.seq, entry))
+
+    def _rebalance(self) -> None:
+        while self._top_count < self.size:
+            self._prune(self._rest)
+            if not self._rest:
+                break
+            _, _, promoted = heapq.heappop(self._rest)
+            self._push_top(promoted)
+
+    def _push_top(self, entry: _BoardEntry) -> None:
+        entry.in_top = True
+        self._top_count += 1
+        heapq.heappush(self._top, (entry.score, entry.seq, entry))
+
+    def _prune(self, heap: list) -> None:
+        while heap and heap[0][2].removed:
+            heapq.heappop(heap)
+            self._stale -= 1
+
+    def _maybe_compact(self) -> None:
+        """Baut die Heaps neu auf, wenn zu viele verworfene Einträge übrig sind."""
+        if self._stale <= len(self._entries) + self.size:
+            return
+        ranked = sorted(self._entries.values(), key=lambda entry: entry.score, reverse=True)
+        self._top = []
+        self._rest = []
+        self._top_count = 0
+        for entry in ranked[:self.size]:
+            entry.in_top = True
+            self._top.append((entry.score, entry.seq, entry))
+        for entry in ranked[self.size:]:
+            entry.in_top = False
+            self._rest.append((-entry.score, entry.seq, entry))
+        heapq.heapify(self._top)
+        heapq.heapify(self._rest)
+        self._top_count = len(self._top)
+        self._expiry = [item for item in self._expiry if not item[2].removed]
+        heapq.heapify(self._expiry)
+        self._stale = 0
@@ -0,0 +1,254 @@
+import asyncio
+import enum
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+
+from database.models import Deal, Product
+from database.timeseries import RAW
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # ohne pyarrow kein Export
+    pa = None
+
+
+class HistoryExporter:
+    """
+    Exportiert Preis-, Produkt- und Deal-Historie inkrementell in spaltenbasierte Dateien.
+
+    Jeder Datensatz wird nach Tag partitioniert (Hive-Layout dataset/date=YYYY-MM-DD/)
+    und pro Lauf als neue Datei angehängt. Ein Wasserzeichen je Datensatz merkt sich
+    den zuletzt exportierten Stand, sodass jeder Lauf nur neue Zeilen liest; für
+    Preise ist das die höchste id je Roh-Partition (Einfügereihenfolge). Format
+    'ipc' (unkomprimiertes Arrow IPC) lässt sich memory-mapped und ohne Kopie lesen,
+    'parquet' ist kompakter.
+    """
+
+    # Datensatz -> (Wasserzeichen-Spalte, Partitions-Spalte)
+    DATASETS = {
+        'prices': ('id', 'ts'),
+        'products': ('updated_at', 'updated_at'),
+        'deals': ('id', 'found_at')
+    }
+
+    def __init__(
+        self,
+        database,
+        directory: str = "data/exports",
+        file_format: str = "ipc",
+        batch_rows: int = 50000
+    ):
+        self.database = database
+        self.directory = Path(directory)
+        self.file_format = file_format
+        self.batch_rows = max(1, batch_rows)
+        self.logger = logging.getLogger("HistoryExporter")
+        self.watermark_path = self.directory / "_watermarks.json"
+        self.stats = {'runs': 0, 'rows': 0, 'files': 0}
+
+    async def export(self) -> Dict[str, int]:
+        """Exportiert alle Datensätze ab ihrem Wasserzeichen; liefert die Zeilen je Datensatz."""
+        if pa is None:
+            self.logger.warning("pyarrow nicht installiert, Export übersprungen")
+            return {}
+
+        watermarks = self._load_watermarks()
+        exported = {}
+        for dataset in self.DATASETS:
+            try:
+                rows, watermark = await self._export_dataset(dataset, watermarks.get(dataset))
+            except Exception as e:
+                self.logger.error(f"Fehler beim Export von {dataset}: {e}")
+                continue
+            exported[dataset] = rows
+            if watermark != watermarks.get(dataset):
+                watermarks[dataset] = watermark
+                # Nach jedem Datensatz sichern, damit ein Abbruch nichts doppelt exportiert
+                self._save_watermarks(watermarks)
+
+        self.stats['runs'] += 1
+        self.stats['rows'] += sum(exported.values())
+        self.logger.info(f"Historie exportiert: {exported}")
+        return exported
+
+    async def run_export_loop(self, interval: int = 3600) -> None:
+        """Exportiert sofort beim Start und danach periodisch, bis der Task abgebrochen wird."""
+        while True:
+            try:
+                await self.export()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Fehler im Export-Loop: {e}")
+            await asyncio.sleep(interval)
+
+    async def _export_dataset(self, dataset: str, watermark):
+        if dataset == 'prices':
+            return await self._export_prices(watermark)
+
+        watermark_column, date_column = self.DATASETS[dataset]
+        stmt = self._query(dataset, self._decode(watermark))
+        run = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        writers = {}
+        rows = 0
+        try:
+            async for batch in self.database.stream_batches(stmt, self.batch_rows):
+                if not len(batch):
+                    continue
+                self._write_batch(dataset, batch, date_column, run, writers)
+                rows += len(batch)
+                watermark = self._encode(batch[watermark_column][-1])
+        finally:
+            for writer in writers.values():
+                writer.close()
+        self.stats['files'] += len(writers)
+        return rows, watermark
+
+    async def _export_prices(self, watermark):
+        """
+        Exportiert Roh-Preispunkte je Partition ab der zuletzt exportierten id.
+        Die id folgt der Einfügereihenfolge, daher gehen auch verspätet geschriebene
+        Punkte mit älterem ts (Write-Behind, wiederholte Batches, Migration) nicht verloren.
+        """
+        prefix = RAW.table_name('')
+        async with self.database.read_session() as session:
+            tables = await self.database.price_series.tables(session, RAW)
+            watermarks = dict(watermark) if isinstance(watermark, dict) else {}
+            # Umstellung vom alten ts-Wasserzeichen: bis zur aktuell höchsten id noch nach ts filtern
+            legacy = None if isinstance(watermark, dict) else self._decode(watermark)
+            limits = await self._max_ids(session, tables) if legacy is not None else {}
+
+        run = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        writers = {}
+        rows = 0
+        try:
+            for table in tables:
+                key = table.name[len(prefix):]
+                stmt = select(*table.columns).order_by(table.c.id)
+                if key in watermarks:
+                    stmt = stmt.where(table.c.id > watermarks[key])
+                elif key in limits:
+                    stmt = stmt.where(table.c.ts > legacy, table.c.id <= limits[key])
+                async for batch in self.database.stream_batches(stmt, self.batch_rows):
+                    if not len(batch):
+                        continue
+                    # Die id ist nur je Partition eindeutig und wird nicht exportiert
+                    self._write_batch('prices', batch, 'ts', run, writers, exclude=('id',))
+                    rows += len(batch)
+                    watermarks[key] = self._encode(batch['id'][-1])
+                if key in limits:
+                    watermarks[key] = limits[key]
+        finally:
+            for writer in writers.values():
+                writer.close()
+        self.stats['files'] += len(writers)
+        # Wasserzeichen gelöschter Partitionen verwerfen
+        known = {table.name[len(prefix):] for table in tables}
+        return rows, {key: value for key, value in watermarks.items() if key in known}
+
+    @staticmethod
+    async def _max_ids(session, tables) -> Dict[str, int]:
+        """Höchste id je nicht leerer Roh-Partition."""
+        prefix = RAW.table_name('')
+        limits = {}
+        for table in tables:
+            max_id = (await session.execute(select(func.max(table.c.id)))).scalar()
+            if max_id is not None:
+                limits[table.name[len(prefix):]] = max_id
+        return limits
+
+    def _write_batch(self, dataset: str, batch: np.ndarray, date_column: str, run: str, writers: Dict, exclude=()) -> None:
+        """Hängt einen Batch an die Dateien der jeweiligen Tagespartitionen an."""
+        schema = self._schema(batch.dtype, exclude)
+        days = batch[date_column].astype('datetime64[D]').astype(str)
+        for day in np.unique(days):
+            if day not in writers:
+                writers[day] = self._open_writer(dataset, day, run, schema)
+            writers[day].write_table(self._to_table(batch[days == day], schema))
+
+    def _query(self, dataset: str, watermark):
+        """Abfrage der seit dem Wasserzeichen hinzugekommenen Zeilen, nach Wasserzeichen sortiert."""
+        if dataset == 'products':
+            table = Product.__table__
+            stmt = select(*[column for column in table.columns if column.name != 'id'])
+            if watermark is not None:
+                stmt = stmt.where(table.c.updated_at > watermark)
+            return stmt.order_by(table.c.updated_at)
+
+        if dataset == 'deals':
+            table = Deal.__table__
+            stmt = (
+                select(
+                    table.c.id, Product.sku, table.c.hhv_price, table.c.alias_price,
+                    table.c.profit_margin, table.c.roi, table.c.found_at, table.c.status
+                )
+                .join(Product, table.c.product_id == Product.id, isouter=True)
+            )
+            if watermark is not None:
+                stmt = stmt.where(table.c.id > watermark)
+            return stmt.order_by(table.c.id)
+
+    @staticmethod
+    def _schema(dtype: np.dtype, exclude=()) -> 'pa.Schema':
+        types = {'f': pa.float64(), 'i': pa.int64(), 'b': pa.bool_(), 'M': pa.timestamp('us')}
+        return pa.schema([
+            (name, types.get(dtype[name].kind, pa.string())) for name in dtype.names if name not in exclude
+        ])
+
+    @staticmethod
+    def _to_table(records: np.ndarray, schema: 'pa.Schema') -> 'pa.Table':
+        arrays = []
+        for field in schema:
+            values = records[field.name]
+            if pa.types.is_string(field.type):
+                values = [
+                    value.value if isinstance(value, enum.Enum) else (None if value is None else str(value))
+                    for value in values
+                ]
+            # from_pandas: NaN und NaT werden zu NULL
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def _open_writer(self, dataset: str, day: str, run: str, schema: 'pa.Schema'):
+        directory = self.directory / dataset / f"date={day}"
+        directory.mkdir(parents=True, exist_ok=True)
+        if self.file_format == 'parquet':
+            return pq.ParquetWriter(str(directory / f"part-{run}.parquet"), schema, compression='zstd')
+        return pa.ipc.new_file(str(directory / f"part-{run}.arrow"), schema)
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, np.datetime64):
+            return str(value.astype('datetime64[us]'))
+        return value.item() if isinstance(value, np.generic) else value
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, str):
+            return datetime.fromisoformat(value)
+        return value
+
+    def _load_watermarks(self) -> Dict:
+        try:
+            return json.loads(self.watermark_path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            self.logger.warning(f"Ungültige Wasserzeichen-Datei, exportiere vollständig: {e}")
+            return {}
+
+    def _save_watermarks(self, watermarks: Dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self.watermark_path.with_suffix('.tmp')
+        temp_path.write_text(json.dumps(watermarks, indent=2), encoding='utf-8')
+        temp_path.replace(self.watermark_path)
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
@@ -0,0 +1,129 @@
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class PollingAllocator:
+    """
+    Verteilt ein globales Probe-Budget (Checks pro Minute) auf alle überwachten SKUs.
+
+    Jede SKU erhält eine Check-Rate proportional zu ihrem erwarteten Wert
+    (Restock-Wahrscheinlichkeit × Gewinnmarge × Verkaufsgeschwindigkeit),
+    begrenzt durch min_interval und max_interval. Der gemeinsame Skalierungsfaktor
+    wird so bestimmt, dass die begrenzten Raten zusammen das Budget ausschöpfen:
+    Budget, das SKUs am Mindestintervall nicht nutzen können, geht an die übrigen.
+    Er wird nach Änderungen einmal pro Abfrage neu gelöst (O(n) je Bisektionsschritt).
+    """
+
+    def __init__(
+        self,
+        probes_per_minute: float,
+        min_interval: float = 30.0,
+        max_interval: float = 3600.0
+    ):
+        self.probes_per_minute = probes_per_minute
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.logger = logging.getLogger("PollingAllocator")
+        self._values: Dict[str, float] = {}
+        self._total_value = 0.0
+        self._scale = 0.0
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @staticmethod
+    def expected_value(probability, profit_margin, sales_velocity):
+        """Erwarteter Wert eines Checks; funktioniert für Skalare und NumPy-Arrays."""
+        return (
+            np.clip(probability, 0.0, 1.0)
+            * np.clip(profit_margin, 0.0, None)
+            * np.clip(sales_velocity, 0.0, None)
+        )
+
+    def update(self, sku: str, probability: float, profit_margin: float, sales_velocity: float) -> float:
+        """Aktualisiert den Wert einer SKU und liefert ihr neues Check-Intervall in Sekunden."""
+        value = float(self.expected_value(probability, profit_margin, sales_velocity))
+        self._total_value += value - self._values.get(sku, 0.0)
+        self._values[sku] = value
+        self._dirty = True
+        return self.interval(sku)
+
+    def update_many(self, skus, probabilities, margins, velocities) -> np.ndarray:
+        """Vektorisierte Variante von update() für einen ganzen Batch."""
+        values = self.expected_value(
+            np.asarray(probabilities, dtype=np.float64),
+            np.asarray(margins, dtype=np.float64),
+            np.asarray(velocities, dtype=np.float64)
+        )
+        for sku, value in zip(skus, values.tolist()):
+            self._total_value += value - self._values.get(sku, 0.0)
+            self._values[sku] = value
+        self._dirty = True
+        return self.intervals(values)
+
+    def remove(self, sku: str) -> None:
+        """Gibt das Budget einer nicht mehr überwachten SKU frei."""
+        value = self._values.pop(sku, None)
+        if value is not None:
+            self._total_value -= value
+            self._dirty = True
+        if not self._values:
+            self._total_value = 0.0
+
+    def interval(self, sku: str) -> float:
+        """Aktuelles Check-Intervall einer SKU in Sekunden."""
+        return float(self.intervals(np.array([self._values.get(sku, 0.0)]))[0])
+
+    def intervals(self, values: np.ndarray) -> np.ndarray:
+        """
+        Intervalle für gegebene Werte: rate_i = clip(λ × v_i, 1/max_interval, 1/min_interval).
+        SKUs ohne Wert fallen auf max_interval zurück.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if self._dirty:
+            self._solve()
+        if self._scale <= 0:
+            return np.full(values.shape, float(self.max_interval))
+        rates = np.clip(self._scale * values, 1.0 / self.max_interval, 1.0 / self.min_interval)
+        return 1.0 / rates
+
+    def _solve(self, iterations: int = 60) -> None:
+        """Bestimmt λ per Bisektion, sodass Σ clip(λ × v_i) dem Budget (Checks/Sekunde) entspricht."""
+        self._dirty = False
+        self._scale = 0.0
+        budget_per_second = self.probes_per_minute / 60.0
+        values = np.fromiter(self._values.values(), dtype=np.float64, count=len(self._values))
+        positive = values[values > 0]
+        if budget_per_second <= 0 or not len(positive):
+            return
+
+        low, high = 1.0 / self.max_interval, 1.0 / self.min_interval
+        floor = (len(values) - len(positive)) * low  # SKUs ohne Wert laufen mit max_interval
+
+        def used(scale: float) -> float:
+            return floor + float(np.clip(scale * positive, low, high).sum())
+
+        # Ab diesem Faktor liegen alle SKUs am Mindestintervall; mehr Budget ist nicht nutzbar
+        upper = high / positive.min()
+        if used(upper) <= budget_per_second:
+            self._scale = upper
+            return
+        lower = 0.0
+        for _ in range(iterations):
+            middle = (lower + upper) / 2
+            if used(middle) > budget_per_second:
+                upper = middle
+            else:
+                lower = middle
+        self._scale = lower
+
+    def get_stats(self) -> Dict:
+        return {
+            'skus': len(self._values),
+            'total_value': self._total_value,
+            'scale': self._scale,
+            'probes_per_minute': self.probes_per_minute
+        }
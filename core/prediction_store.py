@@ -0,0 +1,242 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class RestockPrediction:
+    sku: str
+    probability: float
+    next_check: datetime
+    priority: int
+    last_check: datetime = field(default_factory=datetime.now)
+    success_rate: float = 0.0
+    profit_margin: float = 0.0
+    sales_velocity: float = 0.0
+
+
+class PredictionView:
+    """Leichtgewichtige Sicht auf eine Zeile des PredictionStore mit RestockPrediction-Attributen."""
+
+    __slots__ = ('_store', '_row', 'sku')
+
+    def __init__(self, store: "PredictionStore", row: int, sku: str):
+        self._store = store
+        self._row = row
+        self.sku = sku
+
+    def _value(self, name: str):
+        if self._store._skus[self._row] != self.sku:
+            raise KeyError(f"Vorhersage für SKU {self.sku} wurde entfernt")
+        return self._store._columns[name][self._row]
+
+    @property
+    def probability(self) -> float:
+        return float(self._value('probability'))
+
+    @property
+    def next_check(self) -> datetime:
+        return datetime.fromtimestamp(self.next_check_ts)
+
+    @property
+    def next_check_ts(self) -> float:
+        return float(self._value('next_check'))
+
+    @property
+    def priority(self) -> int:
+        return int(self._value('priority'))
+
+    @property
+    def last_check(self) -> datetime:
+        return datetime.fromtimestamp(self.last_check_ts)
+
+    @property
+    def last_check_ts(self) -> float:
+        return float(self._value('last_check'))
+
+    @property
+    def success_rate(self) -> float:
+        return float(self._value('success_rate'))
+
+    @property
+    def profit_margin(self) -> float:
+        return float(self._value('profit_margin'))
+
+    @property
+    def sales_velocity(self) -> float:
+        return float(self._value('sales_velocity'))
+
+    def to_prediction(self) -> RestockPrediction:
+        """Kopiert die Zeile in eine eigenständige RestockPrediction."""
+        return RestockPrediction(
+            sku=self.sku,
+            probability=self.probability,
+            next_check=self.next_check,
+            priority=self.priority,
+            last_check=self.last_check,
+            success_rate=self.success_rate,
+            profit_margin=self.profit_margin,
+            sales_velocity=self.sales_velocity
+        )
+
+    def __repr__(self) -> str:
+        return f"PredictionView(sku={self.sku!r}, row={self._row})"
+
+
+class PredictionStore:
+    """
+    Spaltenorientierter Speicher für Restock-Vorhersagen.
+
+    Jede Spalte ist ein NumPy-Array, Zeitpunkte werden als Epoch-Sekunden
+    gespeichert. Ein Dict bildet SKU auf Zeile ab; freigegebene Zeilen werden
+    wiederverwendet. Abfragen wie "alle fälligen" oder "abgelaufenen" Einträge
+    sind einzelne Masken-Operationen über die Arrays.
+    """
+
+    COLUMNS = {
+        'probability': np.float32,
+        'next_check': np.float64,
+        'last_check': np.float64,
+        'priority': np.int16,
+        'success_rate': np.float32,
+        'profit_margin': np.float32,
+        'sales_velocity': np.float32
+    }
+
+    def __init__(self, capacity: int = 1024):
+        self._capacity = max(1, capacity)
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.zeros(self._capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()
+        }
+        self._active = np.zeros(self._capacity, dtype=bool)
+        self._skus: List[Optional[str]] = [None] * self._capacity
+        self._index: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, sku: str) -> bool:
+        return sku in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._index))
+
+    def get(self, sku: str) -> Optional[PredictionView]:
+        row = self._index.get(sku)
+        return PredictionView(self, row, sku) if row is not None else None
+
+    def column(self, name: str) -> np.ndarray:
+        """Sicht auf eine Spalte über alle bisher belegten Zeilen (inkl. freier Zeilen)."""
+        return self._columns[name][:self._size]
+
+    def upsert_prediction(self, prediction) -> int:
+        """Übernimmt eine RestockPrediction (oder PredictionView) in den Speicher."""
+        rows = self.upsert_many(
+            [prediction.sku],
+            probability=[prediction.probability],
+            next_check=[self._to_epoch(prediction.next_check)],
+            last_check=[self._to_epoch(prediction.last_check)],
+            priority=[prediction.priority],
+            success_rate=[prediction.success_rate],
+            profit_margin=[prediction.profit_margin],
+            sales_velocity=[prediction.sales_velocity]
+        )
+        return int(rows[0])
+
+    def upsert_many(self, skus: List[str], **columns) -> np.ndarray:
+        """
+        Schreibt Werte für mehrere SKUs spaltenweise; neue SKUs erhalten freie Zeilen.
+        Nicht übergebene Spalten behalten bei bestehenden SKUs ihren Wert.
+        """
+        unknown = set(columns) - set(self.COLUMNS)
+        if unknown:
+            raise ValueError(f"Unbekannte Spalten: {sorted(unknown)}")
+
+        rows = np.fromiter(
+            (self._row_for(sku) for sku in skus),
+            dtype=np.int64,
+            count=len(skus)
+        )
+        for name, values in columns.items():
+            self._columns[name][rows] = values
+        return rows
+
+    def remove(self, sku: str) -> bool:
+        row = self._index.get(sku)
+        if row is None:
+            return False
+        self.remove_rows(np.array([row]))
+        return True
+
+    def remove_rows(self, rows: np.ndarray) -> List[str]:
+        """Gibt Zeilen frei und liefert die zugehörigen SKUs."""
+        rows = np.asarray(rows, dtype=np.int64)
+        self._active[rows] = False
+        removed = []
+        for row in rows.tolist():
+            sku = self._skus[row]
+            if sku is None:
+                continue
+            self._skus[row] = None
+            del self._index[sku]
+            self._free.append(row)
+            removed.append(sku)
+        return removed
+
+    def due_rows(self, now: float) -> np.ndarray:
+        """Zeilen aller Vorhersagen, deren nächster Check fällig ist."""
+        return np.flatnonzero(self._active[:self._size] & (self.column('next_check') <= now))
+
+    def expired_rows(self, max_age: float, now: float) -> np.ndarray:
+        """
+        Zeilen aller Vorhersagen, deren letzter Check älter als max_age Sekunden ist und
+        deren geplanter Check ebenfalls mehr als max_age zurückliegt. Lange Check-Intervalle
+        verlängern die Lebensdauer also, statt die SKU vor ihrem nächsten Check zu verwerfen.
+        """
+        reference = np.maximum(self.column('last_check'), self.column('next_check'))
+        return np.flatnonzero(self._active[:self._size] & (now - reference > max_age))
+
+    def skus_at(self, rows: Iterable[int]) -> List[str]:
+        return [self._skus[row] for row in rows]
+
+    def memory_usage(self) -> int:
+        """Ungefährer Speicherbedarf der Spalten in Bytes (ohne SKU-Index)."""
+        return sum(column.nbytes for column in self._columns.values()) + self._active.nbytes
+
+    def _row_for(self, sku: str) -> int:
+        row = self._index.get(sku)
+        if row is not None:
+            return row
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._size >= self._capacity:
+                self._grow()
+            row = self._size
+            self._size += 1
+        self._index[sku] = row
+        self._skus[row] = sku
+        self._active[row] = True
+        for column in self._columns.values():
+            column[row] = 0
+        return row
+
+    def _grow(self) -> None:
+        new_capacity = self._capacity * 2
+        for name, column in self._columns.items():
+            grown = np.zeros(new_capacity, dtype=column.dtype)
+            grown[:self._capacity] = column
+            self._columns[name] = grown
+        active = np.zeros(new_capacity, dtype=bool)
+        active[:self._capacity] = self._active
+        self._active = active
+        self._skus.extend([None] * (new_capacity - self._capacity))
+        self._capacity = new_capacity
+
+    @staticmethod
+    def _to_epoch(value) -> float:
+        return value.timestamp() if isinstance(value, datetime) else float(value)
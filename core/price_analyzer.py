@@ -1,28 +1,32 @@
 import asyncio
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Set, Tuple
 import logging
+from collections import deque
 from datetime import datetime, timedelta
 import numpy as np
-from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
 
-@dataclass
-class RestockPrediction:
-    sku: str
-    probability: float
-    next_check: datetime
-    priority: int
-    last_check: datetime = datetime.now()
-    success_rate: float = 0.0
-    profit_margin: float = 0.0
-    sales_velocity: float = 0.0
+from utils.local_cache import LocalCache
 
 class PriceAnalyzer:
-    def __init__(self, ml_model, cache_manager=None, discord_notifier=None, alias_client=None):
+    def __init__(
+        self,
+        ml_model,
+        cache_manager=None,
+        discord_notifier=None,
+        alias_client=None,
+        num_workers: int = 4,
+        queue_size: int = 1000,
+        batch_size: int = 10,
+        l1_max_items: int = 10000,
+        deal_board=None
+    ):
         self.ml_model = ml_model
         self.cache_manager = cache_manager
         self.discord_notifier = discord_notifier
         self.alias_client = alias_client
+        self.deal_board = deal_board
 
         self.logger = logging.getLogger("PriceAnalyzer")
         self.prediction_ttl = timedelta(minutes=30)
@@ -35,103 +39,193 @@ class PriceAnalyzer:
         self.thread_pool = ThreadPoolExecutor(max_workers=20)
         self.semaphore = asyncio.Semaphore(100)
         self.cache_ttl = 300  # Cache-Zeit in Sekunden
-        self.price_cache = {}
-        self.analysis_queue = asyncio.Queue()
+        self.price_cache = LocalCache(max_items=l1_max_items, ttl=self.cache_ttl)  # L1 vor Redis
         self.retry_delay = 1
         self.max_retries = 3
 
+        # Worker-Pool: begrenzte Queue sorgt für Backpressure bei Lastspitzen
+        self.num_workers = max(1, num_workers)
+        self.batch_size = max(1, batch_size)
+        self.analysis_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.worker_tasks: Set[asyncio.Task] = set()
+        self.busy_workers = 0
+
+        # Metriken für Wartezeit in der Queue und Bearbeitungsdauer (Sekunden)
+        self.wait_times = deque(maxlen=1000)
+        self.service_times = deque(maxlen=1000)
+        self.stats = {
+            'enqueued': 0,
+            'processed': 0,
+            'failed': 0,
+            'invalid': 0
+        }
+
         # Aktive Analysen und Zeitstempel der letzten Analyse
         self.active_analyses = set()
         self.last_analysis_time = None
 
     async def start_analysis_worker(self):
-        """Startet einen Hintergrund-Worker für kontinuierliche Analyse."""
+        """Startet den Worker-Pool für kontinuierliche Analyse und wartet auf dessen Ende."""
+        if not self.worker_tasks:
+            for worker_id in range(self.num_workers):
+                task = asyncio.create_task(
+                    self._analysis_worker(worker_id),
+                    name=f"analysis_worker_{worker_id}"
+                )
+                self.worker_tasks.add(task)
+                task.add_done_callback(self.worker_tasks.discard)
+            self.logger.info(f"{self.num_workers} Analysis-Worker gestartet")
+        await asyncio.gather(*self.worker_tasks, return_exceptions=True)
+
+    async def enqueue_product(self, product: Dict) -> bool:
+        """Stellt ein Produkt zur Analyse ein; wartet, solange die Queue voll ist."""
+        if not isinstance(product, dict):
+            self.stats['invalid'] += 1
+            self.logger.error(f"Ungültiges Produktformat für die Warteschlange: {product}")
+            return False
+        await self.analysis_queue.put((time.perf_counter(), product))
+        self.stats['enqueued'] += 1
+        return True
+
+    async def _analysis_worker(self, worker_id: int):
+        """Blockiert auf der Queue und verarbeitet Produkte in kleinen Batches."""
         while True:
-            try:
-                if not self.analysis_queue.empty():
-                    product = await self.analysis_queue.get()
-                    if not isinstance(product, dict):
-                        self.logger.error(f"Ungültiges Produktformat in der Warteschlange: {product}")
-                        continue
+            batch = [await self.analysis_queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.analysis_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
 
-                    analysis_task = asyncio.create_task(self.analyze_price(product))
-                    self.active_analyses.add(analysis_task)
-                    analysis_task.add_done_callback(self.active_analyses.discard)
+            self.busy_workers += 1
+            try:
+                await asyncio.gather(
+                    *(self._analyze_queued(enqueued_at, product) for enqueued_at, product in batch)
+                )
+            except Exception as e:
+                self.logger.error(f"Fehler im Analysis-Worker {worker_id}: {e}")
+            finally:
+                self.busy_workers -= 1
+                for _ in batch:
+                    self.analysis_queue.task_done()
 
-                await asyncio.sleep(0.1)
+    async def _analyze_queued(self, enqueued_at: float, product: Dict) -> Optional[Dict]:
+        """Analysiert ein Produkt aus der Queue unter dem globalen Semaphore-Limit."""
+        async with self.semaphore:
+            started_at = time.perf_counter()
+            self.wait_times.append(started_at - enqueued_at)
+            try:
+                result = await self.analyze_price(product)
+                if result:
+                    self.update_deal_board([result])
+                self.stats['processed'] += 1
+                self.last_analysis_time = datetime.now()
+                return result
             except Exception as e:
-                self.logger.error(f"Fehler im Analysis-Worker: {e}")
-                await asyncio.sleep(1)
-import asyncio
-from typing import Dict, List, Optional
-import logging
-from datetime import datetime, timedelta
-import numpy as np
-from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor
+                self.stats['failed'] += 1
+                self.logger.error(f"Fehler bei der Analyse von SKU {product.get('sku')}: {e}")
+                return None
+            finally:
+                self.service_times.append(time.perf_counter() - started_at)
 
-@dataclass
-class RestockPrediction:
-    sku: str
-    probability: float
-    next_check: datetime
-    priority: int
-    last_check: datetime = datetime.now()
-    success_rate: float = 0.0
-    profit_margin: float = 0.0
-    sales_velocity: float = 0.0
+    async def analyze_price(self, product: Dict) -> Optional[Dict]:
+        """
+        Berechnet Gewinnmarge und ROI eines Produkts. Fehlt der Alias-Preis, wird er
+        über den AliasClient nachgeladen; eine gecachte Analyse gilt nur bei unverändertem HHV-Preis.
+        """
+        sku = product.get('sku')
+        if not sku:
+            self.stats['invalid'] += 1
+            return None
 
-class PriceAnalyzer:
-    def __init__(self, ml_model, cache_manager=None, discord_notifier=None, alias_client=None):
-        self.ml_model = ml_model
-        self.cache_manager = cache_manager
-        self.discord_notifier = discord_notifier
-        self.alias_client = alias_client
+        hhv_price = product.get('hhv_price', product.get('price'))
+        cached = await self._get_cached_analysis(sku)
+        if cached is not None and cached.get('hhv_price') == hhv_price:
+            return cached
 
-        self.logger = logging.getLogger("PriceAnalyzer")
-        self.prediction_ttl = timedelta(minutes=30)
-        self.min_profit_margin = 15.0  # Mindest-Gewinnmarge in Prozent
-        self.analyzed_products = 0
-        self.profitable_products = 0
+        analysis = {**product, 'hhv_price': hhv_price}
+        if not analysis.get('alias_price') and self.alias_client:
+            market_data = await self.alias_client.get_market_data(sku)
+            if market_data:
+                analysis['alias_price'] = market_data.get('lowest_ask')
 
-        # Konfiguration für parallele Verarbeitung und Caching
-        self.chunk_size = 50
-        self.thread_pool = ThreadPoolExecutor(max_workers=20)
-        self.semaphore = asyncio.Semaphore(100)
-        self.cache_ttl = 300  # Cache-Zeit in Sekunden
-        self.price_cache = {}
-        self.analysis_queue = asyncio.Queue()
-        self.retry_delay = 1
-        self.max_retries = 3
+        analysis['profit_margin'] = self._calculate_margin(analysis)
+        analysis['roi'] = self._calculate_roi(analysis)
+        analysis['net_profit'] = self._calculate_net_profit(analysis)
+        analysis['analyzed_at'] = datetime.now().isoformat()
+        self.analyzed_products += 1
+        if analysis['profit_margin'] >= self.min_profit_margin:
+            self.profitable_products += 1
 
-        # Aktive Analysen und Zeitstempel der letzten Analyse
-        self.active_analyses = set()
-        self.last_analysis_time = None
+        await self._cache_analysis(sku, analysis)
+        return analysis
 
-    async def start_analysis_worker(self):
-        """Startet einen Hintergrund-Worker für kontinuierliche Analyse."""
-        while True:
-            try:
-                if not self.analysis_queue.empty():
-                    product = await self.analysis_queue.get()
-                    if not isinstance(product, dict):
-                        self.logger.error(f"Ungültiges Produktformat in der Warteschlange: {product}")
-                        continue
+    async def analyze_batch(self, products: List[Dict]) -> List[Dict]:
+        """Analysiert mehrere Produkte nebenläufig unter dem Semaphore-Limit."""
+        async def analyze(product: Dict) -> Optional[Dict]:
+            async with self.semaphore:
+                return await self.analyze_price(product)
 
-                    analysis_task = asyncio.create_task(self.analyze_price(product))
-                    self.active_analyses.add(analysis_task)
-                    analysis_task.add_done_callback(self.active_analyses.discard)
+        results = await asyncio.gather(*(analyze(product) for product in products), return_exceptions=True)
+        for product, result in zip(products, results):
+            if isinstance(result, Exception):
+                self.stats['failed'] += 1
+                self.logger.error(f"Fehler bei der Analyse von SKU {product.get('sku')}: {result}")
+        return [result for result in results if isinstance(result, dict)]
 
-                await asyncio.sleep(0.1)
+    def update_deal_board(self, results: List[Dict]) -> None:
+        """Aktualisiert das Deal-Board inkrementell mit neuen Analyseergebnissen."""
+        if not self.deal_board:
+            return
+        for result in results:
+            try:
+                self.deal_board.update_from_analysis(result, self.min_profit_margin)
             except Exception as e:
-                self.logger.error(f"Fehler im Analysis-Worker: {e}")
-                await asyncio.sleep(1)
+                self.logger.error(f"Fehler beim Aktualisieren des Deal-Boards: {e}")
+
+    async def get_stats(self) -> Dict:
+        """Liefert Queue-Tiefe sowie Warte- und Bearbeitungszeiten des Worker-Pools."""
+        wait_avg, wait_p95 = self._summarize_times(self.wait_times)
+        service_avg, service_p95 = self._summarize_times(self.service_times)
+        return {
+            **self.stats,
+            'queue_size': self.analysis_queue.qsize(),
+            'queue_capacity': self.analysis_queue.maxsize,
+            'workers': len(self.worker_tasks),
+            'busy_workers': self.busy_workers,
+            'avg_wait_ms': wait_avg,
+            'p95_wait_ms': wait_p95,
+            'avg_service_ms': service_avg,
+            'p95_service_ms': service_p95,
+            'l1_cache': self.price_cache.get_stats()
+        }
+
+    @staticmethod
+    def _summarize_times(samples: deque) -> Tuple[float, float]:
+        """Berechnet Mittelwert und 95. Perzentil einer Zeitreihe in Millisekunden."""
+        if not samples:
+            return 0.0, 0.0
+        values = np.fromiter(samples, dtype=float) * 1000
+        return float(values.mean()), float(np.percentile(values, 95))
+
+    async def start_cache_invalidation_listener(self):
+        """Entfernt L1-Einträge, die von anderen Bot-Instanzen invalidiert wurden."""
+        if self.cache_manager:
+            await self.cache_manager.listen_invalidations(self.price_cache.invalidate)
+
     async def _get_cached_analysis(self, sku: str) -> Optional[Dict]:
-        """Holt die Analyse aus dem Cache, falls verfügbar."""
+        """Holt die Analyse aus dem L1-Cache oder, falls nicht vorhanden, aus Redis."""
         try:
+            cached_data = self.price_cache.get(sku)
+            if cached_data is not None:
+                return cached_data
+
             if self.cache_manager:
-                cached_data = await self.cache_manager.get(sku)
+                cached_data, remaining = await self.cache_manager.get_with_ttl(sku)
                 if cached_data:
+                    # Nur für die Restlaufzeit in L1 übernehmen, sonst überlebt der Eintrag Redis
+                    if remaining > 0:
+                        self.price_cache.set(sku, cached_data, ttl=min(remaining, self.cache_ttl))
                     return cached_data
             return None
         except Exception as e:
@@ -139,10 +233,12 @@ class PriceAnalyzer:
             return None
 
     async def _cache_analysis(self, sku: str, analysis: Dict) -> None:
-        """Speichert die Analyse im Cache."""
+        """Speichert die Analyse in L1 und Redis und invalidiert andere Instanzen."""
         try:
+            self.price_cache.set(sku, analysis)
             if self.cache_manager:
                 await self.cache_manager.set(sku, analysis, ttl=self.cache_ttl)
+                await self.cache_manager.publish_invalidation(sku)
                 self.logger.info(f"Analyse für SKU {sku} im Cache gespeichert.")
         except Exception as e:
             self.logger.error(f"Fehler beim Speichern der Analyse im Cache für SKU {sku}: {e}")
@@ -172,6 +268,18 @@ class PriceAnalyzer:
             self.logger.error(f"Fehler bei der Berechnung der Gewinnmarge: {e}")
             return 0.0
 
+    def _calculate_net_profit(self, product: Dict) -> float:
+        """Berechnet den Gewinn in Euro (Alias- minus HHV-Preis)."""
+        try:
+            alias_price = float(product.get('alias_price', 0))
+            hhv_price = float(product.get('hhv_price', 0))
+            if alias_price > 0 and hhv_price > 0:
+                return alias_price - hhv_price
+            return 0.0
+        except Exception as e:
+            self.logger.error(f"Fehler bei der Berechnung des Gewinns: {e}")
+            return 0.0
+
     def _calculate_roi(self, product: Dict) -> float:
         """Berechnet den Return on Investment (ROI)."""
         try:
@@ -187,10 +295,11 @@ class PriceAnalyzer:
     async def cleanup(self):
         """Räumt Ressourcen auf."""
         try:
-            # Beende aktive Analysen
-            for task in self.active_analyses:
+            # Beende Worker-Pool und aktive Analysen
+            pending = self.worker_tasks | self.active_analyses
+            for task in pending:
                 task.cancel()
-            await asyncio.gather(*self.active_analyses, return_exceptions=True)
+            await asyncio.gather(*pending, return_exceptions=True)
 
             # Schließe den Thread-Pool
             self.thread_pool.shutdown(wait=True)
@@ -1,36 +1,69 @@
 import asyncio
-from typing import Dict, List, Optional
+import json
+import time
+from typing import Dict, List, Optional, Set, Tuple
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import numpy as np
-from dataclasses import dataclass
-
-@dataclass
-class RestockPrediction:
-    sku: str
-    probability: float
-    next_check: datetime
-    priority: int
-    last_check: datetime = datetime.now()
-    success_rate: float = 0.0
-    profit_margin: float = 0.0
-    sales_velocity: float = 0.0
+
+from core.restock_scheduler import RestockScheduler
+from core.poll_allocator import PollingAllocator
+from core.prediction_store import PredictionStore, PredictionView, RestockPrediction
 
 class RestockMonitor:
-    def __init__(self, ml_model, cache_manager, queue_manager=None, discord_notifier=None, alias_client=None):
+    # Eingabebreite des RestockPredictor (siehe extract_features)
+    FEATURE_COUNT = 10
+
+    def __init__(
+        self,
+        ml_model,
+        cache_manager,
+        queue_manager=None,
+        discord_notifier=None,
+        alias_client=None,
+        max_concurrent_checks: int = 20,
+        probe_budget: Optional[float] = None,
+        database=None,
+        hhv_client=None
+    ):
         self.ml_model = ml_model
         self.cache_manager = cache_manager
         self.queue_manager = queue_manager
         self.discord_notifier = discord_notifier
         self.alias_client = alias_client
+        self.database = database
+        self.hhv_client = hhv_client
         self.logger = logging.getLogger("RestockMonitor")
-        self.monitoring_queue = asyncio.PriorityQueue()
+        self.scheduler = RestockScheduler()
         self.check_interval = 300
-        self.active_monitors = set()
-        self.last_predictions = {}
+        self.min_check_interval = 30
+        self.max_check_interval = 3600
+        # Optional: globales Probe-Budget (Checks/Minute) nach erwartetem Wert verteilen
+        self.allocator = PollingAllocator(
+            probe_budget,
+            self.min_check_interval,
+            self.max_check_interval
+        ) if probe_budget else None
+        # Spaltenorientierter Speicher aller überwachten SKUs und ihrer Vorhersagen
+        self.predictions = PredictionStore()
         self.prediction_ttl = timedelta(minutes=30)
         self.analyzed_products = 0
         self.profitable_products = 0
+
+        # Nebenläufige Checks: begrenzte Anzahl gleichzeitiger Requests, max. einer pro SKU
+        self.check_semaphore = asyncio.Semaphore(max(1, max_concurrent_checks))
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        # Aufeinanderfolgende Fehlschläge je SKU für den Backoff beim Neueinplanen
+        self._check_failures: Dict[str, int] = {}
+
+        # Standard-Checker: Verfügbarkeits-Probe gegen die HHV-Detailseite
+        self.product_urls: Dict[str, str] = {}
+        self.last_availability: Dict[str, Tuple[bool, frozenset]] = {}
+
+        # Änderungen seit dem letzten Persistieren des Monitoring-Zustands
+        self._dirty_skus: Set[str] = set()
+        self._removed_skus: Set[str] = set()
+
     async def monitor_products(self, products: List[Dict]):
         """Hauptmonitoring-Loop für Restocks."""
         total_products = len(products)
@@ -41,7 +74,10 @@ class RestockMonitor:
             try:
                 for product in products:
                     analyzed_products += 1
-                    if product['sku'] not in self.active_monitors:
+                    url = product.get('url') or product.get('detail_url')
+                    if url:
+                        self.product_urls[product['sku']] = url
+                    if product['sku'] not in self.predictions:
                         prediction = await self.predict_restock(product)
                         if prediction:
                             if prediction.profit_margin > 15:  # Mindestgewinnmarge
@@ -53,10 +89,7 @@ class RestockMonitor:
                                     f"Gewinnmarge: {prediction.profit_margin:.1f}%\n"
                                     f"Restock-Wahrscheinlichkeit: {prediction.probability*100:.1f}%"
                                 )
-                            await self.monitoring_queue.put(
-                                (prediction.priority, prediction)
-                            )
-                            self.active_monitors.add(product['sku'])
+                            self._schedule(prediction)
                     
                     if analyzed_products % 10 == 0:
                         self.logger.info(
@@ -64,9 +97,12 @@ class RestockMonitor:
                             f"Profitable Produkte gefunden: {profitable_products}"
                         )
                 
-                await self.process_monitoring_queue()
+                # Bis zum nächsten Abgleich der Produktliste nur fällige Checks bearbeiten
+                refresh_at = time.monotonic() + self.check_interval
+                while time.monotonic() < refresh_at:
+                    await self.scheduler.wait_for_due(timeout=refresh_at - time.monotonic())
+                    await self.process_monitoring_queue()
                 await self._cleanup_old_monitors()
-                await asyncio.sleep(self.check_interval)
                 
             except Exception as e:
                 self.logger.error(f"Monitoring error: {e}")
@@ -74,23 +110,7 @@ class RestockMonitor:
 
     async def monitor_restocks(self) -> List[Dict]:
         try:
-            restocks = []
-            while not self.monitoring_queue.empty():
-                _, prediction = await self.monitoring_queue.get()
-                if datetime.now() >= prediction.next_check:
-                    restock_found = await self.check_restock(prediction.sku)
-                    if restock_found:
-                        restock_data = await self._prepare_restock_data(prediction)
-                        restocks.append(restock_data)
-                        await self._notify_restock(restock_data)
-                        await self.handle_restock(prediction.sku)
-                    else:
-                        new_prediction = await self.update_prediction(prediction)
-                        if new_prediction:
-                            await self.monitoring_queue.put(
-                                (new_prediction.priority, new_prediction)
-                            )
-            return restocks
+            return await self._dispatch_due_checks()
         except Exception as e:
             self.logger.error(f"Restock monitoring error: {e}")
             return []
@@ -100,7 +120,7 @@ class RestockMonitor:
             market_data = await self.alias_client.get_market_data(prediction.sku) if self.alias_client else {}
             return {
                 'sku': prediction.sku,
-                'detected_at': datetime.now(),
+                'detected_at': datetime.utcnow(),
                 'probability': prediction.probability,
                 'profit_margin': prediction.profit_margin,
                 'sales_velocity': prediction.sales_velocity,
@@ -110,7 +130,7 @@ class RestockMonitor:
             self.logger.error(f"Error preparing restock data: {e}")
             return {
                 'sku': prediction.sku,
-                'detected_at': datetime.now(),
+                'detected_at': datetime.utcnow(),
                 'probability': prediction.probability
             }
 
@@ -152,86 +172,436 @@ class RestockMonitor:
         except Exception as e:
             self.logger.error(f"Prediction expiration check error: {e}")
             return True
-    async def handle_restock(self, sku: str) -> None:
-        """Behandelt einen gefundenen Restock."""
-        try:
-            if sku in self.active_monitors:
-                self.active_monitors.remove(sku)
-                
-            if self.discord_notifier:
-                restock_data = await self._prepare_restock_data(self.last_predictions[sku])
-                await self.discord_notifier.send_restock_notification(restock_data)
-                
-            await self.cache_manager.delete(f"prediction_{sku}")
-            self.last_predictions.pop(sku, None)
-            
-        except Exception as e:
-            self.logger.error(f"Restock handling error: {e}")
+    async def check_restock(self, sku: str) -> bool:
+        """
+        Prüft per Verfügbarkeits-Probe, ob eine SKU wieder erhältlich ist.
+        Ein Restock liegt vor, wenn das Produkt oder eine einzelne Größe seit
+        dem letzten Check von ausverkauft auf verfügbar gewechselt ist; der
+        erste Check einer SKU legt nur den Ausgangszustand fest. Eine fehlgeschlagene
+        Probe löst einen Fehler aus, damit die SKU mit Backoff neu eingeplant wird.
+        """
+        url = self.product_urls.get(sku)
+        if not self.hhv_client or not url:
+            self.logger.debug(f"Kein Checker für SKU {sku} verfügbar")
+            return False
+
+        probe = await self.hhv_client.probe_availability(url)
+        if probe is None:
+            raise RuntimeError(f"Verfügbarkeits-Probe für SKU {sku} fehlgeschlagen")
+
+        available = probe['available']
+        sizes = frozenset(size for size, in_stock in probe['sizes'].items() if in_stock)
+        previous = self.last_availability.get(sku)
+        self.last_availability[sku] = (available, sizes)
+        if previous is None:
+            return False
+
+        was_available, previous_sizes = previous
+        return available and (not was_available or bool(sizes - previous_sizes))
+
+    async def handle_restock(self, sku: str) -> Optional[Dict]:
+        """
+        Benachrichtigt über einen gefundenen Restock und nimmt die SKU erst danach
+        aus der Überwachung. Fehler werden weitergereicht, die SKU bleibt eingeplant.
+        """
+        view = self.predictions.get(sku)
+        if view is None:
+            return None
+        restock_data = await self._prepare_restock_data(view.to_prediction())
+        if self.discord_notifier and not await self.discord_notifier.send_restock_notification(restock_data):
+            raise RuntimeError(f"Restock-Benachrichtigung für SKU {sku} fehlgeschlagen")
+
+        self._unschedule(sku)
+        await self.cache_manager.delete(f"prediction_{sku}")
+        return restock_data
 
     async def process_monitoring_queue(self):
         """Verarbeitet die Monitoring-Queue."""
         try:
-            temp_queue = asyncio.PriorityQueue()
-            while not self.monitoring_queue.empty():
-                priority, prediction = await self.monitoring_queue.get()
-                if datetime.now() >= prediction.next_check:
-                    restock_found = await self.check_restock(prediction.sku)
-                    if restock_found:
-                        await self.handle_restock(prediction.sku)
-                    else:
-                        new_prediction = await self.update_prediction(prediction)
-                        if new_prediction:
-                            await temp_queue.put((new_prediction.priority, new_prediction))
-                else:
-                    await temp_queue.put((priority, prediction))
-            self.monitoring_queue = temp_queue
+            await self._dispatch_due_checks()
         except Exception as e:
             self.logger.error(f"Queue processing error: {e}")
 
+    async def _dispatch_due_checks(self) -> List[Dict]:
+        """Startet alle fälligen Checks nebenläufig und bewertet die übrigen SKUs gesammelt neu."""
+        tasks = []
+        skus: List[str] = []
+        rescore: List[PredictionView] = []
+        for sku in self.scheduler.pop_due():
+            prediction = self.predictions.get(sku)
+            if prediction is None or sku in self.in_flight:
+                # Entfernt oder bereits in Arbeit; ein laufender Check plant die SKU selbst neu ein
+                continue
+            task = asyncio.create_task(
+                self._run_check(prediction, rescore),
+                name=f"restock_check_{prediction.sku}"
+            )
+            self.in_flight[prediction.sku] = task
+            task.add_done_callback(lambda done, sku=prediction.sku: self._release_in_flight(sku, done))
+            tasks.append(task)
+            skus.append(prediction.sku)
+
+        restocks = []
+        failed = []
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for sku, result in zip(skus, results):
+            if isinstance(result, BaseException):
+                # Auch CancelledError: die SKU wurde bereits aus der Planung genommen
+                self.logger.error(f"Restock check error for {sku}: {result!r}")
+                failed.append(sku)
+                continue
+            self._check_failures.pop(sku, None)
+            if result:
+                restocks.append(result)
+
+        self._reschedule_failed(failed)
+        await self._rescore_and_schedule(rescore)
+        return restocks
+
+    def _reschedule_failed(self, skus: List[str]) -> None:
+        """Plant SKUs mit fehlgeschlagenem Check mit exponentiellem Backoff erneut ein."""
+        skus = [sku for sku in skus if sku in self.predictions]
+        if not skus:
+            return
+        delays = []
+        for sku in skus:
+            failures = self._check_failures.get(sku, 0) + 1
+            self._check_failures[sku] = failures
+            delays.append(min(self.min_check_interval * 2 ** (failures - 1), self.max_check_interval))
+        retry_at = time.time() + np.array(delays, dtype=np.float64)
+        self.predictions.upsert_many(skus, next_check=retry_at)
+        self._schedule_many(skus, retry_at)
+
+    async def _rescore_and_schedule(self, predictions: List[PredictionView]) -> None:
+        """Bewertet SKUs ohne Restock in einem Batch neu und plant sie wieder ein."""
+        if not predictions:
+            return
+        if not await self.update_predictions_batch(predictions):
+            # Fallback: alte Vorhersagen nicht verlieren, nur später erneut prüfen
+            skus = [prediction.sku for prediction in predictions if prediction.sku in self.predictions]
+            retry_at = time.time() + self.check_interval
+            self.predictions.upsert_many(skus, next_check=np.full(len(skus), retry_at))
+            self._schedule_many(skus, np.full(len(skus), retry_at))
+
+    def _release_in_flight(self, sku: str, task: asyncio.Task) -> None:
+        if self.in_flight.get(sku) is task:
+            del self.in_flight[sku]
+
+    async def _run_check(
+        self,
+        prediction: PredictionView,
+        rescore: List[PredictionView]
+    ) -> Optional[Dict]:
+        """Prüft eine SKU unter dem In-Flight-Limit; Restocks werden sofort verarbeitet."""
+        async with self.check_semaphore:
+            previous = self.last_availability.get(prediction.sku)
+            restock_found = await self.check_restock(prediction.sku)
+
+        if restock_found:
+            try:
+                return await self.handle_restock(prediction.sku)
+            except Exception:
+                # Alten Zustand zurücksetzen, damit der nächste Check den Übergang erneut erkennt
+                self.last_availability[prediction.sku] = previous
+                raise
+
+        rescore.append(prediction)
+        return None
+
+    async def cleanup(self) -> None:
+        """Bricht laufende Checks beim Herunterfahren ab."""
+        tasks = list(self.in_flight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.in_flight.clear()
+        await self.persist_state()
+        self.logger.info("RestockMonitor gestoppt")
+
     async def _cleanup_old_monitors(self):
         """Bereinigt alte Monitore."""
-        current_time = datetime.now()
-        to_remove = set()
-        for sku in self.active_monitors:
-            last_prediction = self.last_predictions.get(sku)
-            if last_prediction and (current_time - last_prediction.last_check) > self.prediction_ttl:
-                to_remove.add(sku)
-        self.active_monitors -= to_remove
-        for sku in to_remove:
-            self.last_predictions.pop(sku, None)
+        expired = self.predictions.expired_rows(self.prediction_ttl.total_seconds(), time.time())
+        for sku in self.predictions.remove_rows(expired):
+            self._unschedule(sku)
             await self.cache_manager.delete(f"prediction_{sku}")
-    async def update_prediction(self, prediction: RestockPrediction) -> Optional[RestockPrediction]:
-        """Aktualisiert eine bestehende Vorhersage."""
-        try:
-            features = self.extract_features({
-                'sku': prediction.sku,
-                'profit_margin': prediction.profit_margin,
-                'sales_velocity': prediction.sales_velocity
-            })
-            
-            new_probability = await self.get_restock_probability(features)
-            new_priority = self.calculate_priority(
-                new_probability,
+
+    def _schedule(self, prediction: RestockPrediction, persist: bool = True) -> None:
+        """Übernimmt eine Vorhersage in den Store und plant ihren nächsten Check ein (O(log n))."""
+        self.predictions.upsert_prediction(prediction)
+        if persist:
+            self._dirty_skus.add(prediction.sku)
+            self._removed_skus.discard(prediction.sku)
+        if self.allocator:
+            self.allocator.update(
+                prediction.sku,
+                prediction.probability,
                 prediction.profit_margin,
                 prediction.sales_velocity
             )
-            
-            next_check = self.calculate_next_check(new_probability, new_priority)
-            new_prediction = RestockPrediction(
-                sku=prediction.sku,
-                probability=new_probability,
-                next_check=next_check,
-                priority=new_priority,
-                profit_margin=prediction.profit_margin,
-                sales_velocity=prediction.sales_velocity
+        self.scheduler.schedule(prediction.sku, prediction.next_check, prediction.sku)
+
+    def _schedule_many(self, skus: List[str], next_checks: np.ndarray, persist: bool = True) -> None:
+        """Plant bereits im Store stehende SKUs zu den angegebenen Zeitpunkten (Epoch) ein."""
+        for sku, next_check in zip(skus, next_checks.tolist()):
+            self.scheduler.schedule(sku, next_check, sku)
+        if persist:
+            self._dirty_skus.update(skus)
+            self._removed_skus.difference_update(skus)
+
+    def _unschedule(self, sku: str) -> None:
+        """Entfernt eine SKU aus Store, Planung, Budget und persistiertem Zustand."""
+        self.predictions.remove(sku)
+        self.scheduler.cancel(sku)
+        self.product_urls.pop(sku, None)
+        self.last_availability.pop(sku, None)
+        self._check_failures.pop(sku, None)
+        if self.allocator:
+            self.allocator.remove(sku)
+        self._dirty_skus.discard(sku)
+        self._removed_skus.add(sku)
+
+    async def persist_state(self) -> None:
+        """Schreibt geänderte Vorhersagen und entfernte SKUs gebündelt in die Datenbank."""
+        if not self.database:
+            return
+        dirty, self._dirty_skus = self._dirty_skus, set()
+        removed, self._removed_skus = self._removed_skus, set()
+        states = [
+            {
+                'sku': prediction.sku,
+                'probability': prediction.probability,
+                'next_check': datetime.utcfromtimestamp(prediction.next_check_ts),
+                'priority': prediction.priority,
+                'last_check': datetime.utcfromtimestamp(prediction.last_check_ts),
+                'success_rate': prediction.success_rate,
+                'profit_margin': prediction.profit_margin,
+                'sales_velocity': prediction.sales_velocity,
+                'url': self.product_urls.get(prediction.sku),
+                **self._availability_state(prediction.sku)
+            }
+            for prediction in (self.predictions.get(sku) for sku in dirty)
+            if prediction
+        ]
+        if not await self.database.save_monitor_state(states):
+            self._dirty_skus |= dirty
+        if not await self.database.delete_monitor_state(list(removed)):
+            self._removed_skus |= removed
+
+    async def restore_state(self) -> int:
+        """Lädt den gespeicherten Zustand beim Start und setzt das Monitoring dort fort."""
+        if not self.database:
+            return 0
+        rows = await self.database.load_monitor_state()
+        if rows:
+            now = time.time()
+
+            def column(name, default=0.0):
+                return np.array([row[name] if row[name] is not None else default for row in rows])
+
+            def epochs(name):
+                # Gespeicherte Zeitpunkte sind naive UTC-Werte
+                return np.array([
+                    row[name].replace(tzinfo=timezone.utc).timestamp() if row[name] else now for row in rows
+                ])
+
+            skus = [row['sku'] for row in rows]
+            next_checks = epochs('next_check')
+            # Die Ausfallzeit seit dem letzten Persistieren zählt nicht als Alter des letzten Checks
+            downtime = np.maximum(now - epochs('updated_at'), 0.0)
+            self.predictions.upsert_many(
+                skus,
+                probability=column('probability'),
+                next_check=next_checks,
+                last_check=epochs('last_check') + downtime,
+                priority=column('priority', 0),
+                success_rate=column('success_rate'),
+                profit_margin=column('profit_margin'),
+                sales_velocity=column('sales_velocity')
+            )
+            if self.allocator:
+                self.allocator.update_many(
+                    skus,
+                    column('probability'),
+                    column('profit_margin'),
+                    column('sales_velocity')
+                )
+            self._schedule_many(skus, next_checks, persist=False)
+            for row in rows:
+                if row.get('url'):
+                    self.product_urls[row['sku']] = row['url']
+                if row.get('available') is not None:
+                    sizes = json.loads(row['available_sizes']) if row.get('available_sizes') else []
+                    self.last_availability[row['sku']] = (bool(row['available']), frozenset(sizes))
+        self.logger.info(f"{len(rows)} Monitoring-Einträge aus der Datenbank wiederhergestellt")
+        return len(rows)
+
+    def _availability_state(self, sku: str) -> Dict:
+        """Zuletzt beobachtete Verfügbarkeit einer SKU als Spalten des gespeicherten Zustands."""
+        state = self.last_availability.get(sku)
+        if state is None:
+            return {'available': None, 'available_sizes': None}
+        available, sizes = state
+        return {'available': available, 'available_sizes': json.dumps(sorted(sizes))}
+
+    async def run_persistence_loop(self, interval: int = 30) -> None:
+        """Persistiert den Zustand periodisch, bis der Task abgebrochen wird."""
+        while True:
+            try:
+                await asyncio.sleep(interval)
+                await self.persist_state()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"State persistence error: {e}")
+
+    async def update_prediction(self, prediction) -> Optional[PredictionView]:
+        """Aktualisiert eine bestehende Vorhersage."""
+        updated = await self.update_predictions_batch([prediction])
+        return updated[0] if updated else None
+
+    async def update_predictions_batch(self, predictions: List) -> List[PredictionView]:
+        """
+        Bewertet mehrere Vorhersagen (RestockPrediction oder PredictionView) mit einem
+        Forward-Pass neu, schreibt sie spaltenweise in den Store und cached sie per Pipeline.
+        """
+        if not predictions:
+            return []
+        try:
+            # Werte einmal lesen; Views entfernter SKUs werfen KeyError und fallen nur einzeln heraus
+            rows = []
+            for prediction in predictions:
+                try:
+                    rows.append((
+                        prediction.sku,
+                        prediction.probability,
+                        prediction.profit_margin,
+                        prediction.sales_velocity,
+                        prediction.success_rate,
+                        prediction.last_check.timestamp()
+                    ))
+                except KeyError:
+                    self.logger.debug(f"Vorhersage für SKU {prediction.sku} entfernt, Neubewertung übersprungen")
+            if not rows:
+                return []
+
+            skus = [row[0] for row in rows]
+            columns = dict(zip(
+                ('probability', 'profit_margin', 'sales_velocity', 'success_rate', 'last_check'),
+                (np.array(values, dtype=np.float64) for values in zip(*(row[1:] for row in rows)))
+            ))
+            margins = columns['profit_margin']
+            velocities = columns['sales_velocity']
+            features = self.extract_features(skus, columns)
+
+            probabilities = await self.get_restock_probabilities(features)
+            priorities = self.calculate_priorities(probabilities, margins, velocities)
+            if self.allocator:
+                next_checks = time.time() + self.allocator.update_many(
+                    skus,
+                    probabilities,
+                    margins,
+                    velocities
+                )
+            else:
+                next_checks = self.calculate_next_checks(probabilities, priorities)
+
+            self.predictions.upsert_many(
+                skus,
+                probability=probabilities,
+                next_check=next_checks,
+                last_check=np.full(len(skus), time.time()),
+                priority=priorities,
+                profit_margin=margins,
+                sales_velocity=velocities
             )
-            
-            await self.cache_prediction(new_prediction)
-            return new_prediction
-            
+            self._schedule_many(skus, next_checks)
+
+            new_predictions = [self.predictions.get(sku) for sku in skus]
+            await self.cache_predictions(new_predictions)
+            return new_predictions
+
         except Exception as e:
             self.logger.error(f"Prediction update error: {e}")
-            return None
+            return []
+
+    def extract_features(self, skus: List[str], columns: Dict[str, np.ndarray], now: Optional[float] = None) -> np.ndarray:
+        """
+        Feature-Matrix (n x FEATURE_COUNT) für den RestockPredictor: Marge, Verkaufstempo,
+        bisherige Wahrscheinlichkeit und Trefferquote, Alter des letzten Checks, Tageszeit,
+        Wochentag sowie die zuletzt beobachtete Verfügbarkeit.
+        """
+        now = time.time() if now is None else now
+        moment = datetime.fromtimestamp(now)
+        hour = 2 * np.pi * (moment.hour + moment.minute / 60) / 24
+        availability = [self.last_availability.get(sku, (False, frozenset())) for sku in skus]
+
+        features = np.empty((len(skus), self.FEATURE_COUNT), dtype=np.float32)
+        features[:, 0] = columns['profit_margin'] / 100
+        features[:, 1] = np.log1p(np.maximum(columns['sales_velocity'], 0))
+        features[:, 2] = columns['probability']
+        features[:, 3] = columns['success_rate']
+        features[:, 4] = np.log1p(np.maximum(now - columns['last_check'], 0) / 3600)
+        features[:, 5] = np.sin(hour)
+        features[:, 6] = np.cos(hour)
+        features[:, 7] = moment.weekday() / 6
+        features[:, 8] = [float(available) for available, _ in availability]
+        features[:, 9] = np.log1p([len(sizes) for _, sizes in availability])
+        return features
+
+    async def get_restock_probabilities(self, features: np.ndarray) -> np.ndarray:
+        """Restock-Wahrscheinlichkeiten für eine Feature-Matrix (ein Forward-Pass)."""
+        return np.asarray(await self.ml_model.predict_restock_batch(features), dtype=np.float64)
+
+    def calculate_priorities(
+        self,
+        probabilities: np.ndarray,
+        margins: np.ndarray,
+        velocities: np.ndarray
+    ) -> np.ndarray:
+        """Priorität 1 (dringend) bis 10 aus Wahrscheinlichkeit, Marge und Verkaufsgeschwindigkeit."""
+        expected_value = (
+            np.clip(probabilities, 0.0, 1.0)
+            * np.clip(margins, 0.0, 100.0) / 100.0
+            * np.log1p(np.clip(velocities, 0.0, None))
+        )
+        score = np.clip(expected_value, 0.0, 1.0)
+        return (1 + np.floor((1.0 - score) * 9)).astype(np.int64)
+
+    def calculate_next_checks(self, probabilities: np.ndarray, priorities: np.ndarray) -> np.ndarray:
+        """Zeitpunkte (Epoch) der nächsten Checks: hohe Priorität und Wahrscheinlichkeit prüfen früher."""
+        intervals = self.check_interval * (priorities / 5.0) * (1.5 - np.clip(probabilities, 0.0, 1.0))
+        return time.time() + np.clip(intervals, self.min_check_interval, self.max_check_interval)
+
+    def calculate_priority(self, probability: float, profit_margin: float, sales_velocity: float) -> int:
+        return int(self.calculate_priorities(
+            np.array([probability]), np.array([profit_margin]), np.array([sales_velocity])
+        )[0])
+
+    def calculate_next_check(self, probability: float, priority: int) -> datetime:
+        return datetime.fromtimestamp(
+            self.calculate_next_checks(np.array([probability]), np.array([priority]))[0]
+        )
+
+    async def cache_predictions(self, predictions: List[PredictionView]) -> None:
+        """Cached mehrere Vorhersagen mit einem einzigen Redis-Pipeline-Write."""
+        try:
+            if self.cache_manager and predictions:
+                await self.cache_manager.set_many(
+                    {
+                        f"prediction_{prediction.sku}": {
+                            'sku': prediction.sku,
+                            'probability': prediction.probability,
+                            'next_check': prediction.next_check.isoformat(),
+                            'priority': prediction.priority,
+                            'profit_margin': prediction.profit_margin,
+                            'sales_velocity': prediction.sales_velocity
+                        }
+                        for prediction in predictions
+                    },
+                    ttl=int(self.prediction_ttl.total_seconds())
+                )
+        except Exception as e:
+            self.logger.error(f"Cache storage error: {e}")
 
     async def get_cached_prediction(self, sku: str) -> Optional[RestockPrediction]:
         """Holt gecachte Vorhersagen."""
@@ -0,0 +1,99 @@
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+class RestockScheduler:
+    """
+    Min-Heap-Scheduler für Restock-Checks, sortiert nach next_check.
+
+    Jede SKU ist höchstens einmal aktiv eingeplant. Umplanen und Entfernen
+    kosten O(log n); ersetzte Heap-Einträge werden beim Abrufen lazy verworfen,
+    sodass pro Durchlauf nur fällige Einträge angefasst werden.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str]] = []
+        self._entries: Dict[str, Tuple[float, int, Any]] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, sku: str) -> bool:
+        return sku in self._entries
+
+    def get(self, sku: str) -> Optional[Any]:
+        entry = self._entries.get(sku)
+        return entry[2] if entry else None
+
+    def schedule(self, sku: str, due: Union[datetime, float], item: Any) -> None:
+        """Plant eine SKU ein oder um; ein älterer Termin derselben SKU verfällt."""
+        due_ts = due.timestamp() if isinstance(due, datetime) else float(due)
+        seq = next(self._counter)
+        self._entries[sku] = (due_ts, seq, item)
+        heapq.heappush(self._heap, (due_ts, seq, sku))
+        if self._heap[0][1] == seq:
+            # Neuer frühester Termin: wartende Schleife muss neu schlafen
+            self._wakeup.set()
+        self._maybe_compact()
+
+    def cancel(self, sku: str) -> bool:
+        """Entfernt eine SKU aus der Planung."""
+        return self._entries.pop(sku, None) is not None
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[Any]:
+        """Entnimmt alle (bzw. höchstens limit) fälligen Einträge."""
+        now = now if now is not None else time.time()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            if limit is not None and len(due) >= limit:
+                break
+            _, seq, sku = heapq.heappop(self._heap)
+            entry = self._entries.get(sku)
+            if entry and entry[1] == seq:
+                del self._entries[sku]
+                due.append(entry[2])
+        return due
+
+    def next_deadline(self) -> Optional[float]:
+        """Zeitstempel (Epoch) des nächsten fälligen Checks."""
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    async def wait_for_due(self, timeout: Optional[float] = None) -> None:
+        """Schläft genau bis zum nächsten Termin, einer früheren Einplanung oder dem Timeout."""
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            now = time.time()
+            next_due = self.next_deadline()
+            if next_due is not None and next_due <= now:
+                return
+            if deadline is not None and now >= deadline:
+                return
+
+            candidates = [t for t in (next_due, deadline) if t is not None]
+            delay = min(candidates) - now if candidates else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _prune(self) -> None:
+        while self._heap:
+            _, seq, sku = self._heap[0]
+            entry = self._entries.get(sku)
+            if entry and entry[1] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def _maybe_compact(self) -> None:
+        """Baut den Heap neu auf, wenn er überwiegend aus verfallenen Einträgen besteht."""
+        if len(self._heap) > 2 * len(self._entries) + 1024:
+            self._heap = [(due_ts, seq, sku) for sku, (due_ts, seq, _) in self._entries.items()]
+            heapq.heapify(self._heap)
@@ -8,6 +8,7 @@ from config.scanner_config import ScannerConfig
 from utils.proxy_manager import ProxyManager
 from utils.queue_manager import QueueManager
 from api.hhv_client import HHVClient
+from core.catalog_diff import CatalogDiff
 
 class Scanner:
     def __init__(
@@ -15,12 +16,17 @@ class Scanner:
         config: ScannerConfig,
         proxy_manager: ProxyManager,
         queue_manager: QueueManager,
-        hhv_client: HHVClient
+        hhv_client: HHVClient,
+        database=None,
+        frontier=None
     ):
         self.config = config
         self.proxy_manager = proxy_manager
         self.queue_manager = queue_manager
         self.hhv_client = hhv_client
+        self.database = database
+        self.frontier = frontier
+        self.catalog_diff = CatalogDiff(max_shrink=config.CATALOG_MAX_SHRINK)
         self.logger = logging.getLogger("Scanner")
         self.active_tasks: Set[asyncio.Task] = set()
         self.running = False
@@ -34,7 +40,8 @@ class Scanner:
             'scan_duration': None,
             'average_scan_time': 0,
             'total_products_found': 0,
-            'total_products_processed': 0
+            'total_products_processed': 0,
+            'catalog_events': 0
         }
         self.product_urls = self._load_product_urls()
         self.scan_history = []
@@ -88,12 +95,20 @@ class Scanner:
             self.logger.info("Starte Produkt-Scan")
 
             # Produkte von HHVClient abrufen, wenn keine übergeben wurden
-            if products is None:
-                products = await self.hhv_client.get_products()
+            full_crawl = products is None
+            catalog_complete = False
+            if full_crawl:
+                products, catalog_complete = await self.hhv_client.crawl_catalog()
 
             if not isinstance(products, list):
                 raise ValueError("Die zurückgegebenen Produkte sind keine Liste.")
 
+            # Nur vollständige Crawls sind als Snapshot vergleichbar
+            if catalog_complete:
+                await self.detect_catalog_changes(products)
+            elif full_crawl:
+                self.logger.warning("Katalog-Crawl unvollständig, Katalog-Diff übersprungen")
+
             self.stats['total_products_found'] += len(products)
             self.logger.info(f"Gefundene Produkte: {len(products)}")
 
@@ -120,6 +135,8 @@ class Scanner:
 
             if not products_to_scan:
                 self.logger.warning("Keine gültigen Produkte zum Scannen gefunden.")
+                if self.frontier:
+                    await self.frontier.finish_run()
                 return []
 
             # Batch-Verarbeitung
@@ -143,6 +160,13 @@ class Scanner:
 
                 await asyncio.sleep(1)
 
+            if self.frontier:
+                if self.running:
+                    # Vollständiger Durchlauf: Checkpoint wird nur für abgebrochene Crawls gebraucht
+                    await self.frontier.finish_run()
+                else:
+                    await self.frontier.flush()
+
             # Scan-Statistiken aktualisieren
             scan_duration = (datetime.now() - start_time).total_seconds()
             self._update_scan_stats(scan_duration, len(all_results))
@@ -155,16 +179,50 @@ class Scanner:
             self.stats['failed_scans'] += 1
             return []
 
+    async def detect_catalog_changes(self, products: List[Dict]) -> List[Dict]:
+        """Vergleicht einen vollständigen Crawl mit dem vorherigen und speichert die Events."""
+        try:
+            events = self.catalog_diff.diff(products)
+            if events:
+                self.stats['catalog_events'] += len(events)
+                if self.database:
+                    await self.database.save_restock_events(events)
+            return events
+        except Exception as e:
+            self.logger.error(f"Fehler beim Katalog-Diff: {e}")
+            return []
+
     async def _process_batch(self, batch: List[Dict]) -> List[Dict]:
         """Verarbeitet einen Batch von Produkten."""
         try:
-            tasks = [self._process_product(product) for product in batch]
+            processed_products = []
+            if self.frontier:
+                # Frisch gescannte URLs aus dem letzten Checkpoint übernehmen
+                to_scan = []
+                for product in batch:
+                    cached = (
+                        self.frontier.result(product['url'], 'product')
+                        if self.frontier.is_fresh(product['url'], 'product') else None
+                    )
+                    if cached:
+                        processed_products.append(cached)
+                    else:
+                        to_scan.append(product)
+            else:
+                to_scan = batch
+
+            tasks = [self._process_product(product) for product in to_scan]
             results = await asyncio.gather(*tasks, return_exceptions=True)
 
-            processed_products = []
-            for result in results:
+            for product, result in zip(to_scan, results):
                 if isinstance(result, dict):
                     processed_products.append(result)
+                    if self.frontier:
+                        self.frontier.complete(product['url'], result, kind='product')
+                elif self.frontier:
+                    self.frontier.fail(product['url'], kind='product')
+            if self.frontier:
+                await self.frontier.maybe_flush()
 
             successful = len(processed_products)
             failed = len(batch) - successful
@@ -62,20 +62,29 @@ class BotTasks:
                     product_data = item['data']
                     alias_data = await self.bot.alias_client.get_market_data(product_data['sku'])
                     if alias_data:
-                        profit_calc = await self.bot.price_analyzer.analyze_product({
+                        analysis = await self.bot.price_analyzer.analyze_price({
                             **product_data,
                             'alias_price': alias_data['lowest_ask']
                         })
-                        if profit_calc and profit_calc.net_profit >= self.bot.config.ARBITRAGE.MIN_PROFIT:
-                            await self.bot.db.update_product(
+                        # profit_margin ist in Prozent, net_profit in Euro (MIN_PROFIT ebenfalls in Euro)
+                        await self.bot.db_writer.save_price(product_data['sku'], {
+                            'hhv_price': product_data.get('hhv_price'),
+                            'alias_price': alias_data['lowest_ask'],
+                            'profit_margin': analysis['profit_margin'] if analysis else None,
+                            'source': 'alias'
+                        })
+                        if analysis and analysis['net_profit'] >= self.bot.config.ARBITRAGE.MIN_PROFIT:
+                            await self.bot.db_writer.update_product(
                                 product_data['sku'],
                                 alias_price=alias_data['lowest_ask'],
-                                profit_margin=profit_calc.net_profit,
+                                profit_margin=analysis['profit_margin'],
+                                net_profit=analysis['net_profit'],
+                                roi=analysis['roi'],
                                 monthly_sales=len(alias_data['sales_history'])
                             )
                             await self.bot.discord.send_deal_alert(
                                 product_data,
-                                profit_calc.__dict__,
+                                analysis,
                                 alias_data
                             )
                             self.bot.stats['deals_found'] += 1
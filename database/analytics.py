@@ -0,0 +1,279 @@
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from sqlalchemy.engine import make_url
+
+try:
+    import duckdb
+except ImportError:  # Analytik ist optional
+    duckdb = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # Parquet-Exporte liest DuckDB auch ohne pyarrow
+    pa = None
+    ds = None
+
+
+class AnalyticsEngine:
+    """
+    Eingebettete DuckDB-Instanz für analytische Abfragen neben dem SQLite-Store.
+
+    Die SQLite-Datei wird schreibgeschützt angehängt, die spaltenbasierten Exporte
+    (siehe HistoryExporter) werden als Tabellen eingebunden. Darüber liegen
+    einheitliche Views (products, deals, price_points, monitor_state), sodass
+    Abfragen nicht wissen müssen, woher die Daten stammen. Preispunkte kommen aus
+    den Exporten und werden um die noch nicht exportierten Roh-Partitionen aus
+    SQLite ergänzt. Abfragen laufen in einem Thread und blockieren den Event-Loop
+    nicht.
+    """
+
+    PRODUCT_COLUMNS = {
+        'sku': 'VARCHAR', 'name': 'VARCHAR', 'brand': 'VARCHAR',
+        'hhv_price': 'DOUBLE', 'alias_price': 'DOUBLE', 'profit_margin': 'DOUBLE', 'roi': 'DOUBLE',
+        'monthly_sales': 'BIGINT', 'restock_frequency': 'BIGINT', 'restock_probability': 'DOUBLE',
+        'last_restock': 'TIMESTAMP', 'status': 'VARCHAR', 'updated_at': 'TIMESTAMP'
+    }
+    DEAL_COLUMNS = {
+        'id': 'BIGINT', 'sku': 'VARCHAR', 'hhv_price': 'DOUBLE', 'alias_price': 'DOUBLE',
+        'profit_margin': 'DOUBLE', 'roi': 'DOUBLE', 'found_at': 'TIMESTAMP', 'status': 'VARCHAR'
+    }
+    PRICE_COLUMNS = {
+        'sku': 'VARCHAR', 'ts': 'TIMESTAMP', 'hhv_price': 'DOUBLE', 'alias_price': 'DOUBLE',
+        'profit_margin': 'DOUBLE', 'source': 'VARCHAR'
+    }
+    STATE_COLUMNS = {
+        'sku': 'VARCHAR', 'probability': 'DOUBLE', 'next_check': 'TIMESTAMP', 'priority': 'BIGINT',
+        'last_check': 'TIMESTAMP', 'success_rate': 'DOUBLE', 'profit_margin': 'DOUBLE', 'sales_velocity': 'DOUBLE'
+    }
+
+    def __init__(
+        self,
+        database_path: Optional[str] = "arbitrage.db",
+        export_dir: str = "data/exports",
+        export_format: str = "ipc",
+        threads: int = 0,
+        memory_limit: str = "",
+        refresh_interval: float = 300.0
+    ):
+        self.database_path = database_path
+        self.export_dir = Path(export_dir)
+        self.export_format = export_format
+        self.threads = threads
+        self.memory_limit = memory_limit
+        self.refresh_interval = refresh_interval
+        self.logger = logging.getLogger("AnalyticsEngine")
+        self.connection = None
+        self.store_attached = False
+        self.sources: Dict[str, str] = {}
+        self._missing_sources: List[str] = []
+        self._lock = asyncio.Lock()
+        self._refreshed_at = 0.0
+
+    @staticmethod
+    def sqlite_path(database_url: str) -> Optional[str]:
+        """Dateipfad einer SQLite-URL, None für In-Memory- oder andere Datenbanken."""
+        url = make_url(database_url)
+        if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+            return None
+        return url.database
+
+    async def open(self) -> bool:
+        """Startet DuckDB, hängt den SQLite-Store an und legt die Views an."""
+        if duckdb is None:
+            self.logger.warning("duckdb nicht installiert, Analytik deaktiviert")
+            return False
+        async with self._lock:
+            if self.connection is None:
+                await asyncio.to_thread(self._open)
+        return True
+
+    def _open(self) -> None:
+        self.connection = duckdb.connect(':memory:')
+        if self.threads:
+            self.connection.execute(f"SET threads = {int(self.threads)}")
+        if self.memory_limit:
+            self.connection.execute(f"SET memory_limit = '{self.memory_limit}'")
+        if self.database_path and Path(self.database_path).exists():
+            try:
+                path = str(Path(self.database_path).resolve()).replace("'", "''")
+                self.connection.execute(f"ATTACH '{path}' AS store (TYPE sqlite, READ_ONLY)")
+                self.store_attached = True
+            except Exception as e:
+                self.logger.warning(f"SQLite-Store konnte nicht angehängt werden, nur Exporte verfügbar: {e}")
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Baut die Views neu auf, z.B. nach neuen Export-Dateien oder Partitionen."""
+        exports = {name: self._register_export(name) for name in ('prices', 'products', 'deals')}
+        store_tables = self._store_tables()
+
+        if 'products' in store_tables:
+            products = self._select(self.PRODUCT_COLUMNS, "store.products")
+            self.sources['products'] = 'sqlite'
+        elif exports['products']:
+            # Der Export ist ein Änderungsprotokoll: letzter Stand je SKU
+            products = self._select(
+                self.PRODUCT_COLUMNS, exports['products'],
+                "QUALIFY row_number() OVER (PARTITION BY sku ORDER BY updated_at DESC) = 1"
+            )
+            self.sources['products'] = 'export'
+        else:
+            products = self._empty(self.PRODUCT_COLUMNS)
+            self.sources['products'] = 'none'
+
+        if 'deals' in store_tables:
+            deals = self._select(
+                self.DEAL_COLUMNS,
+                "store.deals AS d LEFT JOIN store.products AS p ON p.id = d.product_id",
+                expressions={**{name: f"d.{name}" for name in self.DEAL_COLUMNS}, 'sku': 'p.sku'}
+            )
+            self.sources['deals'] = 'sqlite'
+        elif exports['deals']:
+            deals = self._select(self.DEAL_COLUMNS, exports['deals'])
+            self.sources['deals'] = 'export'
+        else:
+            deals = self._empty(self.DEAL_COLUMNS)
+            self.sources['deals'] = 'none'
+
+        # Exportierte Preispunkte plus die seither in SQLite hinzugekommenen
+        parts, sources = [], []
+        if exports['prices']:
+            parts.append(self._select(self.PRICE_COLUMNS, exports['prices']))
+            sources.append('export')
+        watermark = self._watermark('prices') if exports['prices'] else None
+        raw_tables = sorted(name for name in store_tables if name.startswith('price_raw_'))
+        for table in raw_tables:
+            parts.append(self._select(self.PRICE_COLUMNS, f'store."{table}"', self._unexported(table, watermark)))
+        if raw_tables:
+            sources.append('sqlite')
+        prices = " UNION ALL ".join(parts) if parts else self._empty(self.PRICE_COLUMNS)
+        self.sources['price_points'] = '+'.join(sources) or 'none'
+
+        if 'restock_monitor_state' in store_tables:
+            state = self._select(self.STATE_COLUMNS, "store.restock_monitor_state")
+        else:
+            state = self._empty(self.STATE_COLUMNS)
+
+        for name, sql in (('products', products), ('deals', deals), ('price_points', prices), ('monitor_state', state)):
+            self.connection.execute(f"CREATE OR REPLACE TEMP VIEW {name} AS {sql}")
+        self._refreshed_at = time.monotonic()
+        self.logger.info(f"Analytik-Views aufgebaut: {self.sources}")
+
+        # Leere Views sonst nur an leeren Ergebnissen erkennbar; bei jeder Änderung melden
+        missing = sorted(name for name, source in self.sources.items() if source == 'none')
+        if missing and missing != self._missing_sources:
+            reason = (
+                "SQLite-Store angehängt, aber ohne diese Tabellen" if self.store_attached
+                else "SQLite-Store nicht angehängt (sqlite-Extension nicht ladbar oder Datei fehlt)"
+            )
+            self.logger.warning(
+                f"Keine Datenquelle für {', '.join(missing)}: {reason} und kein Export vorhanden. "
+                f"Abfragen auf diese Views liefern leere Ergebnisse."
+            )
+        self._missing_sources = missing
+
+    def _register_export(self, dataset: str) -> Optional[str]:
+        """Bindet einen exportierten Datensatz ein; liefert den Tabellennamen oder None."""
+        path = self.export_dir / dataset
+        if not path.exists() or not any(path.rglob(f"*.{'parquet' if self.export_format == 'parquet' else 'arrow'}")):
+            return None
+        name = f"export_{dataset}"
+        if ds is not None:
+            files = ds.dataset(
+                str(path),
+                format=self.export_format,
+                partitioning=ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+            )
+            # Projektion und Filter werden in den pyarrow-Scan durchgereicht
+            self.connection.register(name, files)
+            return name
+        if self.export_format == 'parquet':
+            pattern = str(path / '**' / '*.parquet').replace("'", "''")
+            self.connection.execute(
+                f"CREATE OR REPLACE TEMP VIEW {name} AS "
+                f"SELECT * FROM read_parquet('{pattern}', hive_partitioning = true)"
+            )
+            return name
+        self.logger.warning(f"Export {dataset} im Format {self.export_format} benötigt pyarrow")
+        return None
+
+    def _store_tables(self) -> List[str]:
+        if not self.store_attached:
+            return []
+        rows = self.connection.execute(
+            "SELECT table_name FROM information_schema.tables WHERE table_catalog = 'store'"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _watermark(self, dataset: str) -> Optional[Union[str, Dict[str, int]]]:
+        try:
+            watermarks = json.loads((self.export_dir / "_watermarks.json").read_text(encoding='utf-8'))
+            return watermarks.get(dataset)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def _unexported(table: str, watermark) -> str:
+        """Bedingung für die noch nicht exportierten Zeilen einer Roh-Partition."""
+        if isinstance(watermark, dict):
+            # Höchste exportierte id je Partition (siehe HistoryExporter._export_prices)
+            last_id = watermark.get(table[len('price_raw_'):])
+            return f"WHERE id > {int(last_id)}" if last_id is not None else ""
+        if watermark:
+            # Altes ts-Wasserzeichen
+            return f"WHERE CAST(ts AS TIMESTAMP) > TIMESTAMP '{watermark}'"
+        return ""
+
+    @staticmethod
+    def _select(columns: Dict[str, str], source: str, suffix: str = "", expressions: Optional[Dict[str, str]] = None) -> str:
+        expressions = expressions or {}
+        projection = ", ".join(
+            f"CAST({expressions.get(name, name)} AS {sql_type}) AS {name}" for name, sql_type in columns.items()
+        )
+        return f"SELECT {projection} FROM {source} {suffix}".strip()
+
+    @staticmethod
+    def _empty(columns: Dict[str, str]) -> str:
+        projection = ", ".join(f"CAST(NULL AS {sql_type}) AS {name}" for name, sql_type in columns.items())
+        return f"SELECT {projection} WHERE false"
+
+    async def fetch(self, sql: str, params: Optional[list] = None) -> List[Dict]:
+        """Führt eine Abfrage aus und liefert die Zeilen als Dicts."""
+        def run():
+            cursor = self.connection.execute(sql, params or [])
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+        return await self._run(run)
+
+    async def fetch_arrow(self, sql: str, params: Optional[list] = None):
+        """Führt eine Abfrage aus und liefert das Ergebnis als pyarrow-Tabelle (spaltenweise, ohne Zeilenobjekte)."""
+        return await self._run(lambda: self.connection.execute(sql, params or []).fetch_arrow_table())
+
+    async def _run(self, call):
+        if self.connection is None and not await self.open():
+            raise RuntimeError("Analytik nicht verfügbar")
+        async with self._lock:
+            if time.monotonic() - self._refreshed_at >= self.refresh_interval:
+                await asyncio.to_thread(self._refresh)
+            return await asyncio.to_thread(call)
+
+    async def refresh(self) -> None:
+        """Erzwingt den Neuaufbau der Views."""
+        if self.connection is None:
+            await self.open()
+            return
+        async with self._lock:
+            await asyncio.to_thread(self._refresh)
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+                self.store_attached = False
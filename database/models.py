@@ -1,5 +1,5 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -24,8 +24,9 @@ class Product(Base):
     # Preise und Profitabilität
     hhv_price = Column(Float)
     alias_price = Column(Float)
-    profit_margin = Column(Float)
+    profit_margin = Column(Float)  # Prozent bezogen auf den HHV-Preis
     roi = Column(Float)
+    net_profit = Column(Float)  # Gewinn in Euro (Alias- minus HHV-Preis)
     
     # Verkaufsstatistiken
     monthly_sales = Column(Integer, default=0)
@@ -48,6 +49,11 @@ class Product(Base):
     prices = relationship("Price", back_populates="product", cascade="all, delete-orphan")
     restock_history = relationship("RestockHistory", back_populates="product", cascade="all, delete-orphan")
     deals = relationship("Deal", back_populates="product", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # get_profitable_products: Bereich auf profit_margin, monthly_sales wird im Index geprüft
+        Index('ix_products_profit_sales', 'profit_margin', 'monthly_sales'),
+    )
 
 class Price(Base):
     __tablename__ = 'price_history'
@@ -71,6 +77,8 @@ class RestockHistory(Base):
     restock_amount = Column(Integer)
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
     detected_by = Column(String)  # 'scanner' oder 'monitor'
+    event_type = Column(String)  # 'appeared', 'disappeared' oder 'price_changed'
+    price = Column(Float)
     
     product = relationship("Product", back_populates="restock_history")
 
@@ -83,11 +91,57 @@ class Deal(Base):
     alias_price = Column(Float)
     profit_margin = Column(Float)
     roi = Column(Float)
-    found_at = Column(DateTime, default=datetime.utcnow, index=True)
+    found_at = Column(DateTime, default=datetime.utcnow)
     status = Column(String)  # 'new', 'processed', 'expired'
     notification_sent = Column(Boolean, default=False)
     
     product = relationship("Product", back_populates="deals")
+    
+    __table_args__ = (
+        # get_recent_deals: Bereich auf found_at, deckt profit_margin, product_id und status ab
+        Index('ix_deals_found_profit', 'found_at', 'profit_margin', 'product_id', 'status'),
+    )
+
+class DealBoardEntry(Base):
+    __tablename__ = 'deal_board'
+    
+    sku = Column(String, primary_key=True)
+    rank = Column(Integer, index=True)
+    name = Column(String)
+    hhv_price = Column(Float)
+    alias_price = Column(Float)
+    profit_margin = Column(Float)
+    roi = Column(Float)
+    found_at = Column(DateTime)
+    snapshot_at = Column(DateTime, default=datetime.utcnow)
+
+class MonitorState(Base):
+    __tablename__ = 'restock_monitor_state'
+    
+    sku = Column(String, primary_key=True)
+    probability = Column(Float)
+    next_check = Column(DateTime, index=True)
+    priority = Column(Integer)
+    last_check = Column(DateTime)
+    success_rate = Column(Float, default=0.0)
+    profit_margin = Column(Float, default=0.0)
+    sales_velocity = Column(Float, default=0.0)
+    url = Column(String)  # Detailseite für die Verfügbarkeits-Probe
+    available = Column(Boolean)  # Zuletzt beobachtete Verfügbarkeit (Ausgangszustand für den nächsten Check)
+    available_sizes = Column(Text)  # JSON-Liste der zuletzt verfügbaren Größen
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class CrawlFrontierEntry(Base):
+    __tablename__ = 'crawl_frontier'
+    
+    url = Column(String, primary_key=True)
+    kind = Column(String, primary_key=True)  # 'category', 'detail' oder 'product'
+    priority = Column(Integer, default=0)
+    status = Column(String, default='pending', index=True)  # 'pending', 'done' oder 'failed'
+    attempts = Column(Integer, default=0)
+    payload = Column(Text)  # JSON-Ergebnis der letzten erfolgreichen Verarbeitung
+    completed_at = Column(DateTime, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class MLData(Base):
     __tablename__ = 'ml_data'
@@ -103,4 +157,4 @@ class MLData(Base):
     product = relationship("Product")
 
 # Export der Klassen
-__all__ = ['Base', 'Product', 'Price', 'RestockHistory', 'Deal', 'MLData', 'ProductStatus']
+__all__ = ['Base', 'Product', 'Price', 'RestockHistory', 'Deal', 'DealBoardEntry', 'MonitorState', 'CrawlFrontierEntry', 'MLData', 'ProductStatus']
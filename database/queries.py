@@ -1,52 +1,43 @@
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy import and_, or_, desc, func
 from typing import List, Dict, Optional
 import logging
 from datetime import datetime, timedelta
-from .models import Product, PriceHistory, Deal, RestockData
+from .analytics import AnalyticsEngine
 
 class DatabaseQueries:
-    def __init__(self, session: AsyncSession):
-        if not isinstance(session, AsyncSession):
-            raise ValueError("Session must be an AsyncSession instance")
-        self.session = session
+    """Analytische Abfragen über die DuckDB-Views des AnalyticsEngine statt über das ORM."""
+
+    def __init__(self, engine: AnalyticsEngine):
+        if not isinstance(engine, AnalyticsEngine):
+            raise ValueError("Engine must be an AnalyticsEngine instance")
+        self.engine = engine
         self.logger = logging.getLogger("DatabaseQueries")
 
     async def get_profitable_products(
         self,
         min_profit: float,
         min_monthly_sales: int,
-        limit: int = 100
+        limit: Optional[int] = 100
     ) -> List[Dict]:
-        """Holt profitable Produkte aus der Datenbank."""
+        """Holt profitable Produkte (min_profit als Gewinnmarge in Prozent); limit=None liefert alle."""
         try:
             self.logger.debug(f"Querying profitable products: profit >= {min_profit}, sales >= {min_monthly_sales}")
-            query = (
-                select(Product)
-                .where(
-                    and_(
-                        Product.profit_margin >= min_profit,
-                        Product.monthly_sales >= min_monthly_sales,
-                        Product.is_active == True
-                    )
-                )
-                .order_by(desc(Product.profit_margin))
-                .limit(limit)
+            params = [min_profit, min_monthly_sales]
+            if limit is not None:
+                params.append(limit)
+            products = await self.engine.fetch(
+                f"""
+                SELECT sku, name, hhv_price, alias_price, profit_margin, monthly_sales,
+                       last_restock, restock_probability
+                FROM products
+                WHERE profit_margin >= ? AND monthly_sales >= ?
+                  AND coalesce(status, 'ACTIVE') <> 'INACTIVE'
+                ORDER BY profit_margin DESC
+                {'LIMIT ?' if limit is not None else ''}
+                """,
+                params
             )
-            result = await self.session.execute(query)
-            products = result.scalars().all()
             self.logger.info(f"Found {len(products)} profitable products")
-            return [{
-                'sku': p.sku,
-                'name': p.name,
-                'hhv_price': p.hhv_price,
-                'alias_price': p.alias_price,
-                'profit_margin': p.profit_margin,
-                'monthly_sales': p.monthly_sales,
-                'last_restock': p.last_restock,
-                'restock_probability': p.restock_probability
-            } for p in products]
+            return products
         except Exception as e:
             self.logger.error(f"Error querying profitable products: {e}")
             return []
@@ -54,46 +45,46 @@ class DatabaseQueries:
     async def get_price_history(self, sku: str, days: int = 30) -> List[Dict]:
         """Holt Preishistorie eines Produkts."""
         try:
-            cutoff_date = datetime.now() - timedelta(days=days)
-            query = (
-                select(PriceHistory)
-                .where(
-                    and_(
-                        PriceHistory.sku == sku,
-                        PriceHistory.timestamp >= cutoff_date
-                    )
-                )
-                .order_by(PriceHistory.timestamp.desc())
+            cutoff_date = datetime.utcnow() - timedelta(days=days)
+            return await self.engine.fetch(
+                """
+                SELECT coalesce(alias_price, hhv_price) AS price, ts AS timestamp, source
+                FROM price_points
+                WHERE sku = ? AND ts >= ?
+                ORDER BY ts DESC
+                """,
+                [sku, cutoff_date]
             )
-            result = await self.session.execute(query)
-            return [{
-                'price': h.price,
-                'timestamp': h.timestamp,
-                'source': h.source
-            } for h in result.scalars().all()]
         except Exception as e:
             self.logger.error(f"Error fetching price history for {sku}: {e}")
             return []
 
     async def get_training_data(self, limit: int = 10000) -> List[Dict]:
-        """Holt ML-Trainingsdaten."""
+        """Holt ML-Trainingsdaten inklusive Preisänderung und gleitendem Mittel je SKU."""
         try:
             self.logger.debug("Fetching training data")
-            query = (
-                select(Product, PriceHistory)
-                .join(PriceHistory)
-                .order_by(PriceHistory.timestamp.desc())
-                .limit(limit)
+            return await self.engine.fetch(
+                """
+                WITH points AS (
+                    SELECT sku, ts, coalesce(alias_price, hhv_price) AS price
+                    FROM price_points
+                ), windowed AS (
+                    SELECT sku, price, ts,
+                           price - lag(price) OVER w AS price_change,
+                           avg(price) OVER (w ROWS BETWEEN 6 PRECEDING AND CURRENT ROW) AS price_avg_7
+                    FROM points
+                    WINDOW w AS (PARTITION BY sku ORDER BY ts)
+                )
+                SELECT windowed.sku, windowed.price, windowed.ts AS timestamp,
+                       products.monthly_sales, products.restock_frequency, products.profit_margin,
+                       windowed.price_change, windowed.price_avg_7
+                FROM windowed
+                JOIN products USING (sku)
+                ORDER BY windowed.ts DESC
+                LIMIT ?
+                """,
+                [limit]
             )
-            result = await self.session.execute(query)
-            return [{
-                'sku': row.Product.sku,
-                'price': row.PriceHistory.price,
-                'timestamp': row.PriceHistory.timestamp,
-                'monthly_sales': row.Product.monthly_sales,
-                'restock_frequency': row.Product.restock_frequency,
-                'profit_margin': row.Product.profit_margin
-            } for row in result.all()]
         except Exception as e:
             self.logger.error(f"Error fetching training data: {e}")
             return []
@@ -101,38 +92,63 @@ class DatabaseQueries:
     async def get_recent_deals(self, hours: int = 24) -> List[Dict]:
         """Holt kürzlich gefundene profitable Deals."""
         try:
-            cutoff_time = datetime.now() - timedelta(hours=hours)
-            query = (
-                select(Deal)
-                .where(Deal.found_at >= cutoff_time)
-                .order_by(desc(Deal.profit_margin))
+            cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+            return await self.engine.fetch(
+                """
+                SELECT sku, profit_margin, found_at, status
+                FROM deals
+                WHERE found_at >= ?
+                ORDER BY profit_margin DESC
+                """,
+                [cutoff_time]
             )
-            result = await self.session.execute(query)
-            return [{
-                'sku': d.sku,
-                'profit_margin': d.profit_margin,
-                'found_at': d.found_at,
-                'status': d.status
-            } for d in result.scalars().all()]
         except Exception as e:
             self.logger.error(f"Error fetching recent deals: {e}")
             return []
 
     async def get_restock_predictions(self, min_probability: float = 0.5) -> List[Dict]:
-        """Holt Restock-Vorhersagen."""
+        """Holt Restock-Vorhersagen aus dem gespeicherten Monitoring-Zustand."""
         try:
-            query = (
-                select(RestockData)
-                .where(RestockData.probability >= min_probability)
-                .order_by(desc(RestockData.probability))
+            return await self.engine.fetch(
+                """
+                SELECT sku, probability, next_check AS predicted_date, success_rate AS confidence
+                FROM monitor_state
+                WHERE probability >= ?
+                ORDER BY probability DESC
+                """,
+                [min_probability]
             )
-            result = await self.session.execute(query)
-            return [{
-                'sku': r.sku,
-                'probability': r.probability,
-                'predicted_date': r.predicted_date,
-                'confidence': r.confidence
-            } for r in result.scalars().all()]
         except Exception as e:
             self.logger.error(f"Error fetching restock predictions: {e}")
             return []
+
+    async def get_price_statistics(self, days: int = 30, min_samples: int = 2) -> List[Dict]:
+        """Aggregiert Preisstatistiken je SKU (Spanne, Mittel, Volatilität, Veränderung) über den Zeitraum."""
+        try:
+            cutoff_date = datetime.utcnow() - timedelta(days=days)
+            return await self.engine.fetch(
+                """
+                SELECT sku,
+                       count(*) AS samples,
+                       min(price) AS min_price,
+                       max(price) AS max_price,
+                       avg(price) AS avg_price,
+                       stddev_samp(price) / nullif(avg(price), 0) AS volatility,
+                       arg_min(price, ts) AS first_price,
+                       arg_max(price, ts) AS last_price,
+                       (arg_max(price, ts) - arg_min(price, ts)) / nullif(arg_min(price, ts), 0) * 100 AS change_percent
+                FROM (
+                    SELECT sku, ts, coalesce(alias_price, hhv_price) AS price
+                    FROM price_points
+                    WHERE ts >= ?
+                )
+                WHERE price IS NOT NULL
+                GROUP BY sku
+                HAVING count(*) >= ?
+                ORDER BY volatility DESC NULLS LAST
+                """,
+                [cutoff_date, min_samples]
+            )
+        except Exception as e:
+            self.logger.error(f"Error fetching price statistics: {e}")
+            return []
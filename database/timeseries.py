@@ -0,0 +1,331 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+from sqlalchemy import MetaData, Table, Column, Integer, String, Float, DateTime, Index, select, union_all, case, func, inspect, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# Partitionstabellen werden zur Laufzeit angelegt und gehören nicht zu Base.metadata
+series_metadata = MetaData()
+
+SERIES_FIELDS = ('hhv_price', 'alias_price')
+
+
+@dataclass(frozen=True)
+class Tier:
+    """Eine Auflösungsstufe der Preis-Zeitreihe."""
+    name: str
+    partition_format: str  # strftime-Format des Partitionsschlüssels
+    bucket: Optional[str]  # None = Rohpunkte, sonst 'hour' oder 'day'
+
+    def partition_key(self, timestamp: datetime) -> str:
+        return timestamp.strftime(self.partition_format)
+
+    def table_name(self, key: str) -> str:
+        return f"price_{self.name}_{key}"
+
+    def bucket_start(self, timestamp: datetime) -> datetime:
+        if self.bucket == 'hour':
+            return timestamp.replace(minute=0, second=0, microsecond=0)
+        if self.bucket == 'day':
+            return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        return timestamp
+
+    def partition_bounds(self, key: str) -> Tuple[datetime, datetime]:
+        """Zeitraum [Beginn, Ende) einer Partition."""
+        start = datetime.strptime(key, self.partition_format)
+        if self.partition_format == '%Y%m%d':
+            return start, start + timedelta(days=1)
+        if self.partition_format == '%Y%m':
+            return start, (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return start, start.replace(year=start.year + 1)
+
+    def partition_keys(self, start: datetime, end: datetime) -> List[str]:
+        """Schlüssel aller Partitionen, die [start, end] überdecken."""
+        keys = []
+        key = self.partition_key(start)
+        while True:
+            keys.append(key)
+            _, next_start = self.partition_bounds(key)
+            if next_start > end:
+                return keys
+            key = self.partition_key(next_start)
+
+
+# Rohpunkte in Tagespartitionen, Stunden-Rollups in Monats-, Tages-Rollups in Jahrespartitionen
+RAW = Tier('raw', '%Y%m%d', None)
+HOURLY = Tier('hourly', '%Y%m', 'hour')
+DAILY = Tier('daily', '%Y', 'day')
+TIERS = (RAW, HOURLY, DAILY)
+
+
+def partition_table(tier: Tier, key: str) -> Table:
+    """Liefert (und registriert bei Bedarf) die Tabelle einer Partition."""
+    name = tier.table_name(key)
+    if name in series_metadata.tables:
+        return series_metadata.tables[name]
+
+    if tier.bucket is None:
+        return Table(
+            name, series_metadata,
+            Column('id', Integer, primary_key=True),
+            Column('sku', String, nullable=False),
+            Column('ts', DateTime, nullable=False),
+            Column('hhv_price', Float),
+            Column('alias_price', Float),
+            Column('profit_margin', Float),
+            Column('source', String),
+            Index(f"ix_{name}_sku_ts", 'sku', 'ts')
+        )
+
+    columns = [
+        Column('sku', String, primary_key=True),
+        Column('bucket', DateTime, primary_key=True),
+        Column('samples', Integer, nullable=False, default=0),
+        Column('first_ts', DateTime),
+        Column('last_ts', DateTime)
+    ]
+    for field in SERIES_FIELDS:
+        columns += [
+            Column(f"{field}_open", Float),
+            Column(f"{field}_high", Float),
+            Column(f"{field}_low", Float),
+            Column(f"{field}_close", Float)
+        ]
+    # Rollups werden nur über (sku, bucket) gelesen: Primärschlüssel als geclusterter Index
+    return Table(name, series_metadata, *columns, sqlite_with_rowid=False)
+
+
+class PriceSeries:
+    """
+    Preis-Zeitreihe in drei Stufen: Rohpunkte, Stunden- und Tages-Rollups.
+
+    Jede Stufe ist nach Zeit in eigene Tabellen partitioniert. Beim Einfügen
+    werden die Rollups (Open/High/Low/Close und Anzahl der Punkte) im selben
+    Schreibvorgang inkrementell per Upsert fortgeschrieben. Die Aufbewahrung
+    erfolgt durch DROP TABLE ganzer, abgelaufener Partitionen statt durch
+    Zeilen-Deletes. Bereichsabfragen lesen die gröbste Stufe, die den Zeitraum
+    noch vollständig abdeckt.
+    """
+
+    def __init__(self, raw_days: int = 7, hourly_days: int = 180, daily_days: int = 0):
+        # 0 = unbegrenzt aufbewahren
+        self.retention = {RAW: raw_days, HOURLY: hourly_days, DAILY: daily_days}
+        self.logger = logging.getLogger("PriceSeries")
+        self._known: Optional[Set[str]] = None
+
+    async def append(self, session, points: Iterable[Dict]) -> int:
+        """Schreibt Preis-Punkte in die Rohdaten und aktualisiert die Rollups."""
+        rows = [row for row in (self._point_row(point) for point in points) if row]
+        if not rows:
+            return 0
+        connection = await session.connection()
+        await self._load_partitions(connection)
+        try:
+            await self._write(connection, rows)
+        except Exception:
+            # Angelegte Partitionen können mit der Transaktion zurückgerollt worden sein
+            self._known = None
+            raise
+        return len(rows)
+
+    async def _write(self, connection, rows: List[Dict]) -> None:
+        raw_groups: Dict[str, List[Dict]] = {}
+        for row in rows:
+            raw_groups.setdefault(RAW.partition_key(row['ts']), []).append(row)
+        for key, group in raw_groups.items():
+            table = await self._ensure_partition(connection, RAW, key)
+            await connection.execute(table.insert(), group)
+
+        for tier in (HOURLY, DAILY):
+            partitions: Dict[str, List[Dict]] = {}
+            for bucket in self._aggregate(tier, rows):
+                partitions.setdefault(tier.partition_key(bucket['bucket']), []).append(bucket)
+            for key, buckets in partitions.items():
+                table = await self._ensure_partition(connection, tier, key)
+                await connection.execute(self._rollup_upsert(table), buckets)
+
+    @staticmethod
+    def _point_row(point: Dict) -> Optional[Dict]:
+        if not point.get('sku'):
+            return None
+        timestamp = point.get('ts') or point.get('timestamp')
+        if isinstance(timestamp, (int, float)):
+            timestamp = datetime.utcfromtimestamp(timestamp)
+        row = {
+            'sku': point['sku'],
+            'ts': timestamp or datetime.utcnow(),
+            'profit_margin': point.get('profit_margin'),
+            'source': point.get('source')
+        }
+        for field in SERIES_FIELDS:
+            try:
+                row[field] = float(point[field]) if point.get(field) is not None else None
+            except (TypeError, ValueError):
+                row[field] = None
+        return row
+
+    @staticmethod
+    def _aggregate(tier: Tier, rows: List[Dict]) -> List[Dict]:
+        """Fasst die Punkte eines Batches je SKU und Bucket zusammen."""
+        groups: Dict[Tuple[str, datetime], List[Dict]] = {}
+        for row in rows:
+            groups.setdefault((row['sku'], tier.bucket_start(row['ts'])), []).append(row)
+
+        buckets = []
+        for (sku, bucket), group in groups.items():
+            group.sort(key=lambda row: row['ts'])
+            aggregate = {
+                'sku': sku,
+                'bucket': bucket,
+                'samples': len(group),
+                'first_ts': group[0]['ts'],
+                'last_ts': group[-1]['ts']
+            }
+            for field in SERIES_FIELDS:
+                values = [row[field] for row in group if row[field] is not None]
+                aggregate.update({
+                    f"{field}_open": values[0] if values else None,
+                    f"{field}_high": max(values) if values else None,
+                    f"{field}_low": min(values) if values else None,
+                    f"{field}_close": values[-1] if values else None
+                })
+            buckets.append(aggregate)
+        return buckets
+
+    @staticmethod
+    def _rollup_upsert(table: Table):
+        """Upsert, der einen bestehenden Bucket mit einem neuen Teil-Bucket verschmilzt."""
+        stmt = sqlite_insert(table)
+        new, old = stmt.excluded, table.c
+        earlier = new.first_ts < old.first_ts
+        later = new.last_ts >= old.last_ts
+        values = {
+            'samples': old.samples + new.samples,
+            'first_ts': func.min(old.first_ts, new.first_ts),
+            'last_ts': func.max(old.last_ts, new.last_ts)
+        }
+        for field in SERIES_FIELDS:
+            opening, high, low, close = (f"{field}_{part}" for part in ('open', 'high', 'low', 'close'))
+            values.update({
+                opening: case(
+                    (earlier, func.coalesce(new[opening], old[opening])), else_=func.coalesce(old[opening], new[opening])
+                ),
+                # Skalares max/min in SQLite liefert NULL, sobald ein Argument NULL ist
+                high: func.max(func.coalesce(old[high], new[high]), func.coalesce(new[high], old[high])),
+                low: func.min(func.coalesce(old[low], new[low]), func.coalesce(new[low], old[low])),
+                close: case(
+                    (later, func.coalesce(new[close], old[close])), else_=func.coalesce(old[close], new[close])
+                )
+            })
+        return stmt.on_conflict_do_update(index_elements=['sku', 'bucket'], set_=values)
+
+    async def query(
+        self,
+        session,
+        sku: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+        resolution: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Liest die Zeitreihe einer SKU im Bereich [start, end].
+        resolution: 'raw', 'hourly', 'daily' oder None für automatische Wahl.
+        """
+        end = end or datetime.utcnow()
+        tier = {tier.name: tier for tier in TIERS}.get(resolution) or self._pick_tier(start, end)
+        connection = await session.connection()
+        await self._load_partitions(connection)
+
+        time_column = 'ts' if tier.bucket is None else 'bucket'
+        selects = []
+        for key in tier.partition_keys(tier.bucket_start(start), end):
+            if tier.table_name(key) not in self._known:
+                continue
+            table = partition_table(tier, key)
+            columns = [column for column in table.columns if column.name not in ('id', 'sku')]
+            selects.append(
+                select(*columns).where(
+                    table.c.sku == sku,
+                    table.c[time_column] >= tier.bucket_start(start),
+                    table.c[time_column] <= end
+                )
+            )
+        if not selects:
+            return []
+
+        stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+        result = await connection.execute(stmt.order_by(text(time_column)))
+        return [dict(row) for row in result.mappings().all()]
+
+    def _pick_tier(self, start: datetime, end: datetime) -> Tier:
+        """Gröbste noch sinnvolle Auflösung, deren Aufbewahrung den Zeitraum abdeckt."""
+        now = datetime.utcnow()
+        span = end - start
+
+        def covered(tier: Tier) -> bool:
+            days = self.retention[tier]
+            return not days or start >= now - timedelta(days=days)
+
+        if span <= timedelta(days=2) and covered(RAW):
+            return RAW
+        if span <= timedelta(days=60) and covered(HOURLY):
+            return HOURLY
+        return DAILY
+
+    async def apply_retention(self, session, raw_days: Optional[int] = None) -> List[str]:
+        """Verwirft Partitionen, deren Zeitraum vollständig außerhalb der Aufbewahrung liegt."""
+        connection = await session.connection()
+        await self._load_partitions(connection)
+        retention = {**self.retention, **({RAW: raw_days} if raw_days is not None else {})}
+        now = datetime.utcnow()
+
+        dropped = []
+        for tier in TIERS:
+            days = retention[tier]
+            if not days:
+                continue
+            cutoff = now - timedelta(days=days)
+            prefix = tier.table_name('')
+            for name in sorted(self._known):
+                if not name.startswith(prefix):
+                    continue
+                key = name[len(prefix):]
+                try:
+                    _, partition_end = tier.partition_bounds(key)
+                except ValueError:
+                    continue
+                if partition_end <= cutoff:
+                    await connection.run_sync(partition_table(tier, key).drop, checkfirst=True)
+                    series_metadata.remove(series_metadata.tables[name])
+                    self._known.discard(name)
+                    dropped.append(name)
+        if dropped:
+            self.logger.info(f"Dropped {len(dropped)} expired price partitions")
+        return dropped
+
+    async def partitions(self, session) -> List[str]:
+        """Namen aller vorhandenen Partitionstabellen."""
+        await self._load_partitions(await session.connection())
+        return sorted(self._known)
+
+    async def tables(self, session, tier: Tier) -> List[Table]:
+        """Vorhandene Partitionstabellen einer Stufe in zeitlicher Reihenfolge."""
+        prefix = tier.table_name('')
+        return [
+            partition_table(tier, name[len(prefix):])
+            for name in await self.partitions(session) if name.startswith(prefix)
+        ]
+
+    async def _load_partitions(self, connection) -> None:
+        if self._known is None:
+            names = await connection.run_sync(lambda sync: inspect(sync).get_table_names())
+            prefixes = tuple(tier.table_name('') for tier in TIERS)
+            self._known = {name for name in names if name.startswith(prefixes)}
+
+    async def _ensure_partition(self, connection, tier: Tier, key: str) -> Table:
+        table = partition_table(tier, key)
+        if table.name not in self._known:
+            await connection.run_sync(table.create, checkfirst=True)
+            self._known.add(table.name)
+        return table
@@ -18,7 +18,9 @@ from core.bot import ArbitrageBot
 from core.scanner import Scanner
 from core.restock_monitor import RestockMonitor
 from core.database import DatabaseManager
+from core.db_writer import DatabaseWriter
 from core.price_analyzer import PriceAnalyzer
+from core.deal_board import DealBoard
 from config.logging_config import setup_logging
 from utils.initialization import setup_environment, check_dependencies
 from api.hhv_client import HHVClient
@@ -73,7 +75,12 @@ def setup_signal_handlers(bot, scanner, database):
         except NotImplementedError:
             pass
 
-async def process_products(products: list, price_analyzer: PriceAnalyzer, database: DatabaseManager):
+async def process_products(
+    products: list,
+    price_analyzer: PriceAnalyzer,
+    database: DatabaseManager,
+    writer: DatabaseWriter
+):
     """Verarbeitet Produkte parallel mit dem PriceAnalyzer."""
     try:
         chunk_size = 50
@@ -81,14 +88,22 @@ async def process_products(products: list, price_analyzer: PriceAnalyzer, databa
 
         for i, chunk in enumerate(chunks):
             results = await price_analyzer.analyze_batch(chunk)
+            price_analyzer.update_deal_board(results)
+
+            # Speichere Produktdaten gesammelt über den Write-Behind-Writer
+            await writer.save_products(results)
 
             for product in results:
-                # Speichere Produktdaten in der Datenbank
-                await database.save_product(product)
+                await writer.save_price(product['sku'], {
+                    'hhv_price': product.get('hhv_price'),
+                    'alias_price': product.get('alias_price'),
+                    'profit_margin': product.get('profit_margin'),
+                    'source': 'hhv'
+                })
 
                 # Speichere profitable Produkte separat
                 if product.get('profit_margin', 0) > 15:
-                    await database.save_deal({
+                    await writer.save_deal({
                         'sku': product['sku'],
                         'profit_margin': product['profit_margin'],
                         'timestamp': time.time()
@@ -97,6 +112,11 @@ async def process_products(products: list, price_analyzer: PriceAnalyzer, databa
             logging.info(f"Chunk {i + 1}/{len(chunks)} verarbeitet: {len(results)} Produkte analysiert")
             await asyncio.sleep(0.1)
 
+        # Alle Schreibzugriffe dauerhaft machen, bevor der Snapshot geschrieben wird
+        await writer.flush()
+        if price_analyzer.deal_board:
+            await price_analyzer.deal_board.snapshot(database)
+
     except Exception as e:
         logging.error(f"Fehler bei der Verarbeitung von Produkten: {e}")
 
@@ -105,6 +125,7 @@ async def main():
     bot = None
     scanner = None
     database = None
+    writer = None
 
     try:
         # Grundlegende Initialisierung
@@ -134,8 +155,15 @@ async def main():
         proxy_manager = ProxyManager(proxy_file="config/proxies.txt")  # Nur Dateipfad übergeben
 
         # Datenbank initialisieren
-        database = DatabaseManager()
+        database = DatabaseManager(config.DB.DB_URL, config.DB)
         await database.init_db()
+        writer = DatabaseWriter(
+            database,
+            max_queue=config.DB.WRITE_QUEUE_SIZE,
+            flush_interval_ms=config.DB.WRITE_FLUSH_INTERVAL_MS,
+            max_batch_rows=config.DB.WRITE_BATCH_ROWS
+        )
+        await writer.start()
 
         # Bot erstellen und initialisieren
         bot = ArbitrageBot()
@@ -151,13 +179,19 @@ async def main():
         logger.info("HHV Client erfolgreich initialisiert.")
 
         # Scanner starten und Produkte verarbeiten
-        scanner = Scanner(scanner_config, proxy_manager, bot.queue_manager, hhv_client)
+        scanner = Scanner(scanner_config, proxy_manager, bot.queue_manager, hhv_client, database=database)
         await scanner.start()
 
         products = await scanner.scan_products()
         if products:
-            price_analyzer = PriceAnalyzer(bot.model, bot.cache, DiscordNotifier(config.NOTIFICATION))
-            await process_products(products, price_analyzer, database)
+            deal_board = DealBoard(config.ARBITRAGE.DEAL_BOARD_SIZE, config.ARBITRAGE.DEAL_TTL)
+            price_analyzer = PriceAnalyzer(
+                bot.model,
+                bot.cache,
+                DiscordNotifier(config.NOTIFICATION),
+                deal_board=deal_board
+            )
+            await process_products(products, price_analyzer, database, writer)
 
     except Exception as e:
         logger.error(f"Kritischer Fehler in main: {e}")
@@ -165,6 +199,8 @@ async def main():
     finally:
         if scanner:
             await scanner.cleanup()
+        if writer:
+            await writer.close()
         if database:
             await database.close()
 
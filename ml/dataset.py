@@ -5,13 +5,23 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 import logging
 from pathlib import Path
+from datetime import datetime
 import asyncio
 
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+except ImportError:  # ohne pyarrow nur CSV
+    pa = None
+
 class DatasetPreparator:
-    def __init__(self, cache_manager=None):
+    def __init__(self, cache_manager=None, export_dir: str = "data/exports", export_format: str = "ipc"):
         self.scaler = StandardScaler()
         self.logger = logging.getLogger("DatasetPreparator")
         self.cache_manager = cache_manager
+        self.export_dir = Path(export_dir)
+        self.export_format = export_format
         self.feature_columns = [
             'price', 'sales', 'restock_frequency', 
             'profit_margin', 'demand_score', 'brand_score',
@@ -26,13 +36,13 @@ class DatasetPreparator:
                 if cached_data:
                     return cached_data['features'], cached_data['targets']
 
+            # Bevorzugt aus dem spaltenbasierten Export, sonst aus der CSV-Datei
+            df = await self.load_history()
             csv_path = Path("data/training_data.csv")
-            if not csv_path.exists():
-                self.logger.warning("Kein Trainingsdatensatz gefunden")
-                return np.array([]), np.array([])
-
-            df = await self.load_data(str(csv_path))
+            if df.empty and csv_path.exists():
+                df = await self.load_data(str(csv_path))
             if df.empty:
+                self.logger.warning("Kein Trainingsdatensatz gefunden")
                 return np.array([]), np.array([])
 
             features, targets = await self.prepare_features(df)
@@ -57,22 +67,72 @@ class DatasetPreparator:
     async def load_data(self, csv_path: str) -> pd.DataFrame:
         """Lädt und validiert Datensatz asynchron."""
         try:
-            df = pd.read_csv(csv_path)
-            required_columns = ['sku', 'price', 'sales', 'timestamp'] + self.feature_columns
-            
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                self.logger.warning(f"Fehlende Spalten: {missing_columns}")
-                for col in missing_columns:
-                    df[col] = 0.0
-
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            return df
+            df = pd.read_csv(csv_path, sep=';')
+            return self._complete_columns(df)
 
         except Exception as e:
             self.logger.error(f"Fehler beim Laden des Datasets: {e}")
             return pd.DataFrame()
 
+    def _complete_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        required_columns = ['sku', 'price', 'sales', 'timestamp'] + self.feature_columns
+        
+        missing_columns = [col for col in required_columns if col not in df.columns]
+        if missing_columns:
+            self.logger.warning(f"Fehlende Spalten: {missing_columns}")
+            for col in missing_columns:
+                df[col] = 0.0
+
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+
+    def load_export(
+        self,
+        dataset: str,
+        columns: Optional[List[str]] = None,
+        since: Optional[datetime] = None
+    ) -> Optional['pa.Table']:
+        """
+        Liest einen exportierten Datensatz (prices, products, deals) memory-mapped.
+        Es werden nur die angeforderten Spalten und, mit since, nur passende Tagespartitionen gelesen.
+        """
+        path = self.export_dir / dataset
+        if pa is None or not path.exists():
+            return None
+        try:
+            files = ds.dataset(
+                str(path),
+                format=self.export_format,
+                partitioning=ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive'),
+                filesystem=fs.LocalFileSystem(use_mmap=True)
+            )
+            partition_filter = ds.field('date') >= since.strftime('%Y-%m-%d') if since else None
+            return files.to_table(columns=columns, filter=partition_filter)
+        except Exception as e:
+            self.logger.error(f"Fehler beim Lesen des Exports {dataset}: {e}")
+            return None
+
+    async def load_history(self, since: Optional[datetime] = None) -> pd.DataFrame:
+        """Baut den Trainingsdatensatz aus exportierten Preispunkten und dem letzten Produktstand."""
+        prices = self.load_export('prices', ['sku', 'ts', 'hhv_price', 'alias_price', 'profit_margin'], since)
+        if prices is None or prices.num_rows == 0:
+            return pd.DataFrame()
+
+        df = prices.to_pandas().rename(columns={'ts': 'timestamp'})
+        df['price'] = df['alias_price'].fillna(df['hhv_price'])
+
+        products = self.load_export('products', ['sku', 'monthly_sales', 'restock_frequency', 'updated_at'])
+        if products is not None and products.num_rows:
+            # Der Export ist ein Änderungsprotokoll: letzter Stand je SKU
+            latest = products.to_pandas().sort_values('updated_at').drop_duplicates('sku', keep='last')
+            df = df.merge(latest[['sku', 'monthly_sales', 'restock_frequency']], on='sku', how='left')
+            df = df.rename(columns={'monthly_sales': 'sales'})
+
+        df = self._complete_columns(df).dropna(subset=['price'])
+        numeric_columns = [col for col in self.feature_columns if col != 'price']
+        df[numeric_columns] = df[numeric_columns].fillna(0.0)
+        return df
+
     async def prepare_features(self, df: pd.DataFrame, lookback: int = 30) -> Tuple[np.ndarray, np.ndarray]:
         """Erstellt erweiterte Features für ML-Training."""
         try:
@@ -110,6 +110,17 @@ class RestockPredictor(nn.Module):
             self.logger.error(f"Restock-Vorhersagefehler: {e}")
             return 0.0
 
+    async def predict_restock_batch(self, features: np.ndarray) -> np.ndarray:
+        """Restock-Vorhersage für eine ganze Feature-Matrix in einem Forward-Pass."""
+        try:
+            with torch.no_grad():
+                x = torch.from_numpy(np.asarray(features, dtype=np.float32))
+                predictions = self.forward(x)
+                return predictions.reshape(-1).cpu().numpy()
+        except Exception as e:
+            self.logger.error(f"Restock-Batch-Vorhersagefehler: {e}")
+            return np.zeros(len(features), dtype=np.float32)
+
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         try:
             features = self.feature_extractor(x)
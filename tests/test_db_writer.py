@@ -0,0 +1,36 @@
+import asyncio
+
+from core.db_writer import DatabaseWriter
+
+
+class FakeDatabase:
+    """Lehnt jeden Batch ab, der ein als fehlerhaft markiertes Update enthält."""
+
+    def __init__(self):
+        self.prices = []
+
+    async def write_batch(self, products, updates, prices, deals):
+        if any(values.get('bad') for values in updates.values()):
+            return False
+        self.prices.extend(price['sku'] for price in prices)
+        return True
+
+
+def test_bad_intent_does_not_drop_the_rest_of_the_group():
+    async def run():
+        database = FakeDatabase()
+        writer = DatabaseWriter(database, flush_interval_ms=20)
+        await writer.start()
+        for index in range(50):
+            await writer.save_price(f"S{index}", {'hhv_price': 100.0})
+        await writer.update_product('BAD', bad=True)
+        flushed = await writer.flush()
+        await writer.close()
+        return database, writer, flushed
+
+    database, writer, flushed = asyncio.run(run())
+
+    assert flushed is False
+    assert sorted(database.prices) == sorted(f"S{index}" for index in range(50))
+    assert writer.stats['dropped_rows'] == 1
+    assert writer.stats['rows_written'] == 50
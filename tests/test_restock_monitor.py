@@ -0,0 +1,175 @@
+import asyncio
+import time
+from datetime import datetime
+
+import numpy as np
+
+from core.prediction_store import RestockPrediction
+from core.restock_monitor import RestockMonitor
+
+
+class FakeRestockModel:
+    """Steht für den RestockPredictor: liefert eine feste Wahrscheinlichkeit je Zeile."""
+
+    def __init__(self, probability: float = 0.8):
+        self.probability = probability
+        self.batches = []
+
+    async def predict_restock_batch(self, features: np.ndarray) -> np.ndarray:
+        self.batches.append(features)
+        return np.full(len(features), self.probability, dtype=np.float32)
+
+
+class FakeCache:
+    def __init__(self):
+        self.items = {}
+
+    async def set_many(self, items, ttl=None):
+        self.items.update(items)
+
+    async def delete(self, key):
+        self.items.pop(key, None)
+
+
+class FakeHHVClient:
+    async def probe_availability(self, url):
+        return {'available': False, 'sizes': {}}
+
+
+class FakeNotifier:
+    def __init__(self):
+        self.sent = []
+
+    async def send_restock_notification(self, restock_data):
+        self.sent.append(restock_data)
+        return True
+
+
+def make_monitor(model=None):
+    return RestockMonitor(model or FakeRestockModel(), FakeCache(), hhv_client=FakeHHVClient())
+
+
+def add_due(monitor, sku, margin=20.0, velocity=5.0):
+    monitor.product_urls[sku] = f"https://example.com/{sku}"
+    monitor._schedule(RestockPrediction(
+        sku=sku,
+        probability=0.1,
+        next_check=datetime.fromtimestamp(time.time() - 1),
+        priority=3,
+        profit_margin=margin,
+        sales_velocity=velocity
+    ))
+
+
+def test_due_checks_are_rescored_in_one_batch():
+    model = FakeRestockModel(probability=0.8)
+    monitor = make_monitor(model)
+    for sku in ('A', 'B', 'C'):
+        add_due(monitor, sku)
+
+    restocks = asyncio.run(monitor._dispatch_due_checks())
+
+    assert restocks == []
+    assert len(model.batches) == 1
+    assert model.batches[0].shape == (3, RestockMonitor.FEATURE_COUNT)
+    assert np.isfinite(model.batches[0]).all()
+    for sku in ('A', 'B', 'C'):
+        view = monitor.predictions.get(sku)
+        assert abs(view.probability - 0.8) < 1e-6
+        assert view.next_check_ts > time.time()
+        assert f"prediction_{sku}" in monitor.cache_manager.items
+    assert len(monitor.scheduler) == 3
+
+
+def test_stale_view_is_skipped_without_failing_batch():
+    monitor = make_monitor()
+    add_due(monitor, 'A')
+    add_due(monitor, 'B')
+    views = [monitor.predictions.get('A'), monitor.predictions.get('B')]
+    monitor._unschedule('A')
+
+    updated = asyncio.run(monitor.update_predictions_batch(views))
+
+    assert [view.sku for view in updated] == ['B']
+    assert 'A' not in monitor.predictions
+
+
+def test_failed_check_is_rescheduled_with_backoff():
+    class FailingHHVClient:
+        async def probe_availability(self, url):
+            # Wie HHVClient.probe_availability: Fehler werden geloggt, Ergebnis ist None
+            return None
+
+    monitor = RestockMonitor(FakeRestockModel(), FakeCache(), hhv_client=FailingHHVClient())
+    add_due(monitor, 'A')
+
+    before = time.time()
+    assert asyncio.run(monitor._dispatch_due_checks()) == []
+    first_retry = monitor.predictions.get('A').next_check_ts
+    assert first_retry >= before + monitor.min_check_interval
+    assert len(monitor.scheduler) == 1
+
+    monitor.predictions.upsert_many(['A'], next_check=np.array([time.time() - 1]))
+    monitor._schedule_many(['A'], np.array([time.time() - 1]))
+    asyncio.run(monitor._dispatch_due_checks())
+    assert monitor.predictions.get('A').next_check_ts >= time.time() + 2 * monitor.min_check_interval - 1
+
+
+def test_sold_out_to_available_is_notified_once():
+    class RestockingHHVClient:
+        def __init__(self):
+            self.responses = [
+                {'available': False, 'sizes': {'42': False}},
+                {'available': True, 'sizes': {'42': True}}
+            ]
+
+        async def probe_availability(self, url):
+            return self.responses.pop(0)
+
+    notifier = FakeNotifier()
+    monitor = RestockMonitor(
+        FakeRestockModel(), FakeCache(), discord_notifier=notifier, hhv_client=RestockingHHVClient()
+    )
+    add_due(monitor, 'A')
+
+    # Erster Check legt nur den Ausgangszustand fest
+    assert asyncio.run(monitor.monitor_restocks()) == []
+    monitor.predictions.upsert_many(['A'], next_check=np.array([time.time() - 1]))
+    monitor._schedule_many(['A'], np.array([time.time() - 1]))
+
+    restocks = asyncio.run(monitor.monitor_restocks())
+
+    assert [restock['sku'] for restock in restocks] == ['A']
+    assert [data['sku'] for data in notifier.sent] == ['A']
+    assert 'A' not in monitor.predictions
+
+
+def test_failed_notification_keeps_restock_for_next_check():
+    class FlakyNotifier(FakeNotifier):
+        async def send_restock_notification(self, restock_data):
+            if not self.sent:
+                self.sent.append(None)
+                return False
+            return await super().send_restock_notification(restock_data)
+
+    class AvailableHHVClient:
+        async def probe_availability(self, url):
+            return {'available': True, 'sizes': {'42': True}}
+
+    notifier = FlakyNotifier()
+    monitor = RestockMonitor(
+        FakeRestockModel(), FakeCache(), discord_notifier=notifier, hhv_client=AvailableHHVClient()
+    )
+    add_due(monitor, 'A')
+    monitor.last_availability['A'] = (False, frozenset())
+
+    assert asyncio.run(monitor.monitor_restocks()) == []
+    assert monitor.last_availability['A'] == (False, frozenset())
+    assert monitor.predictions.get('A').next_check_ts >= time.time() + monitor.min_check_interval - 1
+
+    monitor.predictions.upsert_many(['A'], next_check=np.array([time.time() - 1]))
+    monitor._schedule_many(['A'], np.array([time.time() - 1]))
+    restocks = asyncio.run(monitor.monitor_restocks())
+
+    assert [restock['sku'] for restock in restocks] == ['A']
+    assert 'A' not in monitor.predictions
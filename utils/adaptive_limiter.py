@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional
+
+try:
+    import psutil
+except ImportError:  # ohne psutil: CPU über die Load-Average, kein RSS
+    psutil = None
+
+
+class AdaptiveLimiter:
+    """
+    Nebenläufigkeitsgrenze, die sich an CPU-Last, Speicher und Latenz anpasst.
+
+    Das Limit steigt additiv, solange CPU, RSS und die p90-Latenz unter ihren
+    Zielen liegen, und sinkt multiplikativ, sobald eines davon überschritten
+    wird (AIMD). Angepasst wird beim Freigeben eines Slots, höchstens einmal
+    pro adjust_interval.
+    """
+
+    def __init__(
+        self,
+        min_limit: int = 2,
+        max_limit: int = 20,
+        initial_limit: Optional[int] = None,
+        target_latency: float = 10.0,
+        max_cpu_percent: float = 85.0,
+        max_rss_mb: float = 0.0,
+        rss_probe: Optional[Callable[[], float]] = None,
+        adjust_interval: float = 5.0
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(self.max_limit, max(self.min_limit, initial_limit or self.min_limit))
+        self.target_latency = target_latency
+        self.max_cpu_percent = max_cpu_percent
+        self.max_rss_mb = max_rss_mb
+        self.rss_probe = rss_probe
+        self.adjust_interval = adjust_interval
+        self.logger = logging.getLogger("AdaptiveLimiter")
+
+        self.in_use = 0
+        self._paused = False
+        self._condition = asyncio.Condition()
+        self._latencies = deque(maxlen=100)
+        self._last_adjust = time.monotonic()
+        self.stats = {
+            'acquired': 0,
+            'increases': 0,
+            'decreases': 0,
+            'cpu_percent': 0.0,
+            'rss_mb': 0.0,
+            'p90_latency': 0.0
+        }
+
+    @asynccontextmanager
+    async def slot(self):
+        """Belegt einen Slot und misst die Dauer der Arbeit darin."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._paused and self.in_use < self.limit)
+            self.in_use += 1
+            self.stats['acquired'] += 1
+
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._latencies.append(time.monotonic() - start)
+            async with self._condition:
+                self.in_use -= 1
+                if time.monotonic() - self._last_adjust >= self.adjust_interval:
+                    self._adjust()
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def exclusive(self):
+        """Wartet, bis alle Slots frei sind, und sperrt neue, z.B. für einen Browser-Neustart."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._paused)
+            self._paused = True
+            await self._condition.wait_for(lambda: self.in_use == 0)
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._paused = False
+                self._condition.notify_all()
+
+    def _adjust(self) -> None:
+        self._last_adjust = time.monotonic()
+        cpu = self._cpu_percent()
+        rss = self.rss_probe() if self.rss_probe else 0.0
+        latencies = sorted(self._latencies)
+        p90 = latencies[int(len(latencies) * 0.9) - 1] if latencies else 0.0
+        self.stats.update({'cpu_percent': cpu, 'rss_mb': rss, 'p90_latency': p90})
+
+        overloaded = (
+            cpu > self.max_cpu_percent
+            or (self.max_rss_mb and rss > self.max_rss_mb)
+            or (self.target_latency and p90 > self.target_latency * 1.5)
+        )
+        headroom = (
+            cpu < self.max_cpu_percent * 0.8
+            and (not self.max_rss_mb or rss < self.max_rss_mb * 0.8)
+            and (not self.target_latency or p90 <= self.target_latency)
+        )
+
+        previous = self.limit
+        if overloaded:
+            self.limit = max(self.min_limit, int(self.limit * 0.75))
+        elif headroom and self.in_use + 1 >= self.limit:
+            # Nur erhöhen, wenn das Limit tatsächlich ausgeschöpft wird
+            self.limit = min(self.max_limit, self.limit + 1)
+
+        if self.limit != previous:
+            self.stats['increases' if self.limit > previous else 'decreases'] += 1
+            self.logger.info(
+                f"Limit {previous} -> {self.limit} (CPU {cpu:.0f}%, RSS {rss:.0f} MB, p90 {p90:.1f}s)"
+            )
+
+    @staticmethod
+    def _cpu_percent() -> float:
+        if psutil is not None:
+            return psutil.cpu_percent(interval=None)
+        try:
+            return os.getloadavg()[0] / (os.cpu_count() or 1) * 100
+        except (AttributeError, OSError):
+            return 0.0
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, 'limit': self.limit, 'in_use': self.in_use}
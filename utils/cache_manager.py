@@ -1,5 +1,7 @@
 import redis
-from typing import Optional, Any, Dict
+import asyncio
+import uuid
+from typing import Optional, Any, Dict, Callable, Tuple
 import json
 import logging
 from datetime import timedelta, datetime
@@ -15,6 +17,9 @@ class CacheManager:
             'prediction': 'pred_',
             'restock': 'restock_'
         }
+        # Pub/Sub-Kanal zur Invalidierung lokaler L1-Caches anderer Bot-Instanzen
+        self.invalidation_channel = 'cache_invalidation'
+        self.instance_id = uuid.uuid4().hex
 
     async def get(self, key: str, category: str = None) -> Optional[Any]:
         """Holt Daten aus dem Cache."""
@@ -30,6 +35,29 @@ class CacheManager:
             self.logger.error(f"Cache get error for {key}: {e}")
             return None
 
+    async def get_with_ttl(self, key: str, category: str = None) -> Tuple[Optional[Any], float]:
+        """Holt Daten samt verbleibender Gültigkeit in Sekunden, z.B. zum Befüllen eines L1-Caches."""
+        try:
+            full_key = f"{self.prefix.get(category, '')}{key}"
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(full_key)
+            pipe.pttl(full_key)
+            data, pttl = pipe.execute()
+            if not data:
+                return None, 0.0
+            cached_data = json.loads(data)
+            if not self._is_valid_cache(cached_data):
+                return None, 0.0
+            # Früheres Ende aus Redis-TTL und Alterslimit; pttl < 0 heißt ohne Ablauf
+            age = (datetime.now() - datetime.fromisoformat(cached_data['timestamp'])).total_seconds()
+            remaining = self.default_ttl - age
+            if pttl is not None and pttl >= 0:
+                remaining = min(remaining, pttl / 1000)
+            return cached_data.get('data'), max(0.0, remaining)
+        except Exception as e:
+            self.logger.error(f"Cache get error for {key}: {e}")
+            return None, 0.0
+
     async def set(
         self,
         key: str,
@@ -95,6 +123,71 @@ class CacheManager:
             self.logger.error(f"Cache get_many error: {e}")
             return results
 
+    async def set_many(
+        self,
+        items: Dict[str, Any],
+        category: str = None,
+        ttl: Optional[int] = None
+    ) -> bool:
+        """Speichert mehrere Einträge mit einer Pipeline."""
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            timestamp = datetime.now().isoformat()
+            for key, value in items.items():
+                full_key = f"{self.prefix.get(category, '')}{key}"
+                cache_data = {
+                    'data': value,
+                    'timestamp': timestamp,
+                    'category': category
+                }
+                pipe.setex(full_key, ttl or self.default_ttl, json.dumps(cache_data))
+            pipe.execute()
+            return True
+        except Exception as e:
+            self.logger.error(f"Cache set_many error: {e}")
+            return False
+
+    async def publish_invalidation(self, key: str, category: str = None) -> bool:
+        """Benachrichtigt andere Instanzen, dass ein Eintrag veraltet ist."""
+        try:
+            message = json.dumps({
+                'key': key,
+                'category': category,
+                'origin': self.instance_id
+            })
+            self.redis.publish(self.invalidation_channel, message)
+            return True
+        except Exception as e:
+            self.logger.error(f"Cache invalidation publish error for {key}: {e}")
+            return False
+
+    async def listen_invalidations(self, callback: Callable[[str], Any]) -> None:
+        """Ruft callback(key) für jede Invalidierung einer anderen Instanz auf."""
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pending = None
+        try:
+            pubsub.subscribe(self.invalidation_channel)
+            while True:
+                try:
+                    # Der Thread lässt sich nicht abbrechen; geschützt, damit close() auf ihn warten kann
+                    pending = asyncio.ensure_future(asyncio.to_thread(pubsub.get_message, timeout=1.0))
+                    message = await asyncio.shield(pending)
+                    if not message:
+                        continue
+                    payload = json.loads(message['data'])
+                    if payload.get('origin') != self.instance_id:
+                        callback(payload['key'])
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.logger.error(f"Cache invalidation listener error: {e}")
+                    await asyncio.sleep(1)
+        finally:
+            if pending is not None and not pending.done():
+                # Läuft noch im Thread und nutzt die Verbindung; endet spätestens nach dem Timeout
+                await asyncio.wait({pending})
+            pubsub.close()
+
     def _is_valid_cache(self, cached_data: Dict) -> bool:
         """Prüft ob Cache-Eintrag noch gültig ist."""
         try:
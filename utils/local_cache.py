@@ -0,0 +1,71 @@
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class LocalCache:
+    """Begrenzter In-Process-Cache mit LRU-Verdrängung und TTL (L1 vor Redis)."""
+
+    def __init__(self, max_items: int = 10000, ttl: int = 300):
+        self.max_items = max(1, max_items)
+        self.ttl = ttl
+        self.logger = logging.getLogger("LocalCache")
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0
+        }
+
+    def get(self, key: str) -> Optional[Any]:
+        """Holt einen Eintrag; abgelaufene Einträge werden dabei entfernt."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.stats['expirations'] += 1
+            self.stats['misses'] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Speichert einen Eintrag und verdrängt bei Bedarf den ältesten."""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def invalidate(self, key: str) -> bool:
+        """Entfernt einen Eintrag, z.B. nach einer Invalidierung durch eine andere Instanz."""
+        if self._entries.pop(key, None) is None:
+            return False
+        self.stats['invalidations'] += 1
+        return True
+
+    def clear(self) -> None:
+        """Leert den Cache vollständig."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict:
+        """Liefert Treffer-, Fehl- und Verdrängungszähler."""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'size': len(self._entries),
+            'max_items': self.max_items,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0
+        }